@@ -0,0 +1,138 @@
+"""
+构建清单
+记录每次生成的输入与输出文件内容哈希，用于增量生成：
+输入未变化且输出文件完好的题目直接跳过，已删除题目遗留的文件被清理
+"""
+
+import hashlib
+import json
+import os
+
+
+# 清单文件名（保存在输出目录中）
+MANIFEST_NAME = ".exam-manifest.json"
+# 清单格式版本，格式变化时旧清单作废（相当于完整重建）
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data):
+    """计算字节内容的哈希"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    """分块计算文件内容的哈希"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class BuildManifest:
+    """构建清单
+
+    sources: 源文件路径 -> [大小, 修改时间(ns), 内容哈希]，文件未变化时复用哈希
+    outputs: 输出相对路径 -> [大小, 修改时间(ns), 内容哈希]
+    units:   构建单元（static、每道题）-> {'key': 输入哈希, 'outputs': [输出相对路径], 'dirs': [创建的目录]}
+    """
+
+    def __init__(self, output_dir, previous=None):
+        self.output_dir = output_dir
+        self.previous = previous
+        self.sources = {}
+        self.outputs = {}
+        self.units = {}
+
+    @classmethod
+    def load(cls, output_dir):
+        """读取输出目录中的清单，不存在或格式不符时返回空清单"""
+        manifest = cls(output_dir)
+        try:
+            with open(os.path.join(output_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        if data.get('version') == MANIFEST_VERSION:
+            manifest.sources = data.get('sources', {})
+            manifest.outputs = data.get('outputs', {})
+            manifest.units = data.get('units', {})
+        return manifest
+
+    def save(self):
+        """写入清单（先写临时文件再替换，避免留下不完整的清单）"""
+        data = {
+            'version': MANIFEST_VERSION,
+            'sources': self.sources,
+            'outputs': self.outputs,
+            'units': self.units,
+        }
+        path = os.path.join(self.output_dir, MANIFEST_NAME)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    def source_hash(self, path, st=None):
+        """获取源文件内容哈希，大小和修改时间未变时复用上次的结果
+
+        Args:
+            st: 已知的stat结果，省略时查询文件系统
+        """
+        path = str(path)
+        if st is None:
+            st = os.stat(path)
+        record = self.sources.get(path)
+        if record is None and self.previous is not None:
+            record = self.previous.sources.get(path)
+        if not record or record[0] != st.st_size or record[1] != st.st_mtime_ns:
+            record = [st.st_size, st.st_mtime_ns, hash_file(path)]
+        self.sources[path] = record
+        return record[2]
+
+    def record_output(self, rel, sha=None):
+        """登记一个已写入的输出文件，sha为None时读取文件计算哈希"""
+        path = os.path.join(self.output_dir, rel)
+        st = os.stat(path)
+        if sha is None:
+            sha = hash_file(path)
+        self.outputs[rel] = [st.st_size, st.st_mtime_ns, sha]
+
+    def output_is_current(self, rel, sha=None):
+        """上次生成的输出文件是否仍然完好（且内容哈希为sha）"""
+        if self.previous is None:
+            return False
+        record = self.previous.outputs.get(rel)
+        if not record or (sha is not None and record[2] != sha):
+            return False
+        try:
+            st = os.stat(os.path.join(self.output_dir, rel))
+        except OSError:
+            return False
+        return st.st_size == record[0] and st.st_mtime_ns == record[1]
+
+    def keep_output(self, rel):
+        """沿用上次生成的输出文件记录"""
+        self.outputs[rel] = self.previous.outputs[rel]
+
+    def unit_is_current(self, name, key):
+        """构建单元的输入未变化，且其全部输出文件完好"""
+        if self.previous is None:
+            return False
+        unit = self.previous.units.get(name)
+        if not unit or unit['key'] != key:
+            return False
+        if not all(os.path.isdir(os.path.join(self.output_dir, rel)) for rel in unit.get('dirs', [])):
+            return False
+        return all(self.output_is_current(rel) for rel in unit['outputs'])
+
+    def keep_unit(self, name):
+        """沿用上次生成的构建单元"""
+        unit = self.previous.units[name]
+        self.units[name] = unit
+        for rel in unit['outputs']:
+            self.keep_output(rel)
+
+    def set_unit(self, name, key, outputs, dirs=()):
+        """登记重新生成的构建单元"""
+        self.units[name] = {'key': key, 'outputs': list(outputs), 'dirs': list(dirs)}
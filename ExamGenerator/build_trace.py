@@ -0,0 +1,154 @@
+"""
+构建计时
+记录生成试卷时各阶段（读取清单、static/、每道题的哈希计算、页面生成、图片优化、配置文件、
+素材复制等）的耗时，以及每道题复制、链接和写入的文件数与字节数。
+结果可导出为JSON报告，或Chrome跟踪事件格式（chrome://tracing、Perfetto中打开）。
+
+未启用时构建器使用NULL_TRACE，每次记录只是一次空方法调用。
+"""
+
+import json
+import os
+import threading
+import time
+
+
+# 各构建单元的计数项
+COUNTERS = ('files_written', 'bytes_written', 'files_copied', 'bytes_copied', 'files_linked', 'bytes_linked')
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTrace:
+    """未启用的构建计时，不记录任何内容"""
+
+    enabled = False
+
+    def span(self, name, unit=None, **args):
+        return _NULL_SPAN
+
+    def add(self, unit, **counts):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+class _Span:
+    """一段计时，退出时记录到BuildTrace"""
+
+    __slots__ = ('trace', 'name', 'unit', 'args', 'start')
+
+    def __init__(self, trace, name, unit, args):
+        self.trace = trace
+        self.name = name
+        self.unit = unit
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.record(self.name, self.unit, self.start, time.perf_counter_ns() - self.start, self.args)
+        return False
+
+
+class BuildTrace:
+    """构建计时记录
+
+    各阶段可以嵌套（如“question”中包含“render”），也可以在复制线程中记录（“copy”），
+    报告中的阶段耗时是该阶段所有记录的耗时之和。
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.origin = time.perf_counter_ns()
+        self.lock = threading.Lock()
+        # [(名称, 构建单元, 开始ns, 耗时ns, 参数, 线程id)]
+        self.events = []
+        self.threads = {}
+        # 构建单元（"01"等题目、"static"、"project"） -> 计数
+        self.counts = {}
+
+    def span(self, name, unit=None, **args):
+        """记录一段耗时：with trace.span('render', '01'): ..."""
+        return _Span(self, name, unit, args)
+
+    def record(self, name, unit, start, duration, args):
+        thread = threading.current_thread()
+        with self.lock:
+            self.events.append((name, unit, start, duration, args, thread.ident))
+            self.threads.setdefault(thread.ident, thread.name)
+
+    def add(self, unit, **counts):
+        """累加构建单元的计数（见COUNTERS）"""
+        with self.lock:
+            unit_counts = self.counts.get(unit)
+            if unit_counts is None:
+                unit_counts = self.counts[unit] = dict.fromkeys(COUNTERS, 0)
+            for key, n in counts.items():
+                unit_counts[key] += n
+
+    def report(self):
+        """汇总报告：各阶段耗时、各构建单元的耗时和计数、总计"""
+        with self.lock:
+            events = list(self.events)
+            counts = {unit: dict(c) for unit, c in self.counts.items()}
+
+        phases = {}
+        units = {}
+        for name, unit, start, duration, args, tid in events:
+            phase = phases.setdefault(name, {'seconds': 0.0, 'count': 0})
+            phase['seconds'] += duration / 1e9
+            phase['count'] += 1
+            if unit is not None:
+                entry = units.setdefault(unit, {'seconds': {}})
+                entry['seconds'][name] = entry['seconds'].get(name, 0.0) + duration / 1e9
+        for unit, unit_counts in counts.items():
+            units.setdefault(unit, {'seconds': {}}).update(unit_counts)
+
+        totals = dict.fromkeys(COUNTERS, 0)
+        for unit_counts in counts.values():
+            for key in COUNTERS:
+                totals[key] += unit_counts[key]
+        build = phases.get('build')
+        return {
+            'total_seconds': build['seconds'] if build else 0.0,
+            'phases': dict(sorted(phases.items(), key=lambda item: -item[1]['seconds'])),
+            'totals': totals,
+            'units': units,
+        }
+
+    def chrome_trace(self):
+        """Chrome跟踪事件格式的数据（时间单位为微秒）"""
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+        trace_events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                        for tid, name in threads.items()]
+        for name, unit, start, duration, args, tid in events:
+            event_args = dict(args, unit=unit) if unit is not None else args
+            trace_events.append({'name': name, 'cat': 'build', 'ph': 'X', 'pid': pid, 'tid': tid,
+                                 'ts': (start - self.origin) / 1e3, 'dur': duration / 1e3,
+                                 'args': event_args})
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def save_report(self, file):
+        with open(file, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+    def save_chrome_trace(self, file):
+        with open(file, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
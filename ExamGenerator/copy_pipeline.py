@@ -0,0 +1,140 @@
+"""
+并发文件复制流水线
+在后台线程池中复制素材，与HTML生成同时进行；按字节报告进度，支持取消，
+复制先写入临时文件再改名，取消或出错时不会留下写了一半的文件
+"""
+
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+# 每次读写的块大小，也是检查取消和报告进度的粒度
+CHUNK_SIZE = 1 << 20
+
+
+class BuildCancelled(Exception):
+    """生成过程被用户取消"""
+
+
+class CopyPipeline:
+    """有界线程池复制流水线
+
+    submit提交的任务在线程池中执行；待执行的任务数达到上限时submit阻塞，
+    避免生成线程远远跑在磁盘前面而占用大量内存。
+    """
+
+    def __init__(self, workers=4, progress=None, cancel_event=None, max_pending=None):
+        """
+        Args:
+            workers: 复制线程数
+            progress: 进度回调 progress(已完成字节数, 总字节数)，在复制线程中持锁调用，不能再调用本对象
+            cancel_event: threading.Event，置位后停止复制
+            max_pending: 最多同时挂起的任务数，默认为线程数的4倍
+        """
+        self.progress = progress
+        self.cancel_event = cancel_event
+        # 内部停止标志：有任务失败或调用cancel时置位，不影响调用方传入的cancel_event
+        self.stopped = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="copy")
+        self.slots = threading.BoundedSemaphore(max_pending or workers * 4)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.futures = []
+        self.total_bytes = 0
+        self.done_bytes = 0
+
+    def check_cancelled(self):
+        """已取消时抛出BuildCancelled"""
+        if self.stopped.is_set() or (self.cancel_event is not None and self.cancel_event.is_set()):
+            raise BuildCancelled("已取消生成")
+
+    def submit(self, size, func, *args):
+        """提交任务，返回Future
+
+        Args:
+            size: 任务涉及的字节数（用于进度统计）
+            func: 在复制线程中执行的函数，实际复制数据时应调用copy_file
+        """
+        self.check_cancelled()
+        self.slots.acquire()
+        with self.lock:
+            self.total_bytes += size
+        try:
+            future = self.executor.submit(self._run, size, func, args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda f: self.slots.release())
+        self.futures.append(future)
+        return future
+
+    def _run(self, size, func, args):
+        self.check_cancelled()
+        self.local.copied = 0
+        result = func(*args)
+        # 链接等不复制数据的操作也计入进度
+        self.advance(size - self.local.copied)
+        return result
+
+    def advance(self, n):
+        """累计已完成的字节数并报告进度
+
+        回调在锁内调用，多个复制线程报告的已完成字节数按调用顺序递增，进度条不会倒退。
+        """
+        if n <= 0:
+            return
+        with self.lock:
+            self.done_bytes += n
+            if self.progress:
+                self.progress(self.done_bytes, self.total_bytes)
+
+    def copied(self, n):
+        """复制线程中已读写n字节（用于不经过copy_file的复制，如写入压缩包）"""
+        self.local.copied = getattr(self.local, 'copied', 0) + n
+        self.advance(n)
+
+    def copy_file(self, src, dst):
+        """分块复制文件（保留元数据），写入临时文件后再改名为dst"""
+        dst = Path(dst)
+        tmp = dst.with_name(f".{dst.name}.{threading.get_ident()}.part")
+        try:
+            with open(src, 'rb') as fsrc, open(tmp, 'wb') as fdst:
+                while True:
+                    self.check_cancelled()
+                    chunk = fsrc.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    fdst.write(chunk)
+                    self.copied(len(chunk))
+            shutil.copystat(src, tmp)
+            os.replace(tmp, dst)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        return dst
+
+    def wait(self):
+        """等待全部任务完成，有任务失败时取消其余任务并抛出第一个错误"""
+        try:
+            for future in self.futures:
+                future.result()
+        except BaseException:
+            self.cancel()
+            raise
+        finally:
+            self.futures = []
+
+    def cancel(self):
+        """取消尚未完成的任务，并等待正在复制的任务清理临时文件后退出"""
+        self.stopped.set()
+        self.executor.shutdown(wait=True)
+
+    def close(self):
+        """关闭线程池"""
+        self.executor.shutdown(wait=True)
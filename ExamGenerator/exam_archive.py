@@ -0,0 +1,274 @@
+"""
+压缩包输出
+生成试卷时把页面、配置文件和素材直接写入zip或tar压缩包，不在磁盘上先生成目录再打包。
+已压缩的文件（jpg、png、psd等）在zip中直接存储不再压缩；相同内容的素材在tar中只写入一次，
+其余用硬链接成员指向它
+"""
+
+import io
+import os
+import shutil
+import tarfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from build_manifest import BuildManifest
+from copy_pipeline import CHUNK_SIZE
+from exam_builder import ExamBuilder, load_project
+
+try:
+    import zstandard
+except ImportError:  # zstandard为可选依赖，只有生成.tar.zst时需要
+    zstandard = None
+
+
+# 本身已压缩、再压缩几乎不会变小的文件，在zip中直接存储
+STORED_SUFFIXES = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.psd', '.woff', '.woff2',
+    '.zip', '.rar', '.7z', '.gz', '.bz2', '.xz', '.zst',
+    '.mp3', '.mp4', '.docx', '.xlsx', '.pptx',
+}
+
+# 支持的压缩包格式（扩展名 -> tarfile流模式），.zip单独处理
+TAR_MODES = {
+    '.tar': 'w|',
+    '.tar.gz': 'w|gz',
+    '.tgz': 'w|gz',
+    '.tar.xz': 'w|xz',
+    '.tar.zst': 'w|',
+}
+ARCHIVE_SUFFIXES = ('.zip',) + tuple(TAR_MODES)
+
+# tar.zst的压缩级别
+ZSTD_LEVEL = 10
+
+
+def archive_suffix(path):
+    """压缩包路径对应的格式（如 '.tar.zst'），不是支持的格式时返回None"""
+    name = Path(path).name.lower()
+    return next((suffix for suffix in sorted(ARCHIVE_SUFFIXES, key=len, reverse=True)
+                 if name.endswith(suffix)), None)
+
+
+class ProgressReader:
+    """包装源文件：每次读取后回调读到的字节数（用于进度和取消检查）"""
+
+    def __init__(self, f, on_read):
+        self.f = f
+        self.on_read = on_read
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        if data:
+            self.on_read(len(data))
+        return data
+
+
+class ZipArchive:
+    """zip压缩包写入器（不支持链接，相同内容的文件各存一份）"""
+
+    supports_links = False
+
+    def __init__(self, path):
+        self.zf = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+
+    @staticmethod
+    def compression(rel):
+        return zipfile.ZIP_STORED if Path(rel).suffix.lower() in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+
+    def add_dir(self, rel):
+        self.zf.writestr(zipfile.ZipInfo(rel, time.localtime()[:6]), b'')
+
+    def add_bytes(self, rel, data):
+        info = zipfile.ZipInfo(rel, time.localtime()[:6])
+        info.compress_type = self.compression(rel)
+        self.zf.writestr(info, data)
+
+    def add_file(self, rel, src, on_read):
+        info = zipfile.ZipInfo.from_file(src, rel)
+        info.compress_type = self.compression(rel)
+        with open(src, 'rb') as fsrc, self.zf.open(info, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as fdst:
+            shutil.copyfileobj(ProgressReader(fsrc, on_read), fdst, CHUNK_SIZE)
+
+    def close(self):
+        self.zf.close()
+
+
+class TarArchive:
+    """tar压缩包写入器（流式写入，.tar.zst 通过zstandard压缩）"""
+
+    supports_links = True
+
+    def __init__(self, path, suffix):
+        self.file = open(path, 'wb')
+        self.zstd = None
+        fileobj = self.file
+        if suffix == '.tar.zst':
+            self.zstd = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1).stream_writer(
+                self.file, closefd=False)
+            fileobj = self.zstd
+        self.tf = tarfile.open(fileobj=fileobj, mode=TAR_MODES[suffix], format=tarfile.PAX_FORMAT)
+        self.mtime = int(time.time())
+
+    def _info(self, rel, type=tarfile.REGTYPE, size=0, mode=0o644):
+        info = tarfile.TarInfo(rel)
+        info.type = type
+        info.size = size
+        info.mode = mode
+        info.mtime = self.mtime
+        return info
+
+    def add_dir(self, rel):
+        self.tf.addfile(self._info(rel, tarfile.DIRTYPE, mode=0o755))
+
+    def add_bytes(self, rel, data):
+        self.tf.addfile(self._info(rel, size=len(data)), io.BytesIO(data))
+
+    def add_file(self, rel, src, on_read):
+        st = os.stat(src)
+        info = self._info(rel, size=st.st_size)
+        info.mtime = int(st.st_mtime)
+        with open(src, 'rb') as fsrc:
+            self.tf.addfile(info, ProgressReader(fsrc, on_read))
+
+    def add_link(self, rel, target):
+        """写入指向已有成员target的硬链接（不再包含数据）"""
+        info = self._info(rel, tarfile.LNKTYPE)
+        info.linkname = target
+        self.tf.addfile(info)
+
+    def close(self):
+        self.tf.close()
+        if self.zstd is not None:
+            self.zstd.close()
+        self.file.close()
+
+
+def open_archive(path, suffix=None):
+    """按扩展名（或指定的格式suffix）创建压缩包写入器"""
+    suffix = suffix or archive_suffix(path)
+    if suffix is None:
+        raise ValueError(f"不支持的压缩包格式：{Path(path).name}（支持 {'、'.join(ARCHIVE_SUFFIXES)}）")
+    if suffix == '.tar.zst' and zstandard is None:
+        raise ValueError("生成 .tar.zst 需要安装zstandard（pip install zstandard）")
+    if suffix == '.zip':
+        return ZipArchive(path)
+    return TarArchive(path, suffix)
+
+
+class ArchiveBuffer(io.BytesIO):
+    """页面等生成的文件先写入内存，关闭时作为一个成员写入压缩包"""
+
+    def __init__(self, builder, rel):
+        super().__init__()
+        self.builder = builder
+        self.rel = rel
+
+    def close(self):
+        if not self.closed:
+            self.builder.add_bytes(self.rel, self.getvalue())
+        super().close()
+
+
+class ArchiveManifest(BuildManifest):
+    """压缩包输出使用的清单：只用于缓存源文件哈希，输出只记录内容哈希，不保存到磁盘"""
+
+    def record_output(self, rel, sha=None):
+        self.outputs[rel] = [None, None, sha]
+
+
+class ArchiveBuilder(ExamBuilder):
+    """直接生成压缩包的试卷构建器
+
+    输出写入压缩包而不是目录，因此总是完整生成（没有构建清单和增量生成）。
+    素材仍在后台线程中读取并写入压缩包，与页面生成同时进行；
+    压缩包一次只能写入一个成员，所有写入都在锁内进行。
+    """
+
+    def __init__(self, project, archive_path, **kwargs):
+        kwargs['incremental'] = False
+        # 压缩包中没有共享仓库的链接；单线程写入使成员顺序与生成顺序一致
+        kwargs['asset_store'] = None
+        kwargs['copy_workers'] = 1
+        super().__init__(project, archive_path, **kwargs)
+        self.archive = None
+        self.archive_lock = threading.Lock()
+        self.dirs = set()
+        # 已写入的内容：哈希 -> 成员路径
+        self.written = {}
+
+    def open_output(self):
+        self.output_dir.parent.mkdir(parents=True, exist_ok=True)
+        # 先写入临时文件，成功后再改名，失败或取消时不留下不完整的压缩包
+        self.tmp_path = self.output_dir.with_name(f".{self.output_dir.name}.part")
+        self.archive = open_archive(self.tmp_path, archive_suffix(self.output_dir))
+        self.previous = None
+        self.manifest = ArchiveManifest(self.output_dir.parent)
+
+    def close_output(self):
+        self.archive.close()
+        self.archive = None
+        os.replace(self.tmp_path, self.output_dir)
+
+    def build(self):
+        try:
+            return super().build()
+        except BaseException:
+            if self.archive is not None:
+                try:
+                    self.archive.close()
+                except Exception:
+                    pass
+                self.archive = None
+                self.tmp_path.unlink(missing_ok=True)
+            raise
+
+    def create_dirs(self, rel):
+        parts = rel.split('/')
+        with self.archive_lock:
+            for k in range(1, len(parts) + 1):
+                path = '/'.join(parts[:k])
+                if path not in self.dirs:
+                    self.dirs.add(path)
+                    self.archive.add_dir(path + '/')
+
+    def open_file(self, rel):
+        return ArchiveBuffer(self, rel)
+
+    def add_bytes(self, rel, data):
+        with self.archive_lock:
+            self.archive.add_bytes(rel, data)
+
+    def place_file(self, src, rel, sha, editable, source):
+        """在复制线程中把文件写入压缩包；相同内容的非考生编辑文件写成硬链接"""
+        with self.archive_lock:
+            target = self.written.get(sha)
+            if target is not None and not editable and self.archive.supports_links:
+                self.archive.add_link(rel, target)
+                method = 'hardlink'
+                with self.lock:
+                    self.result.linked_count += 1
+            else:
+                self.archive.add_file(rel, src, self.on_read)
+                method = 'copy'
+                if not editable:
+                    self.written.setdefault(sha, rel)
+        self.manifest.record_output(rel, sha)
+        return method
+
+    def on_read(self, n):
+        self.pipeline.check_cancelled()
+        self.pipeline.copied(n)
+
+
+def build_archive(project, archive_path, **kwargs):
+    """根据项目数据直接生成试卷压缩包（.zip、.tar.zst等），其他参数同ExamBuilder"""
+    return ArchiveBuilder(project, archive_path, **kwargs).build()
+
+
+def build_project_archive(project_file, archive_path, **kwargs):
+    """加载项目文件并生成试卷压缩包，题目中的相对路径以项目文件所在目录为准"""
+    project_file = Path(project_file)
+    kwargs.setdefault('base_dir', project_file.parent)
+    return build_archive(load_project(project_file), archive_path, **kwargs)
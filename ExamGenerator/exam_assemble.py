@@ -0,0 +1,69 @@
+"""
+电子试卷生成工具 - 随机组卷命令行入口
+按组卷规则从题库（项目JSON或SQLite题库）中抽取多套试卷，每套保存为一个项目JSON，
+之后可用 exam_cli.py 批量生成
+
+用法：
+    python exam_assemble.py 题库.db 组卷规则.json -n 套数 [--seed 种子] [-o 输出目录]
+
+退出码：0 成功，1 组卷规则无法满足，2 参数错误。
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from exam_builder import load_project, save_project
+from paper_assembly import AssemblyError, assemble_projects
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="电子试卷随机组卷工具")
+    parser.add_argument('bank', help="题库文件（项目JSON或.db题库）")
+    parser.add_argument('spec', help="组卷规则JSON文件")
+    parser.add_argument('-n', '--count', type=int, default=1, help="抽取的试卷套数（默认：1）")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子，相同种子得到相同的试卷（默认：0）")
+    parser.add_argument('-o', '--output-dir', default='./papers',
+                        help="项目文件输出目录，每套保存为 paper-001.json 等（默认：./papers）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """命令行主函数，返回退出码"""
+    args = parse_args(argv)
+    bank_file = Path(args.bank)
+    spec_file = Path(args.spec)
+    for file in (bank_file, spec_file):
+        if not file.is_file():
+            print(f"错误：找不到文件：{file}", file=sys.stderr)
+            return 2
+    if args.count < 1:
+        print("错误：套数必须是正整数", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    questions = load_project(bank_file).get('questions', [])
+    with open(spec_file, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+
+    try:
+        projects = assemble_projects(questions, spec, args.count, seed=args.seed,
+                                     base_dir=bank_file.parent)
+    except AssemblyError as e:
+        print(f"组卷失败：{e}", file=sys.stderr)
+        return 1
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    width = max(3, len(str(len(projects))))
+    for n, project in enumerate(projects, 1):
+        save_project(project, output_dir / f"paper-{n:0{width}d}.json")
+
+    print(f"已从 {len(questions)} 道题目中抽取 {len(projects)} 套试卷到 {output_dir}，"
+          f"用时 {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,471 @@
+"""
+电子试卷生成工具 - 性能基准测试
+生成100、1千、1万、10万道题的合成项目（含素材文件夹和图片），分别测量
+HTMLTemplate各generate_*方法、static/和题目素材的放置、配置文件的写入以及完整生成的耗时，
+并测量命令行和界面的启动时间；结果保存为JSON，指定基准结果时逐项比较，变慢超过阈值的项目视为性能回退
+
+用法：
+    python exam_benchmark.py [--sizes 100 1000 ...] [-o 结果.json] [--baseline 基准.json]
+                             [--threshold 0.2] [--repeat 3] [--pool 200] [--workdir 目录]
+                             [--no-startup]
+
+退出码：0 完成且没有回退，1 有性能回退，2 参数错误。
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from copy_pipeline import CopyPipeline
+from exam_builder import ExamBuilder, build_exam
+from html_template import HTMLTemplate
+
+
+RESULTS_VERSION = 1
+SIZES = (100, 1000, 10000, 100000)
+# 变慢超过基准的此比例时视为回退
+DEFAULT_THRESHOLD = 0.2
+# 与基准相差不超过此秒数时不视为回退（避免计时误差影响很快的项目）
+MIN_DELTA = 0.005
+# 合成项目中不同素材文件夹和图片的数量，题目循环引用
+DEFAULT_POOL = 200
+
+# 程序目录（测量启动时间时运行其中的exam_cli.py和exam_generator.py）
+PROGRAM_DIR = Path(__file__).parent
+# 见exam_generator.STARTUP_PROBE_ENV：界面第一次显示后立即退出
+STARTUP_PROBE_ENV = 'EXAM_STARTUP_PROBE'
+
+# 合成图片的尺寸，宽度超过预览宽度，启用图片优化时会生成预览图
+IMAGE_WIDTH = 1024
+IMAGE_HEIGHT = 768
+
+CODE = """#include <stdio.h>
+
+int main(void)
+{
+    int a[10], i, sum = 0;
+    for (i = 0; i < 10; i++) {
+        scanf("%d", &a[i]);
+        sum += a[i];
+    }
+    printf("%d\\n", sum);
+    return 0;
+}"""
+
+
+def png_bytes(width, height, seed):
+    """生成一张RGB的PNG图片（渐变中夹杂噪点行，压缩率与截图相近）"""
+    rng = random.Random(seed)
+    row_size = width * 3
+    pattern = bytes(i & 255 for i in range(row_size + 256))
+    rows = []
+    for y in range(height):
+        if y % 8 == 0:
+            rows.append(b'\x00' + rng.randbytes(row_size))
+        else:
+            start = (y + seed) & 255
+            rows.append(b'\x00' + pattern[start:start + row_size])
+
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data +
+                struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(b''.join(rows), 6)),
+        chunk(b'IEND', b''),
+    ])
+
+
+def make_assets(root, pool, seed=0):
+    """在root下生成素材池：图片 images/NNN.png，素材文件夹 materials/NNN/
+
+    Returns:
+        (图片路径列表, 素材文件夹路径列表)
+    """
+    rng = random.Random(seed)
+    images = []
+    (root / "images").mkdir(parents=True, exist_ok=True)
+    for n in range(pool):
+        path = root / "images" / f"{n:03d}.png"
+        path.write_bytes(png_bytes(IMAGE_WIDTH, IMAGE_HEIGHT, seed + n))
+        images.append(path)
+
+    folders = []
+    for n in range(pool):
+        folder = root / "materials" / f"{n:03d}"
+        (folder / "素材").mkdir(parents=True, exist_ok=True)
+        (folder / "prog.c").write_text(CODE.replace("10", str(10 + n)), encoding='utf-8')
+        (folder / "data.txt").write_text('\n'.join(str(rng.randint(0, 999)) for _ in range(200)),
+                                         encoding='utf-8')
+        (folder / "作品.psd").write_bytes(rng.randbytes(64 * 1024))
+        for k in range(3):
+            (folder / "素材" / f"素材{k + 1}.png").write_bytes(
+                images[(n + k) % len(images)].read_bytes())
+        folders.append(folder)
+    return images, folders
+
+
+def make_project(count, images, folders, seed=0):
+    """生成count道题的合成项目：单选题、选择填空题、操作题（C语言、PS、自定义）各约三分之一"""
+    rng = random.Random(seed)
+    questions = []
+    for i in range(count):
+        text = ''.join(rng.choice('计算机程序设计数据结构算法网络安全操作系统文件图像处理')
+                       for _ in range(rng.randint(20, 120)))
+        question = {'number': str(i + 1), 'text': f"<p>{text}</p>", 'code': '', 'question_image': ''}
+        if i % 10 == 9:
+            question['question_image'] = str(images[i % len(images)])
+        kind = i % 3
+        if kind == 0:
+            question.update(type='single', answer='ABCD'[i % 4],
+                            options={key: f"选项{key}{rng.randint(0, 9999)}" for key in 'ABCD'})
+            if i % 2:
+                question['code'] = CODE
+        elif kind == 1:
+            question.update(type='choice', code=CODE, blank_count='5', blank_score='2',
+                            choice_options='\n'.join(f"{chr(65 + k)}. sum += a[{k}]" for k in range(8)))
+        else:
+            folder = folders[i % len(folders)]
+            template = ('c', 'ps', 'custom')[(i // 3) % 3]
+            question.update(type='file', operation_template=template, custom_operation='',
+                            open_file='', material_folder='', sample_image='')
+            if template == 'c':
+                question.update(open_file=str(folder / "prog.c"), material_folder=str(folder),
+                                sample_image=str(images[i % len(images)]))
+            elif template == 'ps':
+                question.update(open_file=str(folder / "作品.psd"),
+                                material_folder=str(folder / "素材"),
+                                sample_image=str(images[(i + 1) % len(images)]))
+            else:
+                question.update(custom_operation="<ol><li>打开文件</li><li>完成操作后保存</li></ol>",
+                                material_folder=str(folder / "素材"))
+        questions.append(question)
+    groups = [{'name': name, 'count': str(len(questions[k::3]))}
+              for k, name in enumerate(('单选题', '选择填空题', '操作题'))]
+    return {'questions': questions, 'groups': groups, 'tips': '考试说明\n' * 20}
+
+
+class NullWriter:
+    """丢弃写入内容的二进制文件对象（只测量页面生成本身）"""
+
+    def write(self, data):
+        return len(data)
+
+
+def template_calls(project):
+    """各generate_*方法及其对应的调用参数列表"""
+    calls = {'generate_single_choice': [], 'generate_fill_blank': [], 'generate_c_operation': [],
+             'generate_ps_operation': [], 'generate_custom_operation': []}
+    for i, q in enumerate(project['questions'], 1):
+        if q['type'] == 'single':
+            calls['generate_single_choice'].append(
+                dict(number=q['number'], question_text=q['text'], options=q['options'], code=q['code']))
+        elif q['type'] == 'choice':
+            calls['generate_fill_blank'].append(
+                dict(number=q['number'], question_text=q['text'], code=q['code'],
+                     choice_options=q['choice_options']))
+        elif q['operation_template'] == 'c':
+            calls['generate_c_operation'].append(dict(question_text=q['text'], question_number=i))
+        elif q['operation_template'] == 'ps':
+            calls['generate_ps_operation'].append(dict(question_text=q['text'], question_number=i))
+        else:
+            calls['generate_custom_operation'].append(
+                dict(question_text=q['text'], custom_operation=q['custom_operation']))
+    return calls
+
+
+def best_of(repeat, func, setup=None):
+    """执行repeat次，返回最短耗时（秒）；setup在每次计时前调用，不计入耗时"""
+    best = None
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Suite:
+    """一个题目规模的全部测量项目"""
+
+    def __init__(self, project, work_dir, base_dir, repeat=3):
+        self.project = project
+        self.work_dir = Path(work_dir)
+        self.base_dir = base_dir
+        self.repeat = repeat
+        self.results = {}
+
+    def record(self, name, seconds, items):
+        self.results[name] = {'seconds': seconds, 'items': items,
+                              'per_item': seconds / items if items else 0.0}
+
+    def fresh_builder(self):
+        """在空的输出目录上创建构建器，并完成build()开始时的准备（不计入耗时）"""
+        output_dir = self.work_dir / "stage"
+        shutil.rmtree(output_dir, ignore_errors=True)
+        builder = ExamBuilder(self.project, output_dir, base_dir=self.base_dir, incremental=False,
+                              image_cache=self.work_dir / "image-cache")
+        builder.open_output()
+        builder.pipeline = CopyPipeline(builder.copy_workers)
+        return (builder,)
+
+    def run(self):
+        self.bench_templates()
+        self.bench_static()
+        self.bench_assets()
+        self.bench_config()
+        self.bench_builds()
+        shutil.rmtree(self.work_dir / "stage", ignore_errors=True)
+        return self.results
+
+    def bench_templates(self):
+        """HTMLTemplate各generate_*方法（写入丢弃内容的文件对象）"""
+        template = HTMLTemplate()
+        out = NullWriter()
+        for method, calls in template_calls(self.project).items():
+            generate = getattr(template, method)
+
+            def render():
+                for kwargs in calls:
+                    generate(out=out, **kwargs)
+
+            self.record(f"template.{method}", best_of(self.repeat, render), len(calls))
+
+    def bench_static(self):
+        """复制static/"""
+        def stage(builder):
+            builder.copy_static()
+            builder.pipeline.wait()
+            builder.pipeline.close()
+
+        self.record("stage.static", best_of(self.repeat, stage, self.fresh_builder), 1)
+
+    def bench_assets(self):
+        """放置题干图片、样图、要打开的文件和素材（包括图片优化，缓存为每次全新的）"""
+        questions = self.project['questions']
+
+        def stage(builder):
+            builder.copy_static()
+            for i, q in enumerate(questions, 1):
+                builder.begin_unit()
+                builder.question_text_with_image(i, q)
+                if q['type'] != 'file':
+                    continue
+                sample_image = builder.resolve(q['sample_image'])
+                if sample_image:
+                    builder.copy_image(sample_image, f"example{i}{sample_image.suffix}")
+                folder = f"{i:02d}"
+                builder.make_dir(folder)
+                open_file = builder.resolve(q['open_file'])
+                if open_file:
+                    builder.copy_output(open_file, f"{folder}/{open_file.name}", editable=True)
+                material_folder = builder.resolve(q['material_folder'])
+                for file in builder.fs.list_files(material_folder) if material_folder else []:
+                    builder.copy_output(file, f"{folder}/{file.name}")
+            builder.pipeline.wait()
+            builder.pipeline.close()
+
+        def setup():
+            shutil.rmtree(self.work_dir / "image-cache", ignore_errors=True)
+            return self.fresh_builder()
+
+        self.record("stage.assets", best_of(self.repeat, stage, setup), len(questions))
+
+    def bench_config(self):
+        """写入各题的config.dat、groups-info.dat、question-type.dat和tips.txt"""
+        questions = self.project['questions']
+
+        def write(builder):
+            for i, q in enumerate(questions, 1):
+                if q['type'] == 'choice':
+                    builder.write_output(f"{i:02d}-config.dat", f"{q['blank_count']}\n{q['blank_score']}\n")
+                elif q['type'] == 'file' and q['material_folder']:
+                    material_folder = builder.resolve(q['material_folder'])
+                    files = builder.fs.list_files(material_folder) if material_folder else []
+                    builder.write_output(f"{i:02d}-config.dat", ''.join(f"{file.name}\n" for file in files))
+            builder.write_groups_info()
+            builder.write_question_types()
+            builder.write_tips()
+            builder.pipeline.close()
+
+        self.record("stage.config", best_of(self.repeat, write, self.fresh_builder), len(questions))
+
+    def bench_builds(self):
+        """完整生成，以及输入没有变化时的增量生成"""
+        output_dir = self.work_dir / "build"
+        image_cache = self.work_dir / "image-cache"
+
+        def clean():
+            shutil.rmtree(output_dir, ignore_errors=True)
+            shutil.rmtree(image_cache, ignore_errors=True)
+            return ()
+
+        def build(incremental):
+            build_exam(self.project, output_dir, base_dir=self.base_dir, incremental=incremental,
+                       image_cache=image_cache)
+
+        count = len(self.project['questions'])
+        self.record("build.full", best_of(self.repeat, lambda: build(False), clean), count)
+        self.record("build.incremental", best_of(self.repeat, lambda: build(True)), count)
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def run_process(args, env=None):
+    """在新的Python进程中运行，返回耗时（秒），进程失败时返回None"""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable] + args, cwd=PROGRAM_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    return elapsed if completed.returncode == 0 else None
+
+
+def measure_startup(repeat=3):
+    """测量启动时间（均为新进程的总耗时，取最短）
+
+    - startup.cli：exam_cli.py --help
+    - startup.gui_import：导入界面模块（不需要显示器）
+    - startup.gui：界面第一次显示出窗口（没有显示器时不测量）
+    """
+    env = dict(os.environ, **{STARTUP_PROBE_ENV: '1'})
+    commands = {
+        'startup.cli': (['exam_cli.py', '--help'], None),
+        'startup.gui_import': (['-c', 'import exam_generator'], None),
+        'startup.gui': (['exam_generator.py'], env),
+    }
+    results = {}
+    for name, (args, command_env) in commands.items():
+        times = [run_process(args, command_env) for _ in range(repeat)]
+        if None not in times:
+            results[name] = {'seconds': min(times), 'items': 1, 'per_item': min(times)}
+    return results
+
+
+def run_benchmarks(sizes=SIZES, work_dir=None, repeat=3, pool=DEFAULT_POOL, progress=None, startup=True):
+    """依次测量各题目规模，返回结果字典（可保存为JSON）
+
+    Args:
+        work_dir: 存放合成项目和输出的目录，默认使用临时目录并在完成后删除
+        pool: 不同素材文件夹和图片的数量
+        progress: 每完成一个规模调用 progress(题目数, 该规模的结果)
+        startup: 是否测量启动时间（结果中的 "startup" 项）
+    """
+    temp = None
+    if work_dir is None:
+        temp = tempfile.TemporaryDirectory(prefix="exam-benchmark-")
+        work_dir = temp.name
+    work_dir = Path(work_dir)
+    results = {}
+    if startup:
+        results['startup'] = measure_startup(repeat)
+        if progress:
+            progress('startup', results['startup'])
+    try:
+        images, folders = make_assets(work_dir / "assets", min(pool, max(sizes))) if sizes else ([], [])
+        for count in sizes:
+            project = make_project(count, images, folders)
+            suite = Suite(project, work_dir / f"run-{count}", work_dir / "assets", repeat)
+            results[str(count)] = suite.run()
+            shutil.rmtree(work_dir / f"run-{count}", ignore_errors=True)
+            if progress:
+                progress(count, results[str(count)])
+    finally:
+        if temp is not None:
+            temp.cleanup()
+
+    return {
+        'version': RESULTS_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeat': repeat,
+        'pool': pool,
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, min_delta=MIN_DELTA):
+    """与基准结果逐项比较，返回回退列表 [(题目数, 项目, 基准秒数, 本次秒数)]
+
+    只比较两份结果中都有的规模和项目；本次耗时超过基准的 (1 + threshold) 倍
+    且多出的时间超过min_delta秒时视为回退。
+    """
+    regressions = []
+    for count, current in results['results'].items():
+        previous = baseline.get('results', {}).get(count, {})
+        for name, entry in current.items():
+            if name not in previous:
+                continue
+            old, new = previous[name]['seconds'], entry['seconds']
+            if new > old * (1 + threshold) and new - old > min_delta:
+                regressions.append((count, name, old, new))
+    return regressions
+
+
+def print_results(count, results):
+    print("启动：" if count == 'startup' else f"{count} 题：")
+    for name, entry in results.items():
+        print(f"    {name:<36}{entry['seconds']:>10.4f}s  ({entry['per_item'] * 1e6:.1f}µs/项)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="电子试卷生成性能基准测试")
+    parser.add_argument('--sizes', type=int, nargs='*', default=list(SIZES),
+                        help="题目规模（默认：100 1000 10000 100000；不指定规模时只测量启动时间）")
+    parser.add_argument('-o', '--output', default='benchmark-results.json',
+                        help="结果JSON文件（默认：benchmark-results.json）")
+    parser.add_argument('--baseline', default=None, help="基准结果JSON文件，提供时与之比较")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="变慢超过基准的此比例时视为回退（默认：0.2）")
+    parser.add_argument('--repeat', type=int, default=3, help="每个项目执行的次数，取最短耗时（默认：3）")
+    parser.add_argument('--pool', type=int, default=DEFAULT_POOL,
+                        help="合成项目中不同素材文件夹和图片的数量（默认：200）")
+    parser.add_argument('--workdir', default=None, help="存放合成项目和输出的目录（默认：临时目录）")
+    parser.add_argument('--no-startup', action='store_true', help="不测量命令行和界面的启动时间")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """命令行主函数，返回退出码"""
+    args = parse_args(argv)
+    if any(count < 1 for count in args.sizes) or args.repeat < 1 or args.pool < 1:
+        print("错误：题目规模、执行次数和素材数量必须是正整数", file=sys.stderr)
+        return 2
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"错误：无法读取基准结果：{e}", file=sys.stderr)
+            return 2
+
+    results = run_benchmarks(args.sizes, args.workdir, args.repeat, args.pool, print_results,
+                             not args.no_startup)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存到 {args.output}")
+
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for count, name, old, new in regressions:
+        print(f"[回退] {count} 题 {name}：{old:.4f}s -> {new:.4f}s (+{(new / old - 1) * 100:.0f}%)")
+    print(f"与基准 {args.baseline} 比较：{len(regressions)} 项回退（阈值 {args.threshold * 100:.0f}%）")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
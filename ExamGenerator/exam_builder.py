@@ -0,0 +1,684 @@
+"""
+试卷构建引擎
+不依赖任何GUI组件，可在图形界面、命令行脚本或后台进程中调用
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from functools import partial
+from pathlib import Path
+import html_template
+import image_variants
+import project_journal
+import static_bundle
+from html_template import HTMLTemplate
+from build_trace import NULL_TRACE
+from build_manifest import BuildManifest, MANIFEST_VERSION, hash_bytes
+from asset_store import AssetStore, link_or_copy
+from copy_pipeline import BuildCancelled, CopyPipeline
+from fs_cache import FileSystemCache
+from image_variants import ImageOptimizer, image_size
+from static_bundle import bundle_css, bundle_js, bundle_name
+from project_binary import BINARY_SUFFIX, load_binary, save_binary
+from option_shuffle import MAP_NAME as SHUFFLE_MAP_NAME, ShuffleMap
+from question_bank import BANK_SUFFIXES, QuestionBank
+
+
+# 静态资源模板目录（与程序文件放在一起）
+STATIC_TEMPLATE_DIR = Path(__file__).parent / "static_template"
+
+# 题目中引用的源文件和素材目录
+SOURCE_FIELDS = ('question_image', 'sample_image', 'open_file')
+
+
+def load_project(file):
+    """从JSON文件、二进制项目文件（.examb）或SQLite题库（.db/.sqlite）加载项目
+
+    项目JSON旁有编辑日志时，同时重放其中尚未合并的编辑。
+    """
+    if Path(file).suffix.lower() == BINARY_SUFFIX:
+        return load_binary(file)
+    if Path(file).suffix.lower() in BANK_SUFFIXES:
+        if not Path(file).is_file():
+            raise FileNotFoundError(f"题库文件不存在：{file}")
+        with QuestionBank(file) as bank:
+            return bank.export_project()
+    return project_journal.load_project(file)[0]
+
+
+def save_project(project, file):
+    """将项目保存为JSON文件（扩展名为.examb时保存为二进制项目文件）
+
+    JSON文件旁遗留的编辑日志属于被覆盖的项目，一并删除。
+    """
+    if Path(file).suffix.lower() == BINARY_SUFFIX:
+        save_binary(project, file)
+        return
+    project_journal.journal_path(file).unlink(missing_ok=True)
+    with open(file, 'w', encoding='utf-8') as f:
+        json.dump(project, f, ensure_ascii=False, indent=2, default=dict)
+
+
+def code_fingerprint():
+    """生成程序和模板代码的指纹，程序更新后增量生成自动失效"""
+    h = hashlib.sha256(str(MANIFEST_VERSION).encode())
+    for module_file in (__file__, html_template.__file__, image_variants.__file__, static_bundle.__file__):
+        try:
+            h.update(Path(module_file).read_bytes())
+        except OSError:
+            pass
+    return h.hexdigest()
+
+
+class BuildResult:
+    """一次试卷构建的结果"""
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.question_count = 0
+        # 重新生成的题目数（其余题目的输入未变化，直接沿用上次的输出）
+        self.rebuilt_count = 0
+        # 通过链接放置（未实际复制数据）的文件数
+        self.linked_count = 0
+        # 清理掉的上次遗留文件（输出目录中的相对路径）
+        self.removed = []
+        # 不影响生成但需要提示用户的问题（如缺少静态资源）
+        self.warnings = []
+
+
+class HashingWriter:
+    """写入文件的同时计算内容哈希"""
+
+    def __init__(self, f):
+        self.f = f
+        self.h = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.h.update(data)
+        self.size += len(data)
+        return self.f.write(data)
+
+
+class ExamBuilder:
+    """试卷构建器
+
+    根据项目数据（questions/groups/tips）生成考试系统所需的全部文件：
+    NN.html、NN-config.dat、NN/ 题目文件夹、static/、
+    groups-info.dat、question-type.dat 和 tips.txt。
+
+    输出目录中保存构建清单，再次生成时只重新生成输入发生变化的题目，
+    并清理已删除题目遗留的文件。
+    """
+
+    def __init__(self, project, output_dir, base_dir=None, static_src=None, incremental=True,
+                 asset_store=None, copy_workers=4, copy_progress=None, cancel_event=None,
+                 question_progress=None, image_cache=None, bundle_static=None, trace=None):
+        """
+        Args:
+            project: 项目数据字典，格式与保存的项目JSON相同
+            output_dir: 输出目录
+            base_dir: 解析题目中相对路径（图片、素材等）的基准目录，默认为当前工作目录
+            static_src: 静态资源模板目录，默认为程序自带的static_template
+            incremental: 是否增量生成；为False时重新生成全部文件
+            asset_store: 共享资源仓库（AssetStore或其目录）。提供时static/、题目图片和素材
+                         从仓库硬链接/reflink到输出目录，多份试卷共用一份数据
+            copy_workers: 后台复制素材的线程数，复制与HTML生成同时进行
+            copy_progress: 复制进度回调 copy_progress(已完成字节数, 总字节数)，在复制线程中调用
+            cancel_event: threading.Event，置位后尽快停止生成并抛出BuildCancelled
+            question_progress: 题目进度回调 question_progress(已完成题数, 总题数)，
+                               每处理完一道题调用一次
+            image_cache: 图片优化结果的缓存目录，默认为系统临时目录下的 exam-image-cache
+            bundle_static: 是否把页面引用的样式表和脚本各合并为一个文件，
+                           为None时按项目设置（"bundle_static": true）
+            trace: build_trace.BuildTrace，提供时记录各阶段和每道题的耗时、复制和写入的字节数
+        """
+        self.questions = project.get('questions', [])
+        self.groups = project.get('groups', [])
+        self.tips = project.get('tips', '')
+        # 选项乱序设置：{'candidates': 考生数, 'seed': 随机种子}，未设置时不乱序
+        self.shuffle = project.get('shuffle') or None
+        # 图片优化：安装了Pillow且项目未关闭（"optimize_images": false）时，
+        # 题干图片和样图缩小为预览图，原图另存供放大查看
+        self.images = None
+        if project.get('optimize_images', True) and ImageOptimizer.available():
+            self.images = ImageOptimizer(image_cache)
+        if bundle_static is None:
+            bundle_static = project.get('bundle_static', False)
+        self.bundle_static = bool(bundle_static)
+        # 本次生成的合并文件名（未合并时为空）
+        self.bundles = []
+        self.output_dir = Path(output_dir)
+        self.base_dir = Path(base_dir) if base_dir else None
+        self.static_src = Path(static_src) if static_src else STATIC_TEMPLATE_DIR
+        self.static_dst = self.output_dir / "static"
+        # 输出目录中是否有static文件夹（题干图片和样图放在其中）
+        self.has_static = False
+        self.incremental = incremental
+        if asset_store is not None and not isinstance(asset_store, AssetStore):
+            asset_store = AssetStore(asset_store)
+        self.store = asset_store
+        self.copy_workers = copy_workers
+        self.copy_progress = copy_progress
+        self.cancel_event = cancel_event
+        self.question_progress = question_progress
+        self.pipeline = None
+        # 本次构建的文件元数据缓存，所有存在性检查、目录列表和stat都从这里读取
+        self.fs = FileSystemCache()
+        self.lock = threading.Lock()
+        self.template = HTMLTemplate()
+        # 合并前页面引用的样式表和脚本
+        self.static_refs = self.template.static_references()
+        self.result = BuildResult(self.output_dir)
+        self.previous = None
+        self.manifest = None
+        # 当前构建单元生成的输出文件和目录（相对路径）
+        self.unit_outputs = []
+        self.unit_dirs = []
+        # 本次构建已放置的内容：内容哈希 -> (输出相对路径, 复制任务)，相同内容再次使用时直接链接
+        self.placed = {}
+        self.trace = trace or NULL_TRACE
+        # 当前的构建单元（"01"等题目、"static"、"project"），构建计时按此归类
+        self.unit = 'project'
+        # 位于输出目录中的源文件（导入的试卷生成到原目录时）-> 生成前链接出的副本
+        self.staged = {}
+        self.staging_dir = None
+
+    def resolve(self, path):
+        """解析题目中引用的文件路径，路径为空或文件不存在时返回None"""
+        path = (path or '').strip()
+        if not path:
+            return None
+        p = Path(path)
+        if self.base_dir and not p.is_absolute():
+            p = self.base_dir / p
+        if p in self.staged:
+            return self.staged[p]
+        return p if self.fs.exists(p) else None
+
+    def stage_sources(self):
+        """题目引用输出目录中的文件时（导入的试卷生成到原目录），生成前先把这些文件链接到临时目录
+
+        生成过程中输出文件会被删除、覆盖，之后的题目仍从临时目录中读取原来的内容。
+        """
+        output_dir = self.output_dir.resolve()
+        sources = []
+        for q in self.questions:
+            for field in SOURCE_FIELDS + ('material_folder',):
+                p = self.resolve(q.get(field, ''))
+                if p is None or p in self.staged:
+                    continue
+                try:
+                    rel = p.resolve().relative_to(output_dir)
+                except ValueError:
+                    continue
+                if self.staging_dir is None:
+                    self.staging_dir = Path(tempfile.mkdtemp(prefix=f".{output_dir.name}-sources-",
+                                                             dir=output_dir.parent))
+                self.staged[p] = self.staging_dir / rel
+                if field == 'material_folder':
+                    sources.extend((file, self.staging_dir / rel / file.name) for file in self.fs.list_files(p))
+                else:
+                    sources.append((p, self.staging_dir / rel))
+        for src, dst in sources:
+            if not dst.exists():
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                link_or_copy(src, dst)
+
+    def build(self):
+        """执行构建，返回BuildResult"""
+        if not self.questions:
+            raise ValueError("请先添加题目！")
+
+        with self.trace.span('build'):
+            try:
+                return self.run_build()
+            finally:
+                if self.staging_dir is not None:
+                    shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+    def run_build(self):
+        trace = self.trace
+        self.fs = FileSystemCache()
+        with trace.span('open_output'):
+            self.open_output()
+            self.stage_sources()
+        fingerprint = code_fingerprint()
+
+        # 素材在后台线程中复制，与HTML生成同时进行
+        self.pipeline = CopyPipeline(self.copy_workers, self.copy_progress, self.cancel_event)
+        try:
+            self.unit = 'static'
+            with trace.span('static', 'static'):
+                self.copy_static()
+
+            for i, q in enumerate(self.questions, 1):
+                self.pipeline.check_cancelled()
+                name = self.unit = f"{i:02d}"
+                with trace.span('question', name):
+                    with trace.span('question_key', name):
+                        key = self.question_key(i, q, fingerprint)
+                    if self.manifest.unit_is_current(name, key):
+                        self.manifest.keep_unit(name)
+                    else:
+                        self.begin_unit()
+                        self.build_question(i, q)
+                        self.manifest.set_unit(name, key, self.unit_outputs, self.unit_dirs)
+                        self.result.rebuilt_count += 1
+                self.result.question_count += 1
+                if self.question_progress:
+                    self.question_progress(i, len(self.questions))
+
+            self.unit = 'project'
+            with trace.span('write_dat', 'project'):
+                self.write_groups_info()
+                self.write_question_types()
+                self.write_tips()
+                self.write_shuffle_map()
+
+            with trace.span('wait_copies'):
+                self.pipeline.wait()
+        except BaseException:
+            # 停止复制线程；正在复制的文件会删除临时文件，不留下写了一半的文件
+            self.pipeline.cancel()
+            raise
+        finally:
+            self.pipeline.close()
+
+        with trace.span('close_output'):
+            self.close_output()
+        return self.result
+
+    def open_output(self):
+        """创建输出目录并读取上次的构建清单"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.previous = BuildManifest.load(self.output_dir)
+        self.manifest = BuildManifest(self.output_dir, self.previous if self.incremental else None)
+
+    def close_output(self):
+        """全部输出完成后：清理遗留文件并保存构建清单"""
+        self.remove_stale_outputs()
+        self.manifest.save()
+
+    def question_key(self, i, q, fingerprint):
+        """计算第i题的输入哈希：题目数据、题号、引用文件的内容和程序版本"""
+        files = {}
+        for field in ('question_image', 'sample_image', 'open_file'):
+            path = self.resolve(q.get(field, ''))
+            if path and self.fs.is_file(path):
+                files[field] = [path.name, self.source_hash(path)]
+        material_folder = self.resolve(q.get('material_folder', ''))
+        if material_folder:
+            files['material_folder'] = [
+                [file.name, self.source_hash(file)] for file in self.fs.list_files(material_folder)]
+        inputs = {
+            'index': i,
+            'question': q,
+            'files': files,
+            'static': self.has_static,
+            'shuffle': self.shuffle is not None and q.get('type') in ('single', 'choice'),
+            'images': self.images.settings() if self.images else None,
+            'bundles': self.bundles,
+            'code': fingerprint,
+        }
+        return hash_bytes(json.dumps(inputs, ensure_ascii=False, sort_keys=True, default=dict).encode('utf-8'))
+
+    def source_hash(self, path):
+        """获取源文件内容哈希（stat结果取自缓存）"""
+        return self.manifest.source_hash(path, self.fs.stat(path))
+
+    def begin_unit(self):
+        """开始记录一个构建单元的输出"""
+        self.unit_outputs = []
+        self.unit_dirs = []
+
+    def make_dir(self, rel):
+        """创建输出目录中的子目录，并记录到当前构建单元"""
+        self.create_dirs(rel)
+        self.unit_dirs.append(rel)
+
+    def create_dirs(self, rel):
+        """创建输出目录中的子目录（包括上级目录）"""
+        (self.output_dir / rel).mkdir(parents=True, exist_ok=True)
+
+    def open_file(self, rel):
+        """打开输出文件用于写入（二进制）"""
+        return open(self.output_dir / rel, 'wb')
+
+    def copy_output(self, src, rel, editable=False):
+        """将src放置到输出目录，目标文件内容相同且未被改动时跳过
+
+        实际复制在后台线程中进行。同一内容在本次构建中只复制一次，再次使用时
+        链接到已放置的文件；提供了共享资源仓库时，所有内容都从仓库链接。
+
+        Args:
+            editable: 是否为考生会修改的文件（如作品.psd、prog.c），此类文件不使用硬链接
+        """
+        sha = self.source_hash(src)
+        self.unit_outputs.append(rel)
+        if self.manifest.output_is_current(rel, sha):
+            self.manifest.keep_output(rel)
+            if not editable:
+                self.placed.setdefault(sha, (rel, None))
+            return
+
+        source = self.placed.get(sha) if self.store is None else None
+        size = self.fs.stat(src).st_size
+        place = partial(self.traced_place_file, self.unit, size) if self.trace.enabled else self.place_file
+        future = self.pipeline.submit(size, place, src, rel, sha, editable, source)
+        # 考生会修改的文件不能作为其他文件的链接来源
+        if not editable:
+            self.placed.setdefault(sha, (rel, future))
+
+    def traced_place_file(self, unit, size, src, rel, sha, editable, source):
+        """记录耗时和字节数的place_file（启用构建计时时使用）"""
+        with self.trace.span('copy', unit, file=rel):
+            method = self.place_file(src, rel, sha, editable, source)
+        if method == 'copy':
+            self.trace.add(unit, files_copied=1, bytes_copied=size)
+        else:
+            self.trace.add(unit, files_linked=1, bytes_linked=size)
+
+    def place_file(self, src, rel, sha, editable, source):
+        """在复制线程中放置文件（见copy_output），返回放置方式（'copy'或链接方式）"""
+        copy = self.pipeline.copy_file
+        # 先删除旧文件：它可能是硬链接，直接覆盖会改写共享的数据
+        dst = self.output_dir / rel
+        dst.unlink(missing_ok=True)
+        if self.store is not None:
+            self.store.put(src, sha, copy)
+            method = self.store.place(sha, dst, not editable, copy)
+        elif source is not None:
+            source_rel, source_future = source
+            if source_future is not None:
+                source_future.result()  # 等待链接来源复制完成
+            method = link_or_copy(self.output_dir / source_rel, dst, not editable, copy)
+        else:
+            copy(src, dst)
+            method = 'copy'
+        if method != 'copy':
+            with self.lock:
+                self.result.linked_count += 1
+        self.manifest.record_output(rel, sha)
+        return method
+
+    def write_output(self, rel, text):
+        """按文本模式的规则写入文件，内容未变化且文件未被改动时跳过"""
+        self.write_bytes(rel, HTMLTemplate.encode(text))
+
+    def write_bytes(self, rel, data):
+        """写入二进制文件，内容未变化且文件未被改动时跳过"""
+        sha = hash_bytes(data)
+        self.unit_outputs.append(rel)
+        if self.manifest.output_is_current(rel, sha):
+            self.manifest.keep_output(rel)
+            return
+        with self.open_file(rel) as f:
+            f.write(data)
+        self.trace.add(self.unit, files_written=1, bytes_written=len(data))
+        self.manifest.record_output(rel, sha)
+
+    def copy_static(self):
+        """复制static文件夹"""
+        self.has_static = self.static_dst.is_dir()
+        if not self.fs.is_dir(self.static_src):
+            self.result.warnings.append(
+                f"找不到static_template文件夹：{self.static_src}\n将继续生成，但可能缺少静态资源。")
+            return
+
+        files = [(src.relative_to(self.static_src).as_posix(), src)
+                 for src in self.fs.walk_files(self.static_src)]
+        bundles = self.make_bundles(files) if self.bundle_static else {}
+        key = hash_bytes(json.dumps(
+            [[rel, self.source_hash(src)] for rel, src in files] + sorted(bundles)).encode('utf-8'))
+        if self.manifest.unit_is_current('static', key):
+            self.manifest.keep_unit('static')
+            return
+
+        self.begin_unit()
+        self.make_dir("static")
+        self.has_static = True
+        # 已合并的文件页面不再引用，不需要复制
+        bundled = set(self.static_refs[0] + self.static_refs[1]) if bundles else set()
+        for rel, src in files:
+            if rel in bundled:
+                continue
+            if '/' in rel:
+                self.create_dirs(f"static/{rel.rsplit('/', 1)[0]}")
+            self.copy_output(src, f"static/{rel}")
+        for name, data in bundles.items():
+            self.write_bytes(f"static/{name}", data)
+        self.manifest.set_unit('static', key, self.unit_outputs, self.unit_dirs)
+
+    def make_bundles(self, files):
+        """合并页面引用的样式表和脚本，页面改为引用合并后的文件，返回 {文件名: 内容}
+
+        static_template中缺少的文件跳过并给出警告。
+        """
+        sources = dict(files)
+        styles, scripts = self.static_refs
+        missing = [rel for rel in styles + scripts if rel not in sources]
+        if missing:
+            self.result.warnings.append(
+                f"static_template中缺少 {'、'.join(missing)}，合并静态资源时已跳过")
+
+        bundles = {}
+        for refs, combine, suffix in ((styles, bundle_css, '.css'), (scripts, bundle_js, '.js')):
+            parts = [(rel, sources[rel].read_text(encoding='utf-8')) for rel in refs if rel in sources]
+            if parts:
+                data = combine(parts)
+                bundles[bundle_name(data, suffix)] = data
+        names = {name.rsplit('.', 1)[1]: name for name in bundles}
+        self.template.use_bundles(css=names.get('css'), js=names.get('js'))
+        self.bundles = sorted(bundles)
+        return bundles
+
+    def question_text_with_image(self, i, q):
+        """处理题干图片：复制到static目录并在题干后追加图片标签"""
+        question_image = self.resolve(q.get('question_image', ''))
+        if not question_image or not self.has_static:
+            return q['text']
+
+        img_name = f"question_{i:02d}{question_image.suffix}"
+        size, full_name = self.copy_image(question_image, img_name)
+        tag = self.template.image_tag(f"./static/{img_name}", "题干图片", size,
+                                      full_name and f"./static/{full_name}")
+        return q['text'] + f'\n\n<div class="row" style="margin-top: 10px;"><div class="col-md-6">{tag}</div></div>'
+
+    def copy_image(self, src, name):
+        """将图片放置到static/name，返回 (页面中显示的尺寸, 放大查看用的原图文件名或None)
+
+        启用图片优化时static/name为缩小后的预览图，原图放置为 <name>-full.<扩展名>；
+        否则原样复制，只读取尺寸
+        """
+        if self.images is None:
+            self.copy_output(src, f"static/{name}")
+            return image_size(src), None
+        with self.trace.span('image', self.unit):
+            variant = self.images.optimize(src)
+        self.copy_output(variant.preview, f"static/{name}")
+        full_name = None
+        if variant.full:
+            stem, ext = os.path.splitext(name)
+            full_name = f"{stem}-full{ext}"
+            self.copy_output(variant.full, f"static/{full_name}")
+        return variant.size, full_name
+
+    def build_question(self, i, q):
+        """生成第i题的HTML及其配置文件、素材"""
+        question_text = self.question_text_with_image(i, q)
+
+        # 以二进制方式写入HTML文件，页面外壳直接使用模板中预编码的字节块
+        rel = f"{i:02d}.html"
+        with self.trace.span('render', self.unit), self.open_file(rel) as f:
+            out = HashingWriter(f)
+            if q['type'] == 'single':
+                self.template.generate_single_choice(
+                    number=q['number'],
+                    question_text=question_text,
+                    options=q['options'],
+                    code=q.get('code', ''),
+                    out=out,
+                    shuffle=self.shuffle is not None
+                )
+            elif q['type'] == 'choice':
+                self.template.generate_fill_blank(
+                    number=q['number'],
+                    question_text=question_text,
+                    code=q.get('code', ''),
+                    choice_options=q.get('choice_options', ''),
+                    out=out,
+                    shuffle=self.shuffle is not None
+                )
+            elif q['type'] == 'file':
+                self.build_file_question(i, q, question_text, out)
+            else:
+                raise ValueError(f"第{i}题的题目类型未知：{q['type']}")
+        self.trace.add(self.unit, files_written=1, bytes_written=out.size)
+        self.unit_outputs.append(rel)
+        self.manifest.record_output(rel, out.h.hexdigest())
+
+        # 选择填空题的config文件：填空数量和每空分值
+        if q['type'] == 'choice':
+            with self.trace.span('config', self.unit):
+                self.write_output(f"{i:02d}-config.dat",
+                                  f"{q.get('blank_count', '5')}\n{q.get('blank_score', '2')}\n")
+
+    def build_file_question(self, i, q, question_text, out):
+        """处理文件操作题：将HTML写入out，复制样图和素材、生成config.dat"""
+        material_folder = self.resolve(q.get('material_folder', ''))
+        sample_image = self.resolve(q.get('sample_image', ''))
+        open_file = self.resolve(q.get('open_file', ''))
+        operation_template = q.get('operation_template', 'c')  # 操作说明模板类型
+
+        # 根据操作说明模板类型复制样图到static文件夹，并写入HTML
+        if operation_template == 'ps':
+            sample_ext = sample_image.suffix if sample_image else '.jpg'
+            size, full_name = None, None
+            if sample_image and self.has_static:
+                size, full_name = self.copy_image(sample_image, f"example{i}{sample_ext}")
+            self.template.generate_ps_operation(
+                question_text=question_text,
+                question_number=i,
+                sample_ext=sample_ext,
+                out=out,
+                image_size=size,
+                full_image=full_name
+            )
+        elif operation_template == 'c':
+            example_ext = sample_image.suffix if sample_image else '.png'
+            size, full_name = None, None
+            if sample_image and self.has_static:
+                size, full_name = self.copy_image(sample_image, f"c_example{i}{example_ext}")
+            self.template.generate_c_operation(
+                question_text=question_text,
+                question_number=i,
+                example_ext=example_ext,
+                out=out,
+                image_size=size,
+                full_image=full_name
+            )
+        else:  # operation_template == 'custom'
+            self.template.generate_custom_operation(
+                question_text=question_text,
+                custom_operation=q.get('custom_operation', ''),
+                out=out
+            )
+
+        # 创建题目文件夹
+        folder = f"{i:02d}"
+        self.make_dir(folder)
+
+        # 复制要打开的文件到题目文件夹
+        open_file_name = ""
+        if open_file:
+            open_file_name = open_file.name
+            self.copy_output(open_file, f"{folder}/{open_file_name}", editable=True)
+
+        # 素材文件（按文件名排序，config.dat中的顺序每次生成都相同）：
+        # PS题放入“素材”子文件夹，其他题放在题目文件夹根目录
+        materials = self.fs.list_files(material_folder) if material_folder else []
+        if operation_template == 'ps':
+            self.make_dir(f"{folder}/素材")
+            for file in materials:
+                self.copy_output(file, f"{folder}/素材/{file.name}")
+        else:
+            for file in materials:
+                if file.name != open_file_name:
+                    self.copy_output(file, f"{folder}/{file.name}")
+
+        # 生成config.dat：第一行为要自动打开的文件名，其后为素材文件列表
+        # （样图在static目录，不需要在这里列出）
+        config_lines = []
+        if open_file_name:
+            config_lines.append(f"{open_file_name}\n")
+        for file in materials:
+            if file.name != open_file_name:
+                if sample_image:
+                    config_lines.append(f"素材\\{file.name}\n")
+                else:
+                    config_lines.append(f"{file.name}\n")
+
+        if config_lines:
+            with self.trace.span('config', self.unit):
+                self.write_output(f"{folder}-config.dat", ''.join(config_lines))
+
+    def write_groups_info(self):
+        """生成groups-info.dat"""
+        if not self.groups:
+            return
+        self.write_output("groups-info.dat",
+                          ''.join(f"{g['name']}----{g['count']}\n" for g in self.groups))
+
+    def write_question_types(self):
+        """生成question-type.dat"""
+        self.write_output("question-type.dat",
+                          ''.join(f"{q['type']}\n" for q in self.questions
+                                  if q['type'] in ('single', 'choice', 'file')))
+
+    def write_tips(self):
+        """生成tips.txt"""
+        self.write_output("tips.txt", self.tips)
+
+    def write_shuffle_map(self):
+        """生成选项排列表（所有考生共用页面，每位考生只占排列表中的一行）"""
+        if self.shuffle is None:
+            return
+        shuffle_map = ShuffleMap.generate(self.questions, int(self.shuffle['candidates']),
+                                          self.shuffle.get('seed', 0))
+        self.write_bytes(SHUFFLE_MAP_NAME, shuffle_map.to_bytes())
+
+    def remove_stale_outputs(self):
+        """清理上次生成、本次不再需要的文件和题目文件夹"""
+        stale_files = set(self.previous.outputs) - set(self.manifest.outputs)
+        for rel in sorted(stale_files):
+            try:
+                (self.output_dir / rel).unlink()
+                self.result.removed.append(rel)
+            except FileNotFoundError:
+                pass
+
+        # 由深到浅删除已不再使用的空目录
+        kept_dirs = {d for unit in self.manifest.units.values() for d in unit.get('dirs', [])}
+        stale_dirs = {d for unit in self.previous.units.values() for d in unit.get('dirs', [])}
+        for rel in sorted(stale_dirs - kept_dirs, key=lambda d: d.count('/'), reverse=True):
+            try:
+                (self.output_dir / rel).rmdir()
+            except OSError:
+                pass  # 目录不存在或仍有其他文件
+
+
+def build_exam(project, output_dir, **kwargs):
+    """根据项目数据生成试卷，参数同ExamBuilder"""
+    return ExamBuilder(project, output_dir, **kwargs).build()
+
+
+def build_project_file(project_file, output_dir, **kwargs):
+    """加载项目文件并生成试卷，题目中的相对路径以项目文件所在目录为准"""
+    project_file = Path(project_file)
+    kwargs.setdefault('base_dir', project_file.parent)
+    return build_exam(load_project(project_file), output_dir, **kwargs)
@@ -0,0 +1,163 @@
+"""
+电子试卷生成工具 - 命令行入口
+批量读取项目JSON文件，使用多进程并行生成试卷
+
+用法：
+    python exam_cli.py 项目1.json 项目2.json ... [-o 输出根目录] [-j 进程数] [--full]
+                       [--asset-store [仓库目录]] [--archive 格式] [--bundle] [--trace] [-v]
+
+每个项目生成到 “输出根目录/项目文件名” 下，默认只重新生成有变化的题目。
+使用 --asset-store 时各项目的static/和题目素材从共享仓库链接，不再各自复制一份。
+使用 --archive zip 等时每个项目直接生成为 “输出根目录/项目文件名.zip” 压缩包（总是完整生成）。
+使用 --bundle 时页面引用的样式表和脚本各合并压缩为一个文件。
+使用 --trace 时在输出目录旁保存构建计时报告（.build-report.json）和Chrome跟踪文件（.trace.json）。
+退出码：0 全部成功，1 有项目生成失败，2 参数错误。
+"""
+
+import argparse
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from build_trace import BuildTrace
+from exam_builder import build_project_file
+import exam_archive
+
+
+def build_one(project_file, output_dir, incremental=True, asset_store=None, archive=False,
+              bundle_static=None, trace=False):
+    """在工作进程中生成单个项目，返回可跨进程传递的结果字典
+
+    Args:
+        archive: 为True时output_dir为压缩包路径，直接生成压缩包
+        bundle_static: 为True时合并静态资源，为None时按项目设置
+        trace: 为True时记录构建计时，保存到输出目录旁的 .build-report.json 和 .trace.json
+    """
+    start = time.perf_counter()
+    report = {
+        'project': str(project_file),
+        'output_dir': str(output_dir),
+        'ok': False,
+        'questions': 0,
+        'rebuilt': 0,
+        'warnings': [],
+        'error': '',
+        'traceback': '',
+        'elapsed': 0.0,
+        'trace_files': [],
+    }
+    build_trace = BuildTrace() if trace else None
+    try:
+        if archive:
+            result = exam_archive.build_project_archive(project_file, output_dir,
+                                                        bundle_static=bundle_static, trace=build_trace)
+        else:
+            result = build_project_file(project_file, output_dir, incremental=incremental,
+                                        asset_store=asset_store, bundle_static=bundle_static,
+                                        trace=build_trace)
+        if build_trace is not None:
+            report_file, trace_file = f"{output_dir}.build-report.json", f"{output_dir}.trace.json"
+            build_trace.save_report(report_file)
+            build_trace.save_chrome_trace(trace_file)
+            report['trace_files'] = [report_file, trace_file]
+        report['ok'] = True
+        report['questions'] = result.question_count
+        report['rebuilt'] = result.rebuilt_count
+        report['warnings'] = result.warnings
+    except Exception as e:
+        report['error'] = str(e)
+        report['traceback'] = traceback.format_exc()
+    report['elapsed'] = time.perf_counter() - start
+    return report
+
+
+def print_report(report, verbose=False):
+    """打印单个项目的生成结果"""
+    if report['ok']:
+        print(f"[成功] {report['project']} -> {report['output_dir']} "
+              f"({report['questions']}题, 重新生成{report['rebuilt']}题, {report['elapsed']:.2f}s)")
+        for warning in report['warnings']:
+            print(f"    警告：{warning}")
+        for file in report['trace_files']:
+            print(f"    构建计时：{file}")
+    else:
+        print(f"[失败] {report['project']}：{report['error']}", file=sys.stderr)
+        if verbose:
+            print(report['traceback'], file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="电子试卷批量生成工具")
+    parser.add_argument('projects', nargs='+', help="项目JSON文件（也可以是.examb二进制项目文件或.db题库）")
+    parser.add_argument('-o', '--output-root', default='./output',
+                        help="输出根目录，每个项目生成到其下以项目文件名命名的子目录（默认：./output）")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="并行进程数（默认：CPU核心数）")
+    parser.add_argument('--full', action='store_true',
+                        help="忽略构建清单，重新生成全部文件")
+    parser.add_argument('--asset-store', nargs='?', const='', default=None, metavar='DIR',
+                        help="从共享资源仓库链接静态资源和题目素材（默认仓库：输出根目录/.asset-store）")
+    parser.add_argument('--archive', default=None, metavar='FORMAT',
+                        choices=[suffix.lstrip('.') for suffix in exam_archive.ARCHIVE_SUFFIXES],
+                        help="直接生成压缩包（zip、tar.zst、tar.gz、tar.xz、tar、tgz），不生成目录")
+    parser.add_argument('--bundle', action='store_true',
+                        help="把页面引用的样式表和脚本各合并压缩为一个文件（同项目中的 \"bundle_static\": true）")
+    parser.add_argument('--trace', action='store_true',
+                        help="记录各阶段和每道题的耗时、复制和写入的字节数，保存为报告和Chrome跟踪文件")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="生成失败时输出完整的错误堆栈")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """命令行主函数，返回退出码"""
+    args = parse_args(argv)
+    output_root = Path(args.output_root)
+
+    if args.archive == 'tar.zst' and exam_archive.zstandard is None:
+        print("错误：生成 .tar.zst 需要安装zstandard（pip install zstandard）", file=sys.stderr)
+        return 2
+
+    # 每个项目的输出目录，项目文件名重复时无法区分输出目录
+    jobs = {}
+    for project in args.projects:
+        project_file = Path(project)
+        if not project_file.is_file():
+            print(f"错误：找不到项目文件：{project_file}", file=sys.stderr)
+            return 2
+        output_dir = output_root / project_file.stem
+        if args.archive:
+            output_dir = output_root / f"{project_file.stem}.{args.archive}"
+        if output_dir in jobs.values():
+            print(f"错误：多个项目文件同名，输出目录冲突：{output_dir}", file=sys.stderr)
+            return 2
+        jobs[project_file] = output_dir
+
+    asset_store = None
+    if args.asset_store is not None:
+        asset_store = args.asset_store or str(output_root / ".asset-store")
+
+    workers = args.jobs or os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+
+    start = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(build_one, project_file, output_dir, not args.full, asset_store,
+                                   args.archive is not None, args.bundle or None, args.trace)
+                   for project_file, output_dir in jobs.items()]
+        for future in as_completed(futures):
+            report = future.result()
+            print_report(report, args.verbose)
+            if not report['ok']:
+                failed += 1
+
+    print(f"共 {len(jobs)} 个项目，成功 {len(jobs) - failed}，失败 {failed}，"
+          f"用时 {time.perf_counter() - start:.2f}s（{workers}进程）")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
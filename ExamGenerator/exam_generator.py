@@ -1,15 +1,102 @@
 """
 电子试卷生成工具 - 主程序
 支持生成单选题、选择填空题、操作题等多种题型
+
+启动时只导入界面和题库需要的模块；生成试卷（exam_builder）和导入试卷（exam_import）
+在第一次使用时才导入，窗口可以尽快显示。
 """
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, scrolledtext
 import os
-import json
-import shutil
+import queue
+import threading
+import time
 from pathlib import Path
-from html_template import HTMLTemplate
+import project_journal
+import question_model
+from project_binary import BINARY_SUFFIX
+from question_bank import QuestionBank, question_tags
+from question_model import answer_letters
+from virtual_list import VirtualListbox
+
+
+# 题型在列表和筛选框中的显示名称
+TYPE_NAMES = {
+    'single': '单选',
+    'choice': '填空',
+    'file': '文件'
+}
+
+# 编辑区中没有对应输入框的字段，更新题目时从原题目保留
+KEPT_FIELDS = ('score', 'difficulty', 'tests', 'time_limit', 'memory_limit')
+
+# 设置此环境变量时窗口第一次显示后立即退出（exam_benchmark.py测量启动时间）
+STARTUP_PROBE_ENV = 'EXAM_STARTUP_PROBE'
+
+
+class BuildProgressDialog:
+    """生成进度窗口：显示题目进度、复制进度、已用时间和预计剩余时间"""
+    
+    def __init__(self, parent, total, on_cancel):
+        self.window = tk.Toplevel(parent)
+        self.window.title("正在生成试卷")
+        self.window.resizable(False, False)
+        self.window.transient(parent)
+        # 关闭窗口等同于取消
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel)
+        self.on_cancel = on_cancel
+        self.start = time.perf_counter()
+        self.questions = (0, total)
+        self.bytes = (0, 0)
+        
+        frame = ttk.Frame(self.window, padding="15")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.question_label = ttk.Label(frame, text=f"题目：0 / {total}")
+        self.question_label.pack(anchor=tk.W)
+        self.question_bar = ttk.Progressbar(frame, length=360, maximum=max(total, 1))
+        self.question_bar.pack(fill=tk.X, pady=5)
+        
+        self.bytes_label = ttk.Label(frame, text="素材：0.0 / 0.0 MB")
+        self.bytes_label.pack(anchor=tk.W)
+        self.bytes_bar = ttk.Progressbar(frame, length=360, maximum=1)
+        self.bytes_bar.pack(fill=tk.X, pady=5)
+        
+        self.time_label = ttk.Label(frame, text="已用时间：0秒")
+        self.time_label.pack(anchor=tk.W, pady=5)
+        
+        self.cancel_button = ttk.Button(frame, text="取消生成", command=self.cancel)
+        self.cancel_button.pack(pady=5)
+    
+    def set_questions(self, done, total):
+        self.questions = (done, total)
+        self.question_label.config(text=f"题目：{done} / {total}")
+        self.question_bar.config(maximum=max(total, 1), value=done)
+    
+    def set_bytes(self, done, total):
+        self.bytes = (done, total)
+        self.bytes_label.config(text=f"素材：{done / 1048576:.1f} / {total / 1048576:.1f} MB")
+        self.bytes_bar.config(maximum=max(total, 1), value=done)
+    
+    def refresh(self):
+        """更新已用时间和预计剩余时间"""
+        elapsed = time.perf_counter() - self.start
+        # 完成比例：题目进度和素材复制进度各占一半（没有素材时只看题目）
+        fraction = self.questions[0] / max(self.questions[1], 1)
+        if self.bytes[1]:
+            fraction = (fraction + self.bytes[0] / self.bytes[1]) / 2
+        text = f"已用时间：{elapsed:.0f}秒"
+        if 0 < fraction < 1:
+            text += f"    预计剩余：{elapsed * (1 - fraction) / fraction:.0f}秒"
+        self.time_label.config(text=text)
+    
+    def cancel(self):
+        self.cancel_button.config(state=tk.DISABLED, text="正在取消...")
+        self.on_cancel()
+    
+    def close(self):
+        self.window.destroy()
 
 
 class ExamGeneratorGUI:
@@ -20,13 +107,20 @@ class ExamGeneratorGUI:
         self.root.title("电子试卷生成工具 v1.0")
         self.root.geometry("1200x800")
         
-        # 题目列表
-        self.questions = []
+        # 题库（默认为内存题库；打开题库文件后，增删改直接写入文件中对应的行）
+        self.bank = QuestionBank()
+        # 题目列表当前的筛选条件
+        self.current_filter = {}
         self.groups = []
         
-        # 当前项目文件路径（用于自动保存）
+        # 当前项目文件路径（用于自动保存：编辑追加到项目文件旁的编辑日志中）
         self.current_project_file = None
         
+        # 后台生成线程
+        self.build_thread = None
+        # 后台导入线程
+        self.import_thread = None
+        
         # 创建界面
         self.create_widgets()
         
@@ -55,19 +149,33 @@ class ExamGeneratorGUI:
         left_frame = ttk.LabelFrame(main_frame, text="题目列表", padding="10")
         left_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=5)
         
-        # 题目列表框
-        list_frame = ttk.Frame(left_frame)
-        list_frame.pack(fill=tk.BOTH, expand=True)
-        
-        scrollbar = ttk.Scrollbar(list_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        self.question_listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set,
-                                          width=30, height=25)
-        self.question_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.question_listbox.yview)
-        
-        self.question_listbox.bind('<<ListboxSelect>>', self.on_question_select)
+        # 筛选条件（按题型、所属分组、标签）
+        filter_frame = ttk.Frame(left_frame)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        ttk.Label(filter_frame, text="题型:").grid(row=0, column=0, sticky=tk.W)
+        self.filter_type = tk.StringVar(value="全部")
+        type_combo = ttk.Combobox(filter_frame, textvariable=self.filter_type, width=8, state="readonly",
+                                  values=["全部"] + list(TYPE_NAMES.values()))
+        type_combo.grid(row=0, column=1, sticky=tk.W, padx=2, pady=1)
+        type_combo.bind('<<ComboboxSelected>>', lambda e: self.update_question_list())
+        
+        ttk.Label(filter_frame, text="分组:").grid(row=1, column=0, sticky=tk.W)
+        self.filter_group = tk.StringVar()
+        group_entry = ttk.Entry(filter_frame, textvariable=self.filter_group, width=20)
+        group_entry.grid(row=1, column=1, sticky=tk.W, padx=2, pady=1)
+        group_entry.bind('<Return>', lambda e: self.update_question_list())
+        
+        ttk.Label(filter_frame, text="标签:").grid(row=2, column=0, sticky=tk.W)
+        self.filter_tag = tk.StringVar()
+        tag_entry = ttk.Entry(filter_frame, textvariable=self.filter_tag, width=20)
+        tag_entry.grid(row=2, column=1, sticky=tk.W, padx=2, pady=1)
+        tag_entry.bind('<Return>', lambda e: self.update_question_list())
+        
+        # 题目列表框（虚拟列表，只绘制可见的行）
+        self.question_list = VirtualListbox(left_frame, self.fetch_question_labels,
+                                            on_select=self.on_question_select, width=30, height=25)
+        self.question_list.pack(fill=tk.BOTH, expand=True)
         
         # 列表操作按钮
         btn_frame = ttk.Frame(left_frame)
@@ -98,9 +206,20 @@ class ExamGeneratorGUI:
         
         # 题目编号
         ttk.Label(middle_frame, text="题目编号:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        number_frame = ttk.Frame(middle_frame)
+        number_frame.grid(row=1, column=1, sticky=tk.W, pady=5)
         self.question_number = tk.StringVar()
-        ttk.Entry(middle_frame, textvariable=self.question_number, width=10).grid(
-            row=1, column=1, sticky=tk.W, pady=5)
+        ttk.Entry(number_frame, textvariable=self.question_number, width=10).pack(side=tk.LEFT)
+        
+        # 所属分组和标签（可选，用于在题库中筛选）
+        ttk.Label(number_frame, text="所属分组:").pack(side=tk.LEFT, padx=(15, 2))
+        self.question_group = tk.StringVar()
+        ttk.Entry(number_frame, textvariable=self.question_group, width=20).pack(side=tk.LEFT)
+        ttk.Label(number_frame, text="标签:").pack(side=tk.LEFT, padx=(15, 2))
+        self.question_tags = tk.StringVar()
+        ttk.Entry(number_frame, textvariable=self.question_tags, width=20).pack(side=tk.LEFT)
+        ttk.Label(number_frame, text="（可选，多个标签用逗号分隔）", 
+                 foreground="gray").pack(side=tk.LEFT, padx=5)
         
         # 题干输入
         ttk.Label(middle_frame, text="题干内容:").grid(row=2, column=0, sticky=tk.NW, pady=5)
@@ -122,7 +241,6 @@ class ExamGeneratorGUI:
         self.options_frame = ttk.LabelFrame(middle_frame, text="选项设置", padding="5")
         self.options_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
         
-        self.option_vars = {}
         self.create_option_fields()
         
         # 代码区域（可选）
@@ -184,8 +302,9 @@ class ExamGeneratorGUI:
         ttk.Label(right_frame, textvariable=self.output_dir, 
                  wraplength=250, foreground="blue").pack(fill=tk.X, pady=2)
         
-        ttk.Button(right_frame, text="🚀 生成试卷", command=self.generate_exam, 
-                  style="Accent.TButton").pack(fill=tk.X, pady=10)
+        self.generate_button = ttk.Button(right_frame, text="🚀 生成试卷", command=self.generate_exam, 
+                                          style="Accent.TButton")
+        self.generate_button.pack(fill=tk.X, pady=10)
         
         # 文件操作按钮
         file_frame = ttk.Frame(main_frame)
@@ -193,251 +312,342 @@ class ExamGeneratorGUI:
         
         ttk.Button(file_frame, text="💾 保存项目", command=self.save_project).pack(side=tk.LEFT, padx=5)
         ttk.Button(file_frame, text="📂 加载项目", command=self.load_project).pack(side=tk.LEFT, padx=5)
-        ttk.Button(file_frame, text="📋 导入现有试卷", command=self.import_exam).pack(side=tk.LEFT, padx=5)
+        ttk.Button(file_frame, text="🗄 打开题库", command=self.open_bank).pack(side=tk.LEFT, padx=5)
+        self.import_button = ttk.Button(file_frame, text="📋 导入现有试卷", command=self.import_exam)
+        self.import_button.pack(side=tk.LEFT, padx=5)
         
     def create_option_fields(self):
-        """创建选项输入字段"""
-        # 清空现有字段
-        for widget in self.options_frame.winfo_children():
-            widget.destroy()
+        """创建各题型的选项输入区，并显示当前题型的输入区
+
+        每种题型一个框架，只在启动时创建一次；切换题型（包括选中题目）时只切换显示的框架，
+        不再销毁、重建输入框。
+        """
+        self.option_frames = {}
+        for question_type, create in (("single", self.create_single_fields),
+                                      ("choice", self.create_choice_fields),
+                                      ("file", self.create_file_fields)):
+            frame = ttk.Frame(self.options_frame)
+            frame.grid(row=0, column=0, sticky=(tk.W, tk.E))
+            frame.grid_remove()
+            create(frame)
+            self.option_frames[question_type] = frame
+        self.shown_type = None
+        self.show_option_fields()
+        self.reset_option_fields()
+    
+    def create_single_fields(self, frame):
+        """单选题：4个选项和正确答案"""
+        self.option_vars = {}
+        for i, opt in enumerate(['A', 'B', 'C', 'D']):
+            ttk.Label(frame, text=f"选项{opt}:").grid(
+                row=i, column=0, sticky=tk.W, pady=2, padx=5)
+            var = tk.StringVar()
+            self.option_vars[opt] = var
+            ttk.Entry(frame, textvariable=var, width=50).grid(
+                row=i, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
+        
+        # 标准答案（用于批量评分，可不填）
+        ttk.Label(frame, text="正确答案:").grid(
+            row=4, column=0, sticky=tk.W, pady=2, padx=5)
+        self.single_answer = tk.StringVar()
+        ttk.Combobox(frame, textvariable=self.single_answer, width=5, state="readonly",
+                     values=['', 'A', 'B', 'C', 'D']).grid(row=4, column=1, sticky=tk.W, pady=2, padx=5)
+    
+    def create_choice_fields(self, frame):
+        """选择填空题：填空数量、分值、备选项和各空答案"""
+        ttk.Label(frame, text="填空数量:").grid(
+            row=0, column=0, sticky=tk.W, pady=2, padx=5)
+        self.blank_count = tk.StringVar(value="5")
+        ttk.Entry(frame, textvariable=self.blank_count, width=10).grid(
+            row=0, column=1, sticky=tk.W, pady=2, padx=5)
+        
+        ttk.Label(frame, text="每空分值:").grid(
+            row=1, column=0, sticky=tk.W, pady=2, padx=5)
+        self.blank_score = tk.StringVar(value="2")
+        ttk.Entry(frame, textvariable=self.blank_score, width=10).grid(
+            row=1, column=1, sticky=tk.W, pady=2, padx=5)
+        
+        ttk.Label(frame, text="备选项:").grid(
+            row=2, column=0, sticky=tk.NW, pady=2, padx=5)
+        self.choice_options = scrolledtext.ScrolledText(frame, width=50, height=8)
+        self.choice_options.grid(row=2, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
+        
+        ttk.Label(frame, text="各空答案:").grid(
+            row=3, column=0, sticky=tk.W, pady=2, padx=5)
+        self.blank_answers = tk.StringVar()
+        answer_frame = ttk.Frame(frame)
+        answer_frame.grid(row=3, column=1, sticky=tk.W, pady=2, padx=5)
+        ttk.Entry(answer_frame, textvariable=self.blank_answers, width=20).pack(side=tk.LEFT)
+        ttk.Label(answer_frame, text="（可选，按空的顺序填写字母，如 ACBDE，用于批量评分）", 
+                 foreground="gray").pack(side=tk.LEFT, padx=5)
+    
+    def create_file_fields(self, frame):
+        """文件操作题（可用于C语言或PS类操作题）"""
+        ttk.Label(frame, text="操作说明模板:").grid(
+            row=0, column=0, sticky=tk.W, pady=2, padx=5)
+        self.operation_template = tk.StringVar(value="c")
+        template_frame = ttk.Frame(frame)
+        template_frame.grid(row=0, column=1, sticky=tk.W, pady=2, padx=5)
+        ttk.Radiobutton(template_frame, text="C语言模板", variable=self.operation_template,
+                       value="c").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(template_frame, text="PS模板", variable=self.operation_template,
+                       value="ps").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(template_frame, text="自定义", variable=self.operation_template,
+                       value="custom").pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(frame, text="要打开的文件:").grid(
+            row=1, column=0, sticky=tk.W, pady=2, padx=5)
+        self.open_file = tk.StringVar()
+        entry_frame0 = ttk.Frame(frame)
+        entry_frame0.grid(row=1, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
+        ttk.Entry(entry_frame0, textvariable=self.open_file).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(entry_frame0, text="浏览", command=self.browse_open_file).pack(side=tk.LEFT, padx=5)
+        ttk.Label(entry_frame0, text="（如：prog.c、作品.psd、文档.docx）", 
+                 foreground="gray").pack(side=tk.LEFT, padx=5)
         
+        ttk.Label(frame, text="自定义操作说明:").grid(
+            row=2, column=0, sticky=tk.NW, pady=2, padx=5)
+        self.custom_operation = scrolledtext.ScrolledText(frame, width=50, height=6)
+        self.custom_operation.grid(row=2, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
+        ttk.Label(frame, text="（选择\"自定义\"时使用，支持HTML）", 
+                 foreground="gray").grid(row=3, column=1, sticky=tk.W, padx=5)
+        
+        ttk.Label(frame, text="素材文件夹 (可选):").grid(
+            row=4, column=0, sticky=tk.W, pady=2, padx=5)
+        self.material_folder = tk.StringVar()
+        entry_frame = ttk.Frame(frame)
+        entry_frame.grid(row=4, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
+        ttk.Entry(entry_frame, textvariable=self.material_folder).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(entry_frame, text="浏览", command=self.browse_material).pack(side=tk.LEFT, padx=5)
+
+        # 可选：样图/示例图（PS样图或C语言运行结果示例图）
+        ttk.Label(frame, text="示例图片 (可选):").grid(
+            row=5, column=0, sticky=tk.W, pady=2, padx=5)
+        self.sample_image = tk.StringVar()
+        entry_frame2 = ttk.Frame(frame)
+        entry_frame2.grid(row=5, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
+        ttk.Entry(entry_frame2, textvariable=self.sample_image).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(entry_frame2, text="浏览", command=self.browse_sample).pack(side=tk.LEFT, padx=5)
+        ttk.Label(entry_frame2, text="（PS样图或C运行结果）", 
+                 foreground="gray").pack(side=tk.LEFT, padx=5)
+
+        # 可选：prog.c 模板（C语言）
+        ttk.Label(frame, text="prog.c 模板 (可选):").grid(
+            row=6, column=0, sticky=tk.W, pady=2, padx=5)
+        self.prog_template = tk.StringVar()
+        entry_frame3 = ttk.Frame(frame)
+        entry_frame3.grid(row=6, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
+        ttk.Entry(entry_frame3, textvariable=self.prog_template).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(entry_frame3, text="浏览", command=self.browse_prog_template).pack(side=tk.LEFT, padx=5)
+    
+    def show_option_fields(self):
+        """显示当前题型的选项输入区（grid_remove隐藏的框架保留其布局设置）"""
+        question_type = self.question_type.get()
+        if question_type == self.shown_type:
+            return
+        for key, frame in self.option_frames.items():
+            if key == question_type:
+                frame.grid()
+            else:
+                frame.grid_remove()
+        self.shown_type = question_type
+    
+    def reset_option_fields(self):
+        """把当前题型的选项输入区恢复为默认内容"""
         question_type = self.question_type.get()
-        
         if question_type == "single":
-            # 单选题：4个选项
-            self.option_vars = {}
-            for i, opt in enumerate(['A', 'B', 'C', 'D']):
-                ttk.Label(self.options_frame, text=f"选项{opt}:").grid(
-                    row=i, column=0, sticky=tk.W, pady=2, padx=5)
-                var = tk.StringVar()
-                self.option_vars[opt] = var
-                ttk.Entry(self.options_frame, textvariable=var, width=50).grid(
-                    row=i, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
-                    
+            for var in self.option_vars.values():
+                var.set('')
+            self.single_answer.set('')
         elif question_type == "choice":
-            # 选择填空题
-            ttk.Label(self.options_frame, text="填空数量:").grid(
-                row=0, column=0, sticky=tk.W, pady=2, padx=5)
-            self.blank_count = tk.StringVar(value="5")
-            ttk.Entry(self.options_frame, textvariable=self.blank_count, width=10).grid(
-                row=0, column=1, sticky=tk.W, pady=2, padx=5)
-            
-            ttk.Label(self.options_frame, text="每空分值:").grid(
-                row=1, column=0, sticky=tk.W, pady=2, padx=5)
-            self.blank_score = tk.StringVar(value="2")
-            ttk.Entry(self.options_frame, textvariable=self.blank_score, width=10).grid(
-                row=1, column=1, sticky=tk.W, pady=2, padx=5)
-            
-            ttk.Label(self.options_frame, text="备选项:").grid(
-                row=2, column=0, sticky=tk.NW, pady=2, padx=5)
-            self.choice_options = scrolledtext.ScrolledText(self.options_frame, width=50, height=8)
-            self.choice_options.grid(row=2, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
+            self.blank_count.set("5")
+            self.blank_score.set("2")
+            self.choice_options.delete("1.0", tk.END)
             self.choice_options.insert("1.0", "A、选项1\nB、选项2\nC、选项3\n")
-            
+            self.blank_answers.set('')
         elif question_type == "file":
-            # 通用文件操作题（可用于C语言或PS类操作题）
-            ttk.Label(self.options_frame, text="操作说明模板:").grid(
-                row=0, column=0, sticky=tk.W, pady=2, padx=5)
-            self.operation_template = tk.StringVar(value="c")
-            template_frame = ttk.Frame(self.options_frame)
-            template_frame.grid(row=0, column=1, sticky=tk.W, pady=2, padx=5)
-            ttk.Radiobutton(template_frame, text="C语言模板", variable=self.operation_template,
-                           value="c").pack(side=tk.LEFT, padx=5)
-            ttk.Radiobutton(template_frame, text="PS模板", variable=self.operation_template,
-                           value="ps").pack(side=tk.LEFT, padx=5)
-            ttk.Radiobutton(template_frame, text="自定义", variable=self.operation_template,
-                           value="custom").pack(side=tk.LEFT, padx=5)
-            
-            ttk.Label(self.options_frame, text="要打开的文件:").grid(
-                row=1, column=0, sticky=tk.W, pady=2, padx=5)
-            self.open_file = tk.StringVar()
-            entry_frame0 = ttk.Frame(self.options_frame)
-            entry_frame0.grid(row=1, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
-            ttk.Entry(entry_frame0, textvariable=self.open_file).pack(side=tk.LEFT, fill=tk.X, expand=True)
-            ttk.Button(entry_frame0, text="浏览", command=self.browse_open_file).pack(side=tk.LEFT, padx=5)
-            ttk.Label(entry_frame0, text="（如：prog.c、作品.psd、文档.docx）", 
-                     foreground="gray").pack(side=tk.LEFT, padx=5)
-            
-            ttk.Label(self.options_frame, text="自定义操作说明:").grid(
-                row=2, column=0, sticky=tk.NW, pady=2, padx=5)
-            self.custom_operation = scrolledtext.ScrolledText(self.options_frame, width=50, height=6)
-            self.custom_operation.grid(row=2, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
-            ttk.Label(self.options_frame, text="（选择\"自定义\"时使用，支持HTML）", 
-                     foreground="gray").grid(row=3, column=1, sticky=tk.W, padx=5)
-            
-            ttk.Label(self.options_frame, text="素材文件夹 (可选):").grid(
-                row=4, column=0, sticky=tk.W, pady=2, padx=5)
-            self.material_folder = tk.StringVar()
-            entry_frame = ttk.Frame(self.options_frame)
-            entry_frame.grid(row=4, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
-            ttk.Entry(entry_frame, textvariable=self.material_folder).pack(side=tk.LEFT, fill=tk.X, expand=True)
-            ttk.Button(entry_frame, text="浏览", command=self.browse_material).pack(side=tk.LEFT, padx=5)
-
-            # 可选：样图/示例图（PS样图或C语言运行结果示例图）
-            ttk.Label(self.options_frame, text="示例图片 (可选):").grid(
-                row=5, column=0, sticky=tk.W, pady=2, padx=5)
-            self.sample_image = tk.StringVar()
-            entry_frame2 = ttk.Frame(self.options_frame)
-            entry_frame2.grid(row=5, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
-            ttk.Entry(entry_frame2, textvariable=self.sample_image).pack(side=tk.LEFT, fill=tk.X, expand=True)
-            ttk.Button(entry_frame2, text="浏览", command=self.browse_sample).pack(side=tk.LEFT, padx=5)
-            ttk.Label(entry_frame2, text="（PS样图或C运行结果）", 
-                     foreground="gray").pack(side=tk.LEFT, padx=5)
-
-            # 可选：prog.c 模板（C语言）
-            ttk.Label(self.options_frame, text="prog.c 模板 (可选):").grid(
-                row=6, column=0, sticky=tk.W, pady=2, padx=5)
-            self.prog_template = tk.StringVar()
-            entry_frame3 = ttk.Frame(self.options_frame)
-            entry_frame3.grid(row=6, column=1, sticky=(tk.W, tk.E), pady=2, padx=5)
-            ttk.Entry(entry_frame3, textvariable=self.prog_template).pack(side=tk.LEFT, fill=tk.X, expand=True)
-            ttk.Button(entry_frame3, text="浏览", command=self.browse_prog_template).pack(side=tk.LEFT, padx=5)
+            self.operation_template.set("c")
+            self.open_file.set('')
+            self.custom_operation.delete("1.0", tk.END)
+            self.material_folder.set('')
+            self.sample_image.set('')
+            self.prog_template.set('')
     
     def on_type_change(self):
-        """题目类型改变时重新创建选项字段"""
-        self.create_option_fields()
+        """题目类型改变时显示对应的选项输入区，并恢复为默认内容"""
+        self.show_option_fields()
+        self.reset_option_fields()
     
-    def add_question(self):
-        """添加题目"""
+    def form_question(self):
+        """读取编辑区中的题目，返回题目字典；未通过 question_model.validate 时提示原因并返回None"""
         question_type = self.question_type.get()
-        number = self.question_number.get().strip()
-        text = self.question_text.get("1.0", tk.END).strip()
-        
-        if not number or not text:
-            messagebox.showwarning("警告", "请填写题目编号和题干内容！")
-            return
-        
         question = {
             'type': question_type,
-            'number': number,
-            'text': text,
+            'number': self.question_number.get().strip(),
+            'text': self.question_text.get("1.0", tk.END).strip(),
             'code': self.code_text.get("1.0", tk.END).strip(),
             'question_image': self.question_image.get().strip()
         }
+        question.update(self.form_group_and_tags())
         
         if question_type == "single":
             question['options'] = {k: v.get() for k, v in self.option_vars.items()}
-            if not all(question['options'].values()):
-                messagebox.showwarning("警告", "请填写所有选项！")
-                return
-                
+            question.update(self.form_answers(question_type))
         elif question_type == "choice":
             question['blank_count'] = self.blank_count.get()
             question['blank_score'] = self.blank_score.get()
             question['choice_options'] = self.choice_options.get("1.0", tk.END).strip()
-            
+            question.update(self.form_answers(question_type))
         elif question_type == "file":
-            question['operation_template'] = getattr(self, 'operation_template', tk.StringVar()).get()
-            question['custom_operation'] = getattr(self, 'custom_operation', scrolledtext.ScrolledText(self.options_frame)).get("1.0", tk.END).strip()
-            question['open_file'] = getattr(self, 'open_file', tk.StringVar()).get().strip()
+            question['operation_template'] = self.operation_template.get()
+            question['custom_operation'] = self.custom_operation.get("1.0", tk.END).strip()
+            question['open_file'] = self.open_file.get().strip()
             question['material_folder'] = self.material_folder.get()
-            question['sample_image'] = getattr(self, 'sample_image', tk.StringVar()).get()
-            question['prog_template'] = getattr(self, 'prog_template', tk.StringVar()).get()
+            question['sample_image'] = self.sample_image.get()
+            question['prog_template'] = self.prog_template.get()
+        
+        ok, message = question_model.validate(question)
+        if not ok:
+            messagebox.showwarning("警告", message)
+            return None
+        return question
+    
+    def add_question(self):
+        """添加题目"""
+        question = self.form_question()
+        if question is None:
+            return
         
-        self.questions.append(question)
-        self.update_question_list()
+        qid = self.bank.add(question)
+        if self.matches_filter(question):
+            # 新题目在末尾，只插入这一行
+            self.question_list.insert(len(self.question_list), qid, self.question_label(question))
+            self.question_list.see(len(self.question_list) - 1)
         self.clear_form()
         messagebox.showinfo("成功", "题目已添加！")
     
     def update_question(self):
         """更新选中的题目"""
-        selection = self.question_listbox.curselection()
-        if not selection:
+        idx = self.question_list.selection()
+        if idx is None:
             messagebox.showwarning("警告", "请先选择要更新的题目！")
             return
         
-        idx = selection[0]
-        question_type = self.question_type.get()
-        number = self.question_number.get().strip()
-        text = self.question_text.get("1.0", tk.END).strip()
-        
-        if not number or not text:
-            messagebox.showwarning("警告", "请填写题目编号和题干内容！")
+        question = self.form_question()
+        if question is None:
             return
         
-        question = {
-            'type': question_type,
-            'number': number,
-            'text': text,
-            'code': self.code_text.get("1.0", tk.END).strip(),
-            'question_image': self.question_image.get().strip()
-        }
-        
-        if question_type == "single":
-            question['options'] = {k: v.get() for k, v in self.option_vars.items()}
-        elif question_type == "choice":
-            question['blank_count'] = self.blank_count.get()
-            question['blank_score'] = self.blank_score.get()
-            question['choice_options'] = self.choice_options.get("1.0", tk.END).strip()
-        elif question_type == "file":
-            question['operation_template'] = getattr(self, 'operation_template', tk.StringVar()).get()
-            question['custom_operation'] = getattr(self, 'custom_operation', scrolledtext.ScrolledText(self.options_frame)).get("1.0", tk.END).strip()
-            question['open_file'] = getattr(self, 'open_file', tk.StringVar()).get().strip()
-            question['material_folder'] = self.material_folder.get()
-            question['sample_image'] = getattr(self, 'sample_image', tk.StringVar()).get()
-            question['prog_template'] = getattr(self, 'prog_template', tk.StringVar()).get()
+        # 保留编辑区中没有的字段（如分值、难度、测试用例）
+        old = self.bank.get(self.question_list.key(idx))
+        for field in KEPT_FIELDS:
+            if field in old:
+                question.setdefault(field, old[field])
         
-        self.questions[idx] = question
-        self.update_question_list()
+        self.bank.update(self.question_list.key(idx), question)
+        # 只重绘列表中的这一行
+        self.question_list.update_row(idx, self.question_label(question))
         messagebox.showinfo("成功", "题目已更新！")
     
     def delete_question(self):
         """删除选中的题目"""
-        selection = self.question_listbox.curselection()
-        if not selection:
+        idx = self.question_list.selection()
+        if idx is None:
             return
         
         if messagebox.askyesno("确认", "确定删除选中的题目吗？"):
-            idx = selection[0]
-            del self.questions[idx]
-            self.update_question_list()
+            self.bank.delete(self.question_list.key(idx))
+            self.question_list.delete(idx)
     
     def move_up(self):
         """上移题目"""
-        selection = self.question_listbox.curselection()
-        if not selection or selection[0] == 0:
+        idx = self.question_list.selection()
+        if idx is None or idx == 0:
             return
         
-        idx = selection[0]
-        self.questions[idx], self.questions[idx-1] = self.questions[idx-1], self.questions[idx]
-        self.update_question_list()
-        self.question_listbox.selection_set(idx-1)
+        self.swap_questions(idx - 1, idx)
+        self.question_list.select(idx-1)
     
     def move_down(self):
         """下移题目"""
-        selection = self.question_listbox.curselection()
-        if not selection or selection[0] == len(self.questions) - 1:
+        idx = self.question_list.selection()
+        if idx is None or idx == len(self.question_list) - 1:
             return
         
-        idx = selection[0]
-        self.questions[idx], self.questions[idx+1] = self.questions[idx+1], self.questions[idx]
-        self.update_question_list()
-        self.question_listbox.selection_set(idx+1)
+        self.swap_questions(idx, idx + 1)
+        self.question_list.select(idx+1)
+    
+    def swap_questions(self, upper, lower):
+        """交换列表中相邻的两道题目（题库中只改写两行的顺序）"""
+        self.bank.swap(self.question_list.key(upper), self.question_list.key(lower))
+        self.question_list.swap(upper, lower)
+    
+    @staticmethod
+    def question_label(q):
+        """题目在列表中显示的文字（q可以是完整题目或题库中的摘要行）"""
+        type_name = TYPE_NAMES.get(q['type'], '未知')
+        text = q['title'] if 'title' in q else q['text']
+        return f"({q['number']}) [{type_name}] {text[:30]}..."
+    
+    def question_filter(self):
+        """读取筛选框中的条件"""
+        types = {name: t for t, name in TYPE_NAMES.items()}
+        return {
+            'type': types.get(self.filter_type.get()),
+            'group': self.filter_group.get().strip() or None,
+            'tag': self.filter_tag.get().strip() or None
+        }
+    
+    def matches_filter(self, question):
+        """题目是否符合题目列表当前的筛选条件"""
+        f = self.current_filter
+        return ((not f.get('type') or question['type'] == f['type']) and
+                (not f.get('group') or question.get('group') == f['group']) and
+                (not f.get('tag') or f['tag'] in question_tags(question)))
     
     def update_question_list(self):
-        """更新题目列表显示"""
-        self.question_listbox.delete(0, tk.END)
-        for q in self.questions:
-            type_name = {
-                'single': '单选',
-                'choice': '填空',
-                'file': '文件'
-            }.get(q['type'], '未知')
-            self.question_listbox.insert(tk.END, f"({q['number']}) [{type_name}] {q['text'][:30]}...")
-    
-    def on_question_select(self, event):
+        """重新显示题目列表（只读取符合条件的题目id，行文字在滚动到可见时才读取）"""
+        self.current_filter = self.question_filter()
+        self.question_list.set_keys(self.bank.ids(**self.current_filter))
+    
+    def fetch_question_labels(self, ids):
+        """从题库读取列表行的显示文字"""
+        return {qid: self.question_label(row) for qid, row in self.bank.summaries(ids).items()}
+    
+    def form_group_and_tags(self):
+        """读取表单中的所属分组和标签（未填写时不写入题目）"""
+        fields = {}
+        group = self.question_group.get().strip()
+        tags = question_tags({'tags': self.question_tags.get()})
+        if group:
+            fields['group'] = group
+        if tags:
+            fields['tags'] = tags
+        return fields
+    
+    def form_answers(self, question_type):
+        """读取表单中的标准答案（未填写时不写入题目）"""
+        if question_type == "single" and self.single_answer.get():
+            return {'answer': self.single_answer.get()}
+        if question_type == "choice":
+            answers = answer_letters(self.blank_answers.get())
+            if any(answers):
+                return {'answers': answers}
+        return {}
+    
+    def on_question_select(self):
         """题目选中时加载到编辑区"""
-        selection = self.question_listbox.curselection()
-        if not selection:
+        idx = self.question_list.selection()
+        if idx is None:
             return
         
-        idx = selection[0]
-        q = self.questions[idx]
+        q = self.bank.get(self.question_list.key(idx))
         
         self.question_type.set(q['type'])
         self.on_type_change()
         
         self.question_number.set(q['number'])
+        self.question_group.set(q.get('group', ''))
+        self.question_tags.set(', '.join(question_tags(q)))
         self.question_text.delete("1.0", tk.END)
         self.question_text.insert("1.0", q['text'])
         
@@ -451,11 +661,13 @@ class ExamGeneratorGUI:
             for k, v in q['options'].items():
                 if k in self.option_vars:
                     self.option_vars[k].set(v)
+            self.single_answer.set(q.get('answer', ''))
         elif q['type'] == 'choice':
             self.blank_count.set(q.get('blank_count', ''))
             self.blank_score.set(q.get('blank_score', ''))
             self.choice_options.delete("1.0", tk.END)
             self.choice_options.insert("1.0", q.get('choice_options', ''))
+            self.blank_answers.set(''.join(a or '-' for a in answer_letters(q.get('answers'))))
         elif q['type'] == 'file':
             self.operation_template.set(q.get('operation_template', 'c'))
             self.custom_operation.delete("1.0", tk.END)
@@ -469,13 +681,14 @@ class ExamGeneratorGUI:
     def clear_form(self):
         """清空表单"""
         self.question_number.set('')
+        self.question_group.set('')
+        self.question_tags.set('')
         self.question_text.delete("1.0", tk.END)
         self.question_image.set('')
         self.code_text.delete("1.0", tk.END)
         
-        if hasattr(self, 'option_vars'):
-            for var in self.option_vars.values():
-                var.set('')
+        for var in self.option_vars.values():
+            var.set('')
     
     def add_group(self):
         """添加分组"""
@@ -495,6 +708,7 @@ class ExamGeneratorGUI:
             return
         
         self.groups.append({'name': name, 'count': count})
+        self.store_settings()
         self.update_group_list()
         self.group_name.set('')
         self.group_count.set('')
@@ -508,6 +722,7 @@ class ExamGeneratorGUI:
         
         idx = selection[0]
         del self.groups[idx]
+        self.store_settings()
         self.update_group_list()
     
     def update_group_list(self):
@@ -563,231 +778,142 @@ class ExamGeneratorGUI:
         if folder:
             self.output_dir.set(folder)
     
+    def get_project(self):
+        """获取当前项目数据（题目从题库读出，是独立的副本）"""
+        project = {
+            'questions': list(self.bank.iter_questions()),
+            'groups': [dict(g) for g in self.groups],
+            'tips': self.tips_text.get("1.0", tk.END)
+        }
+        # 选项乱序设置（在项目JSON中配置，界面中保持不变）
+        shuffle = self.bank.get_meta('shuffle')
+        if shuffle:
+            project['shuffle'] = shuffle
+        return project
+    
     def generate_exam(self):
-        """生成试卷"""
-        if not self.questions:
+        """生成试卷（在后台线程中进行，界面保持可操作）"""
+        if not self.bank.count():
             messagebox.showwarning("警告", "请先添加题目！")
             return
         
-        output_dir = Path(self.output_dir.get())
+        if self.build_thread is not None and self.build_thread.is_alive():
+            messagebox.showwarning("警告", "试卷正在生成中，请等待完成或取消后再试！")
+            return
         
+        output_dir = Path(self.output_dir.get())
+        # 生成期间仍可继续编辑，后台线程使用当前项目的副本
+        project = self.get_project()
+        
+        self.build_queue = queue.Queue()
+        self.build_cancel = threading.Event()
+        self.build_progress = BuildProgressDialog(self.root, len(project['questions']),
+                                                  self.build_cancel.set)
+        self.generate_button.config(state=tk.DISABLED)
+        
+        self.build_thread = threading.Thread(target=self.run_build, args=(project, output_dir),
+                                             daemon=True)
+        self.build_thread.start()
+        self.root.after(100, self.poll_build_queue)
+    
+    def run_build(self, project, output_dir):
+        """后台线程：执行生成，通过队列向界面报告进度和结果"""
+        import traceback
+        q = self.build_queue
         try:
-            # 创建输出目录
-            output_dir.mkdir(parents=True, exist_ok=True)
-            
-            # 复制static文件夹
-            static_src = Path(__file__).parent / "static_template"
-            static_dst = output_dir / "static"
-            if static_src.exists():
-                shutil.copytree(static_src, static_dst, dirs_exist_ok=True)
-            else:
-                messagebox.showwarning("警告", f"找不到static_template文件夹：{static_src}\n将继续生成，但可能缺少静态资源。")
-            
-            # 生成HTML文件
-            template = HTMLTemplate()
-            for i, q in enumerate(self.questions, 1):
-                html_file = output_dir / f"{i:02d}.html"
-                
-                # 处理题干图片
-                question_image_path = q.get('question_image', '')
-                if question_image_path and Path(question_image_path).exists():
-                    # 复制题干图片到static目录
-                    if static_dst.exists():
-                        img_ext = Path(question_image_path).suffix
-                        img_name = f"question_{i:02d}{img_ext}"
-                        shutil.copy2(question_image_path, static_dst / img_name)
-                        # 在题干中添加图片HTML标签
-                        question_text_with_img = q['text'] + f'\n\n<div class="row" style="margin-top: 10px;"><div class="col-md-6"><img class="img-responsive center-block" src="./static/{img_name}" alt="题干图片"></div></div>'
-                    else:
-                        question_text_with_img = q['text']
-                else:
-                    question_text_with_img = q['text']
-                
-                if q['type'] == 'single':
-                    html_content = template.generate_single_choice(
-                        number=q['number'],
-                        question_text=question_text_with_img,
-                        options=q['options'],
-                        code=q.get('code', '')
-                    )
-                elif q['type'] == 'choice':
-                    html_content = template.generate_fill_blank(
-                        number=q['number'],
-                        question_text=question_text_with_img,
-                        code=q.get('code', ''),
-                        choice_options=q.get('choice_options', '')
-                    )
-                elif q['type'] == 'file':
-                    # 获取文件操作题的配置
-                    material_folder = q.get('material_folder', '')
-                    prog_template = q.get('prog_template', '')
-                    sample_image = q.get('sample_image', '')
-                    open_file_path = q.get('open_file', '').strip()  # 要自动打开的文件路径
-                    operation_template = q.get('operation_template', 'c')  # 操作说明模板类型
-                    custom_operation = q.get('custom_operation', '')  # 自定义操作说明
-                    
-                    # 判断操作题类型（用于文件处理）
-                    is_ps_operation = sample_image and Path(sample_image).exists()
-                    is_c_operation = prog_template and Path(prog_template).exists()
-                    
-                    # 根据操作说明模板类型生成HTML
-                    if operation_template == 'ps':
-                        # 使用PS模板
-                        sample_ext = Path(sample_image).suffix if sample_image and Path(sample_image).exists() else '.jpg'
-                        html_content = template.generate_ps_operation(
-                            question_text=question_text_with_img,
-                            question_number=i,
-                            sample_ext=sample_ext
-                        )
-                        # 复制PS样图到static文件夹
-                        if sample_image and Path(sample_image).exists() and static_dst.exists():
-                            sample_ext = Path(sample_image).suffix
-                            sample_filename = f"example{i}{sample_ext}"
-                            shutil.copy2(sample_image, static_dst / sample_filename)
-                    elif operation_template == 'c':
-                        # 使用C语言模板
-                        example_ext = Path(sample_image).suffix if sample_image and Path(sample_image).exists() else '.png'
-                        html_content = template.generate_c_operation(
-                            question_text=question_text_with_img,
-                            question_number=i,
-                            example_ext=example_ext
-                        )
-                        # 复制C语言示例图到static文件夹
-                        if sample_image and Path(sample_image).exists() and static_dst.exists():
-                            example_ext = Path(sample_image).suffix
-                            example_filename = f"c_example{i}{example_ext}"
-                            shutil.copy2(sample_image, static_dst / example_filename)
-                    else:  # operation_template == 'custom'
-                        # 使用自定义操作说明
-                        html_content = template.generate_custom_operation(
-                            question_text=question_text_with_img,
-                            custom_operation=custom_operation
-                        )
-                    
-                    # 创建题目文件夹
-                    question_folder = output_dir / f"{i:02d}"
-                    question_folder.mkdir(exist_ok=True)
-                    
-                    # 复制要打开的文件到题目文件夹
-                    open_file_name = ""
-                    if open_file_path and Path(open_file_path).exists():
-                        open_file_name = Path(open_file_path).name
-                        shutil.copy2(open_file_path, question_folder / open_file_name)
-                    
-                    # 处理素材文件
-                    if operation_template == 'ps':
-                        # PS操作题：创建素材子文件夹
-                        material_subfolder = question_folder / "素材"
-                        material_subfolder.mkdir(exist_ok=True)
-                        
-                        # 复制素材文件到素材子文件夹
-                        if material_folder and Path(material_folder).exists():
-                            for file in Path(material_folder).iterdir():
-                                if file.is_file():
-                                    shutil.copy2(file, material_subfolder / file.name)
-                    else:
-                        # C语言或其他操作题：复制素材文件到题目文件夹根目录
-                        if material_folder and Path(material_folder).exists():
-                            for file in Path(material_folder).iterdir():
-                                if file.is_file() and file.name != open_file_name:
-                                    shutil.copy2(file, question_folder / file.name)
-                    
-                    # 生成config.dat文件
-                    config_file = output_dir / f"{i:02d}-config.dat"
-                    config_lines = []
-                    
-                    # 第一行：要自动打开的文件名（不是路径）
-                    if open_file_name:
-                        config_lines.append(f"{open_file_name}\n")
-                    
-                    # 添加素材文件列表（注意：样图在static目录，不需要在这里列出）
-                    if material_folder and Path(material_folder).exists():
-                        for file in Path(material_folder).iterdir():
-                            if file.is_file() and file.name != open_file_name:
-                                if is_ps_operation:
-                                    config_lines.append(f"素材\\{file.name}\n")
-                                else:
-                                    config_lines.append(f"{file.name}\n")
-                    
-                    # 写入config文件
-                    if config_lines:
-                        with open(config_file, 'w', encoding='utf-8') as f:
-                            f.writelines(config_lines)
-                
-                # 写入HTML文件
-                with open(html_file, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-                
-                # 生成config文件（如果需要）
-                if q['type'] == 'choice':
-                    config_file = output_dir / f"{i:02d}-config.dat"
-                    with open(config_file, 'w', encoding='utf-8') as f:
-                        f.write(f"{q.get('blank_count', '5')}\n")
-                        f.write(f"{q.get('blank_score', '2')}\n")
-            
-            # 生成groups-info.dat
-            if self.groups:
-                groups_file = output_dir / "groups-info.dat"
-                with open(groups_file, 'w', encoding='utf-8') as f:
-                    for g in self.groups:
-                        f.write(f"{g['name']}----{g['count']}\n")
-            
-            # 生成question-type.dat
-            types_file = output_dir / "question-type.dat"
-            with open(types_file, 'w', encoding='utf-8') as f:
-                for q in self.questions:
-                    if q['type'] == 'single':
-                        f.write("single\n")
-                    elif q['type'] == 'choice':
-                        f.write("choice\n")
-                    elif q['type'] == 'file':
-                        f.write("file\n")
-            
-            # 生成tips.txt
-            tips_file = output_dir / "tips.txt"
-            with open(tips_file, 'w', encoding='utf-8') as f:
-                f.write(self.tips_text.get("1.0", tk.END))
-            
-            messagebox.showinfo("成功", f"试卷已成功生成到：\n{output_dir}")
-            
-            # 打开输出目录（跨平台）
-            if messagebox.askyesno("提示", "是否打开输出目录？"):
-                import platform
-                system = platform.system()
-                try:
-                    if system == 'Windows':
-                        os.startfile(output_dir)
-                    elif system == 'Darwin':  # macOS
-                        os.system(f'open "{output_dir}"')
-                    else:  # Linux and others
-                        os.system(f'xdg-open "{output_dir}"')
-                except Exception as e:
-                    messagebox.showwarning("提示", f"无法自动打开目录：{str(e)}\n请手动打开：{output_dir}")
-                
+            # 生成模块在第一次生成时才导入；导入失败也要通知界面，否则进度窗口不会关闭
+            import exam_builder
+        except Exception as e:
+            q.put(('error', e, traceback.format_exc()))
+            return
+        try:
+            result = exam_builder.build_exam(
+                project, output_dir,
+                cancel_event=self.build_cancel,
+                question_progress=lambda done, total: q.put(('question', done, total)),
+                copy_progress=lambda done, total: q.put(('bytes', done, total)))
+            q.put(('done', result))
+        except exam_builder.BuildCancelled:
+            q.put(('cancelled',))
         except Exception as e:
-            messagebox.showerror("错误", f"生成试卷失败：\n{str(e)}")
-            import traceback
-            print(traceback.format_exc())
+            q.put(('error', e, traceback.format_exc()))
+    
+    def poll_build_queue(self):
+        """主线程：处理后台生成线程发来的消息"""
+        finished = None
+        try:
+            while True:
+                msg = self.build_queue.get_nowait()
+                if msg[0] == 'question':
+                    self.build_progress.set_questions(msg[1], msg[2])
+                elif msg[0] == 'bytes':
+                    self.build_progress.set_bytes(msg[1], msg[2])
+                else:
+                    finished = msg
+        except queue.Empty:
+            pass
+        
+        if finished is None:
+            self.build_progress.refresh()
+            self.root.after(100, self.poll_build_queue)
+            return
+        
+        self.build_progress.close()
+        self.generate_button.config(state=tk.NORMAL)
+        if finished[0] == 'done':
+            self.on_build_finished(finished[1])
+        elif finished[0] == 'cancelled':
+            messagebox.showinfo("提示", "已取消生成。")
+        else:
+            messagebox.showerror("错误", f"生成试卷失败：\n{str(finished[1])}")
+            print(finished[2])
+    
+    def on_build_finished(self, result):
+        """生成完成后提示结果并询问是否打开输出目录"""
+        output_dir = result.output_dir
+        for warning in result.warnings:
+            messagebox.showwarning("警告", warning)
+        
+        messagebox.showinfo("成功", f"试卷已成功生成到：\n{output_dir}")
+        
+        # 打开输出目录（跨平台）
+        if messagebox.askyesno("提示", "是否打开输出目录？"):
+            import platform
+            system = platform.system()
+            try:
+                if system == 'Windows':
+                    os.startfile(output_dir)
+                elif system == 'Darwin':  # macOS
+                    os.system(f'open "{output_dir}"')
+                else:  # Linux and others
+                    os.system(f'xdg-open "{output_dir}"')
+            except Exception as e:
+                messagebox.showwarning("提示", f"无法自动打开目录：{str(e)}\n请手动打开：{output_dir}")
     
     def save_project(self):
         """保存项目"""
         file = filedialog.asksaveasfilename(
             title="保存项目",
             defaultextension=".json",
-            filetypes=[("JSON文件", "*.json")]
+            filetypes=[("JSON文件", "*.json"), ("二进制项目文件", f"*{BINARY_SUFFIX}")]
         )
         
         if not file:
             return
         
-        project = {
-            'questions': self.questions,
-            'groups': self.groups,
-            'tips': self.tips_text.get("1.0", tk.END)
-        }
-        
-        with open(file, 'w', encoding='utf-8') as f:
-            json.dump(project, f, ensure_ascii=False, indent=2)
+        if Path(file).suffix.lower() == BINARY_SUFFIX:
+            # 二进制项目文件整体写入，不记录编辑日志
+            import exam_builder
+            exam_builder.save_project(self.get_project(), file)
+        elif self.bank.is_temporary:
+            # 写入完整快照，之后的编辑自动追加到该项目的编辑日志
+            self.store_settings()
+            self.stop_autosave()
+            self.bank.journal = project_journal.ProjectJournal.create(file, self.get_project(), self.bank.ids())
+            self.current_project_file = file
+        else:
+            import exam_builder
+            exam_builder.save_project(self.get_project(), file)
         
         messagebox.showinfo("成功", "项目已保存！")
     
@@ -795,113 +921,160 @@ class ExamGeneratorGUI:
         """加载项目"""
         file = filedialog.askopenfilename(
             title="加载项目",
-            filetypes=[("JSON文件", "*.json")]
+            filetypes=[("项目文件", f"*.json *{BINARY_SUFFIX}"), ("JSON文件", "*.json"),
+                       ("二进制项目文件", f"*{BINARY_SUFFIX}")]
         )
         
         if not file:
             return
         
+        if Path(file).suffix.lower() == BINARY_SUFFIX:
+            try:
+                import exam_builder
+                bank = QuestionBank()
+                bank.import_project(exam_builder.load_project(file))
+                self.set_bank(bank)
+                self.current_project_file = None
+                messagebox.showinfo("成功", "项目已加载！")
+            except Exception as e:
+                messagebox.showerror("错误", f"加载项目失败：\n{str(e)}")
+            return
+        
         try:
-            with open(file, 'r', encoding='utf-8') as f:
-                project = json.load(f)
+            # 重放上次未合并的编辑日志（包括程序异常退出前的编辑）
+            project, ids, seq, token = project_journal.load_project(file)
             
-            self.questions = project.get('questions', [])
-            self.groups = project.get('groups', [])
-            
-            self.tips_text.delete("1.0", tk.END)
-            self.tips_text.insert("1.0", project.get('tips', ''))
-            
-            self.update_question_list()
-            self.update_group_list()
+            bank = QuestionBank()
+            bank.import_project(project, ids)
+            self.set_bank(bank)
+            if token is None:
+                # 旧版本或其他方式保存的项目JSON：先写入带日志标记的快照
+                bank.journal = project_journal.ProjectJournal.create(file, project, ids)
+            else:
+                bank.journal = project_journal.ProjectJournal(file, seq, token)
+            self.current_project_file = file
             
-            messagebox.showinfo("成功", "项目已加载！")
+            messagebox.showinfo("成功", "项目已加载！\n之后的修改会自动保存到项目文件。")
         except Exception as e:
             messagebox.showerror("错误", f"加载项目失败：\n{str(e)}")
     
+    def open_bank(self):
+        """打开或新建SQLite题库，之后的增删改直接写入题库文件"""
+        file = filedialog.asksaveasfilename(
+            title="打开或新建题库",
+            defaultextension=".db",
+            filetypes=[("题库文件", "*.db *.sqlite *.sqlite3")],
+            confirmoverwrite=False
+        )
+        
+        if not file:
+            return
+        
+        try:
+            if Path(file).exists():
+                if self.bank.is_temporary and self.bank.journal is None and self.bank.count():
+                    if not messagebox.askyesno("确认", "当前题目尚未保存，打开题库后将被替换，是否继续？"):
+                        return
+                bank = QuestionBank(file)
+            else:
+                # 新建题库：当前的题目、分组和考试说明一起保存进去
+                self.store_settings()
+                self.bank.save_as(file)
+                bank = QuestionBank(file)
+        except Exception as e:
+            messagebox.showerror("错误", f"打开题库失败：\n{str(e)}")
+            return
+        
+        self.set_bank(bank)
+        messagebox.showinfo("成功", f"已打开题库，共 {bank.count()} 道题目。\n之后的修改会自动保存到题库文件。")
+    
+    def set_bank(self, bank):
+        """切换到另一个题库，并读取其中保存的分组和考试说明"""
+        if bank is not self.bank:
+            self.stop_autosave()
+            self.bank.close()
+            self.bank = bank
+        
+        groups = bank.get_meta('groups')
+        if groups is not None:
+            self.groups = groups
+        tips = bank.get_meta('tips')
+        if tips is not None:
+            self.tips_text.delete("1.0", tk.END)
+            self.tips_text.insert("1.0", tips)
+        
+        self.update_question_list()
+        self.update_group_list()
+    
+    def stop_autosave(self):
+        """保存分组和考试说明，把当前项目的编辑日志合并进项目文件并停止记录"""
+        if self.bank.journal is not None:
+            self.store_settings()
+            self.bank.journal.close()
+            self.bank.journal = None
+        self.current_project_file = None
+    
+    def store_settings(self):
+        """将分组和考试说明保存到题库"""
+        self.bank.set_meta('groups', self.groups)
+        self.bank.set_meta('tips', self.tips_text.get("1.0", tk.END))
+    
     def import_exam(self):
-        """导入现有试卷"""
+        """导入现有试卷（在后台线程中解析，界面保持响应）"""
+        if self.import_thread is not None and self.import_thread.is_alive():
+            return
         folder = filedialog.askdirectory(title="选择现有试卷目录")
         if not folder:
             return
         
+        self.import_queue = queue.Queue()
+        self.import_button.config(state=tk.DISABLED)
+        self.import_thread = threading.Thread(target=self.run_import, args=(folder,), daemon=True)
+        self.import_thread.start()
+        self.root.after(100, self.poll_import_queue)
+    
+    def run_import(self, folder):
+        """后台线程：解析各题页面，还原题干、选项、代码、图片和素材"""
+        import traceback
         try:
-            folder_path = Path(folder)
-            
-            # 读取question-type.dat
-            types_file = folder_path / "question-type.dat"
-            if not types_file.exists():
-                messagebox.showerror("错误", "找不到question-type.dat文件！")
-                return
-            
-            with open(types_file, 'r', encoding='utf-8') as f:
-                types = [line.strip() for line in f.readlines()]
-            
-            # 读取每个HTML文件
-            self.questions = []
-            for i, qtype in enumerate(types, 1):
-                html_file = folder_path / f"{i:02d}.html"
-                if not html_file.exists():
-                    continue
-                
-                # 简单解析（这里只是示例，实际需要更复杂的解析）
-                question = {
-                    'type': qtype,
-                    'number': str(i),
-                    'text': '(导入的题目，请手动编辑)',
-                    'code': ''
-                }
-                
-                if qtype == 'single':
-                    question['options'] = {'A': '', 'B': '', 'C': '', 'D': ''}
-                elif qtype == 'choice':
-                    # 读取config文件
-                    config_file = folder_path / f"{i:02d}-config.dat"
-                    if config_file.exists():
-                        with open(config_file, 'r', encoding='utf-8') as f:
-                            lines = f.readlines()
-                            question['blank_count'] = lines[0].strip() if len(lines) > 0 else '5'
-                            question['blank_score'] = lines[1].strip() if len(lines) > 1 else '2'
-                    question['choice_options'] = ''
-                elif qtype == 'file':
-                    # 检查是否有素材文件夹
-                    material_folder = folder_path / f"{i:02d}"
-                    if material_folder.exists():
-                        question['material_folder'] = str(material_folder)
-                    question['sample_image'] = ''
-                    question['prog_template'] = ''
-                
-                self.questions.append(question)
-            
-            # 读取分组信息
-            groups_file = folder_path / "groups-info.dat"
-            if groups_file.exists():
-                self.groups = []
-                with open(groups_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        if '----' in line:
-                            name, count = line.strip().split('----')
-                            self.groups.append({'name': name, 'count': count})
-            
-            # 读取提示信息
-            tips_file = folder_path / "tips.txt"
-            if tips_file.exists():
-                with open(tips_file, 'r', encoding='utf-8') as f:
-                    self.tips_text.delete("1.0", tk.END)
-                    self.tips_text.insert("1.0", f.read())
-            
-            self.update_question_list()
-            self.update_group_list()
-            
-            messagebox.showinfo("成功", f"已导入 {len(self.questions)} 道题目！\n请检查并编辑题目内容。")
-            
+            import exam_import
+            self.import_queue.put(('done', exam_import.import_exam(folder)))
         except Exception as e:
-            messagebox.showerror("错误", f"导入失败：\n{str(e)}")
-            import traceback
-            print(traceback.format_exc())
+            self.import_queue.put(('error', e, traceback.format_exc()))
+    
+    def poll_import_queue(self):
+        """主线程：导入完成后载入题目"""
+        try:
+            msg = self.import_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(100, self.poll_import_queue)
+            return
+        
+        self.import_button.config(state=tk.NORMAL)
+        if msg[0] == 'error':
+            messagebox.showerror("错误", f"导入失败：\n{str(msg[1])}")
+            print(msg[2])
+            return
+        
+        project = msg[1]
+        bank = QuestionBank()
+        bank.import_project(project)
+        self.set_bank(bank)
+        messagebox.showinfo("成功", f"已导入 {len(project['questions'])} 道题目！\n请检查并编辑题目内容。")
     
     def on_closing(self):
         """窗口关闭时的处理"""
-        if self.questions:
+        if self.build_thread is not None and self.build_thread.is_alive():
+            if not messagebox.askyesno("确认", "试卷正在生成中，是否取消生成并退出？"):
+                return
+            self.build_cancel.set()
+            self.build_thread.join()
+        
+        if not self.bank.is_temporary or self.bank.journal is not None:
+            # 题目已实时写入题库文件（或项目的编辑日志），只需保存分组和考试说明
+            self.store_settings()
+            self.bank.close()
+        elif self.bank.count():
             # 使用三按钮对话框：是/否/取消
             result = messagebox.askyesnocancel("确认", "是否在退出前保存项目？")
             if result is None:  # 用户点击了"取消"
@@ -918,14 +1091,8 @@ class ExamGeneratorGUI:
                     return  # 不退出程序
                 
                 try:
-                    project = {
-                        'questions': self.questions,
-                        'groups': self.groups,
-                        'tips': self.tips_text.get("1.0", tk.END)
-                    }
-                    
-                    with open(file, 'w', encoding='utf-8') as f:
-                        json.dump(project, f, ensure_ascii=False, indent=2)
+                    import exam_builder
+                    exam_builder.save_project(self.get_project(), file)
                     
                     messagebox.showinfo("成功", "项目已保存！")
                 except Exception as e:
@@ -936,28 +1103,6 @@ class ExamGeneratorGUI:
             # result为False时（用户点击了"否"），直接退出
         
         self.root.destroy()
-    
-    def validate_question(self, question):
-        """验证题目数据的完整性"""
-        if not question.get('number') or not question.get('text'):
-            return False, "题目编号和题干不能为空"
-        
-        if question['type'] == 'single':
-            if not all(question.get('options', {}).values()):
-                return False, "单选题必须填写所有选项"
-        elif question['type'] == 'choice':
-            if not question.get('blank_count') or not question.get('blank_score'):
-                return False, "选择填空题必须填写填空数量和分值"
-            try:
-                int(question['blank_count'])
-                int(question['blank_score'])
-            except ValueError:
-                return False, "填空数量和分值必须是数字"
-        elif question['type'] == 'file':
-            if not question.get('material_folder') and not question.get('prog_template') and not question.get('sample_image'):
-                return False, "文件操作题至少需要提供素材文件夹、prog.c模板或样图之一"
-        
-        return True, "验证通过"
 
 
 def main():
@@ -969,8 +1114,15 @@ def main():
     style.theme_use('clam')
     
     app = ExamGeneratorGUI(root)
+    if os.environ.get(STARTUP_PROBE_ENV):
+        root.update()
+        root.destroy()
+        return
     root.mainloop()
 
 
 if __name__ == '__main__':
+    # 导入试卷时用多进程解析页面；打包成exe后子进程须在此返回，不能再启动界面
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,69 @@
+"""
+电子试卷生成工具 - 批量评分命令行入口
+按项目中单选题和选择填空题的标准答案，为一场考试的全部考生评分
+
+用法：
+    python exam_grade.py 项目.json 作答.csv [-o 成绩.csv] [--shuffle-map 输出目录/shuffle-map.bin]
+
+作答CSV第一列为考生，其余列以题号（01、06等）为表头。
+使用了选项乱序时，考生列应为考生序号，并通过 --shuffle-map 换算选择填空题的字母。
+退出码：0 成功，2 参数错误。
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from exam_builder import load_project
+from grading import AnswerKey, Responses, grade, np, to_original_letters
+from option_shuffle import ShuffleMap
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="电子试卷批量评分工具")
+    parser.add_argument('project', help="项目文件（项目JSON或.db题库）")
+    parser.add_argument('responses', help="作答CSV文件")
+    parser.add_argument('-o', '--output', default='scores.csv', help="成绩CSV文件（默认：scores.csv）")
+    parser.add_argument('--shuffle-map', default=None, help="选项排列表 shuffle-map.bin")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """命令行主函数，返回退出码"""
+    args = parse_args(argv)
+    files = [Path(args.project), Path(args.responses)]
+    if args.shuffle_map:
+        files.append(Path(args.shuffle_map))
+    for file in files:
+        if not file.is_file():
+            print(f"错误：找不到文件：{file}", file=sys.stderr)
+            return 2
+
+    answer_key = AnswerKey(load_project(args.project).get('questions', []))
+    if answer_key.missing:
+        print("警告：以下题目缺少标准答案，不计分：" +
+              "、".join(f"{n:02d}" for n in answer_key.missing), file=sys.stderr)
+
+    start = time.perf_counter()
+    responses = Responses.from_csv(answer_key, args.responses)
+    if args.shuffle_map:
+        try:
+            responses = to_original_letters(responses, ShuffleMap.load(args.shuffle_map))
+        except (ValueError, IndexError) as e:
+            print(f"错误：无法按排列表换算作答：{e}", file=sys.stderr)
+            return 2
+    loaded = time.perf_counter()
+    result = grade(responses)
+    graded = time.perf_counter()
+    result.write_csv(args.output)
+
+    count = len(result.candidates)
+    average = sum(result.totals) / count if count else 0
+    print(f"共 {count} 名考生、{answer_key.item_count} 个得分点，平均分 {average:.2f}，"
+          f"读取 {loaded - start:.2f}s，评分 {graded - loaded:.3f}s"
+          f"（{'NumPy' if np is not None else '逐行计算'}），成绩已保存到 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
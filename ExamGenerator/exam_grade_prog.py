@@ -0,0 +1,89 @@
+"""
+电子试卷生成工具 - C语言编程题评分命令行入口
+编译考生提交的prog.c并运行题目中的测试用例
+
+用法：
+    python exam_grade_prog.py 项目.json 提交目录 [-o 成绩.csv] [-j 进程数] [--cache 缓存目录]
+
+提交目录中每位考生一个文件夹，其中的题目文件夹与生成的试卷相同（如 张三/07/prog.c）。
+只评分设置了测试用例（tests）的C语言操作题。
+退出码：0 成功，2 参数错误。
+"""
+
+import argparse
+import csv
+import shutil
+import sys
+import time
+from pathlib import Path
+from exam_builder import load_project
+from program_grading import (CC, COMPILE_ERROR, MISSING, NO_REGION, PASSED, ProgramGrader,
+                             load_submissions)
+
+
+STATUS_NAMES = {COMPILE_ERROR: '编译错误', MISSING: '未提交', NO_REGION: '编程区域标记被删除'}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="C语言编程题评分工具")
+    parser.add_argument('project', help="项目文件（项目JSON或.db题库）")
+    parser.add_argument('submissions', help="考生提交目录")
+    parser.add_argument('-o', '--output', default='prog-scores.csv', help="成绩CSV文件（默认：prog-scores.csv）")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="并行进程数（默认：CPU核数）")
+    parser.add_argument('--cache', default=None, help="编译结果缓存目录（默认：系统临时目录）")
+    return parser.parse_args(argv)
+
+
+def detail(number, entry):
+    """成绩表中一道题的说明，如 “07:3/4”“08:编译错误”"""
+    if entry['status'] in STATUS_NAMES:
+        return f"{number:02d}:{STATUS_NAMES[entry['status']]}"
+    passed = sum(status == PASSED for status in entry['tests'])
+    return f"{number:02d}:{passed}/{len(entry['tests'])}"
+
+
+def main(argv=None):
+    """命令行主函数，返回退出码"""
+    args = parse_args(argv)
+    project_file = Path(args.project)
+    root = Path(args.submissions)
+    if not project_file.is_file():
+        print(f"错误：找不到项目文件：{project_file}", file=sys.stderr)
+        return 2
+    if not root.is_dir():
+        print(f"错误：找不到提交目录：{root}", file=sys.stderr)
+        return 2
+    if shutil.which(CC) is None:
+        print(f"错误：找不到编译器 {CC}", file=sys.stderr)
+        return 2
+
+    questions = load_project(project_file).get('questions', [])
+    try:
+        grader = ProgramGrader(questions, base_dir=project_file.parent, cache_dir=args.cache, workers=args.jobs)
+    except ValueError as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 2
+    if not grader.numbers:
+        print("错误：项目中没有设置了测试用例的C语言操作题", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    submissions = load_submissions(root, questions)
+    results = grader.grade(submissions)
+
+    with open(args.output, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['考生', '总分'] + [f"{n:02d}" for n in grader.numbers] + ['说明'])
+        for candidate, entries in results.items():
+            scores = [entries[n]['score'] for n in grader.numbers]
+            writer.writerow([candidate, f"{sum(scores):g}"] + [f"{s:g}" for s in scores] +
+                            ['; '.join(detail(n, entries[n]) for n in grader.numbers)])
+
+    errors = sum(entry['status'] == COMPILE_ERROR for entries in results.values() for entry in entries.values())
+    print(f"共 {len(results)} 名考生、{len(grader.numbers)} 道编程题，编译错误 {errors} 份，"
+          f"用时 {time.perf_counter() - start:.2f}s，成绩已保存到 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
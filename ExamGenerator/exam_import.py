@@ -0,0 +1,315 @@
+"""
+导入现有试卷
+逐个解析已生成试卷中的 NN.html，还原题干、选项、代码、备选项、题干图片和样图，
+再结合 question-type.dat、NN-config.dat、题目文件夹、groups-info.dat 和 tips.txt
+把试卷还原为完整的项目数据。页面用流式HTML解析器边读边解析，读到页面尾部的脚本即停止；
+题目较多时多进程并行解析
+"""
+
+import html
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+
+
+# 每次送入解析器的字节数
+READ_SIZE = 64 * 1024
+# 页面数不超过此值时在当前进程中解析（启动进程的开销大于解析本身）
+PARALLEL_THRESHOLD = 16
+
+# 不需要结束标签的元素
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+             'source', 'track', 'wbr'}
+# 页面标题 -> 题目类型（没有question-type.dat时使用）
+PAGE_TYPES = {'单选题': 'single', '选择填空题': 'choice', '操作题': 'file'}
+
+# 页面尾部的水印容器注释，之后只有脚本，不再需要解析
+FOOT_MARKER = ' 水印容器 '
+CUSTOM_MARKER = ' 自定义操作说明 '
+CUSTOM_PLACEHOLDER = '（请在题目编辑中填写自定义操作说明）'
+BOLD_LABEL = '<span style="font-weight: bold;">{}</span>'
+# 题干后追加的题干图片（见ExamBuilder.question_text_with_image）
+QUESTION_IMAGE = re.compile(
+    r'\n\n<div class="row" style="margin-top: 10px;"><div class="col-md-6"><img [^>]*alt="题干图片"></div></div>$')
+NUMBERED_STEM = re.compile(r'（(.*?)）(.*)$', re.S)
+
+
+class PageParser(HTMLParser):
+    """试卷页面解析器
+
+    按文档顺序收集页面中各栏（col-md-*）的内部HTML、<pre>中的文本、
+    单选题各选项的HTML和图片标签的属性。内容直接从页面原文中截取，
+    题干、选项中用户写的HTML（包括实体的写法）保持不变。
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        # 已送入的页面原文和每行开头的位置（把解析器报告的行列号换算为原文中的位置）
+        self.text = []
+        self.length = 0
+        self.line_starts = [0]
+        self.title = ''
+        # 顶层各栏的内部HTML
+        self.blocks = []
+        # 自定义操作说明所在栏在blocks中的序号
+        self.custom_block = None
+        # [(id, 文本)]
+        self.pres = []
+        # {'A': 选项HTML}
+        self.options = {}
+        # 图片标签属性 [{'src':..., 'alt':..., 'data-original':...}]
+        self.images = []
+        self.done = False
+        # 打开的元素 [标签名]
+        self.stack = []
+        # 正在记录的元素：[元素关闭后的栈深度, 内容开始位置, 完成回调]
+        self.captures = []
+        # 单选题选项：读到单选按钮后，标签中的第二个span为选项内容
+        self.option = None
+        self.option_spans = 0
+        self.custom_next = False
+
+    def feed(self, data):
+        for match in re.finditer('\n', data):
+            self.line_starts.append(self.length + match.end())
+        self.text.append(data)
+        self.length += len(data)
+        super().feed(data)
+
+    def position(self):
+        """当前标记在页面原文中的开始位置"""
+        line, column = self.getpos()
+        return self.line_starts[line - 1] + column
+
+    def source(self, start, end):
+        if len(self.text) > 1:
+            self.text = [''.join(self.text)]
+        return self.text[0][start:end]
+
+    def capture(self, on_done):
+        """记录刚打开的元素的内部HTML，元素关闭时调用on_done(内容)"""
+        start = self.position() + len(self.get_starttag_text())
+        self.captures.append([len(self.stack) - 1, start, on_done])
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'img':
+            self.images.append(attrs)
+        elif tag == 'input' and attrs.get('type') == 'radio':
+            self.option, self.option_spans = attrs.get('value'), 0
+        if tag in VOID_TAGS:
+            return
+
+        self.stack.append(tag)
+        classes = (attrs.get('class') or '').split()
+        if tag == 'title':
+            self.capture(self.set_title)
+        elif tag == 'pre':
+            pre_id = attrs.get('id')
+            self.capture(lambda text: self.pres.append((pre_id, html.unescape(text))))
+        elif tag == 'span' and self.option is not None:
+            self.option_spans += 1
+            if self.option_spans == 2:
+                option = self.option
+                self.capture(lambda text: self.options.__setitem__(option, text))
+        elif tag == 'div' and not self.in_block() and any(c.startswith('col-md-') for c in classes):
+            if self.custom_next:
+                self.custom_block = len(self.blocks)
+                self.custom_next = False
+            self.capture(self.blocks.append)
+
+    def set_title(self, text):
+        self.title = html.unescape(text)
+
+    def in_block(self):
+        return any(capture[2] == self.blocks.append for capture in self.captures)
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/> 等自闭合写法
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in self.stack:
+            return
+        end = self.position()
+        while self.stack:
+            closed = self.stack.pop()
+            # 元素关闭时结束对其内容的记录（没有结束标签的内层元素随外层一起关闭）
+            while self.captures and self.captures[-1][0] == len(self.stack):
+                _, start, on_done = self.captures.pop()
+                on_done(self.source(start, end))
+            if closed == tag:
+                break
+        if tag == 'label':
+            self.option = None
+
+    def handle_comment(self, data):
+        if data == FOOT_MARKER:
+            self.done = True
+        elif data == CUSTOM_MARKER:
+            self.custom_next = True
+
+
+def parse_page(path):
+    """流式解析一个页面文件，读到页面尾部即停止，返回PageParser"""
+    parser = PageParser()
+    with open(path, 'r', encoding='utf-8') as f:
+        while not parser.done:
+            chunk = f.read(READ_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+    parser.close()
+    return parser
+
+
+def block_text(block):
+    """去掉模板在栏内容前后加的换行和缩进"""
+    return re.sub(r'^\n\t*', '', re.sub(r'\n\t*$', '', block))
+
+
+def strip_label(text, label):
+    """去掉栏开头的粗体标签（如“题目要求：”），不是以此开头时返回None"""
+    prefix = BOLD_LABEL.format(label)
+    return text[len(prefix):] if text.startswith(prefix) else None
+
+
+def pre_text(pre):
+    """<pre>中的文本：模板在开始标签后换了一行（浏览器显示时忽略），还原时去掉"""
+    return pre[1:] if pre.startswith('\n') else pre
+
+
+def image_file(folder, attrs):
+    """页面中图片对应的文件（优先使用放大查看用的原图），文件不存在时返回空字符串"""
+    for src in (attrs.get('data-original'), attrs.get('src')):
+        if src and src.startswith('./'):
+            path = folder / src[2:]
+            if path.is_file():
+                return str(path)
+    return ''
+
+
+def read_lines(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.rstrip('\n') for line in f]
+
+
+def parse_question(folder, i, qtype=None):
+    """解析第i题的页面及其配置文件，还原为题目数据"""
+    folder = Path(folder)
+    page = parse_page(folder / f"{i:02d}.html")
+    qtype = qtype or PAGE_TYPES.get(page.title.strip(), 'file')
+    images = {attrs.get('alt'): image_file(folder, attrs) for attrs in page.images}
+    blocks = [block_text(block) for block in page.blocks]
+    stem = blocks[0] if blocks else ''
+    pres = dict(page.pres)
+    backup = [text for pre_id, text in page.pres if pre_id != 'code-1']
+
+    question = {'type': qtype, 'number': str(i), 'text': stem}
+    if qtype == 'single':
+        match = NUMBERED_STEM.match(stem)
+        if match:
+            question['number'], question['text'] = match.groups()
+        question['options'] = {key: page.options.get(key, '') for key in 'ABCD'}
+        question['code'] = pre_text(pres.get('code-1', ''))
+    elif qtype == 'choice':
+        question['code'] = pre_text(pres.get('code-1', ''))
+        question['choice_options'] = pre_text(backup[0]) if backup else ''
+        config = folder / f"{i:02d}-config.dat"
+        lines = read_lines(config) if config.is_file() else []
+        question['blank_count'] = lines[0].strip() if len(lines) > 0 else '5'
+        question['blank_score'] = lines[1].strip() if len(lines) > 1 else '2'
+    else:
+        question.update(parse_operation(folder, i, page, blocks, images))
+
+    # 题干图片追加在题干之后
+    question['text'], count = QUESTION_IMAGE.subn('', question['text'])
+    question['question_image'] = images.get('题干图片', '') if count else ''
+    return question
+
+
+def parse_operation(folder, i, page, blocks, images):
+    """还原操作题的操作说明模板、题干、样图、要打开的文件和素材文件夹"""
+    fields = {'code': ''}
+    program = next((text for text in (strip_label(b, '程序功能：') for b in blocks)
+                    if text is not None), None)
+    if program is not None:
+        fields.update(operation_template='c', text=program, custom_operation='',
+                      sample_image=images.get('程序运行结果示例', ''))
+    else:
+        text = strip_label(blocks[0], '题目要求：') if blocks else None
+        fields['text'] = text if text is not None else (blocks[0] if blocks else '')
+        if page.custom_block is not None:
+            custom = blocks[page.custom_block]
+            fields.update(operation_template='custom', sample_image='',
+                          custom_operation='' if custom == CUSTOM_PLACEHOLDER else custom)
+        else:
+            fields.update(operation_template='ps', custom_operation='', sample_image=images.get('样图', ''))
+
+    # config.dat第一行为要打开的文件（素材带“素材\”前缀，或PS题的素材在“素材”子文件夹中）
+    question_dir = folder / f"{i:02d}"
+    config = folder / f"{i:02d}-config.dat"
+    lines = [line for line in read_lines(config) if line.strip()] if config.is_file() else []
+    open_file = ''
+    if lines and not lines[0].startswith('素材\\') and (question_dir / lines[0]).is_file():
+        open_file = str(question_dir / lines[0])
+    fields['open_file'] = open_file
+    materials = question_dir / '素材' if fields['operation_template'] == 'ps' else question_dir
+    fields['material_folder'] = str(materials) if materials.is_dir() and any(materials.iterdir()) else ''
+    return fields
+
+
+def _parse_question(args):
+    """进程池中调用的parse_question"""
+    return parse_question(*args)
+
+
+def read_groups(folder):
+    path = Path(folder) / "groups-info.dat"
+    if not path.is_file():
+        return []
+    groups = []
+    for line in read_lines(path):
+        if '----' in line:
+            name, count = line.strip().split('----', 1)
+            groups.append({'name': name, 'count': count})
+    return groups
+
+
+def import_exam(folder, workers=None):
+    """把已生成的试卷目录还原为项目数据（格式与项目JSON相同）
+
+    题目中的图片、要打开的文件和素材文件夹引用试卷目录中的文件。
+
+    Args:
+        workers: 并行解析的进程数，默认为CPU核数；页面较少时不启动进程
+    """
+    folder = Path(folder)
+    types_file = folder / "question-type.dat"
+    types = [line.strip() for line in read_lines(types_file)] if types_file.is_file() else []
+    count = len(types)
+    if not count:
+        while (folder / f"{count + 1:02d}.html").is_file():
+            count += 1
+    if not count:
+        raise ValueError(f"{folder} 中没有试卷页面（01.html）")
+
+    jobs = [(str(folder), i, types[i - 1] if types else None) for i in range(1, count + 1)
+            if (folder / f"{i:02d}.html").is_file()]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            questions = list(executor.map(_parse_question, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        questions = [_parse_question(job) for job in jobs]
+
+    tips_file = folder / "tips.txt"
+    tips = ''
+    if tips_file.is_file():
+        with open(tips_file, 'r', encoding='utf-8') as f:
+            tips = f.read()
+    return {'questions': questions, 'groups': read_groups(folder), 'tips': tips}
@@ -0,0 +1,81 @@
+"""
+文件系统元数据缓存
+一次构建内对同一路径只查询一次：目录用 os.scandir 扫描一遍，
+文件的存在性和 stat 结果都从缓存读取（网络共享目录上每次查询都是一次往返）
+"""
+
+import os
+import stat
+from pathlib import Path
+
+
+class FileSystemCache:
+    """单次构建使用的文件元数据缓存
+
+    缓存不会感知构建过程中源文件的变化，每次构建应新建一个实例。
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._listings = {}
+
+    def stat(self, path):
+        """获取stat结果，路径不存在时返回None"""
+        key = os.fspath(path)
+        if key not in self._stats:
+            try:
+                self._stats[key] = os.stat(key)
+            except OSError:
+                self._stats[key] = None
+        return self._stats[key]
+
+    def exists(self, path):
+        return self.stat(path) is not None
+
+    def is_file(self, path):
+        st = self.stat(path)
+        return st is not None and stat.S_ISREG(st.st_mode)
+
+    def is_dir(self, path):
+        st = self.stat(path)
+        return st is not None and stat.S_ISDIR(st.st_mode)
+
+    def scan(self, folder):
+        """扫描目录，返回 (文件列表, 子目录列表)，均为按名称排序的Path列表
+
+        扫描时同时缓存每个文件的stat结果，之后的查询不再访问文件系统。
+        目录不存在时返回两个空列表。
+        """
+        key = os.fspath(folder)
+        if key not in self._listings:
+            files, dirs = [], []
+            try:
+                with os.scandir(key) as it:
+                    for entry in it:
+                        path = Path(entry.path)
+                        try:
+                            if entry.is_dir():
+                                dirs.append(path)
+                            elif entry.is_file():
+                                self._stats[os.fspath(path)] = entry.stat()
+                                files.append(path)
+                        except OSError:
+                            continue
+            except OSError:
+                pass
+            files.sort(key=lambda p: p.name)
+            dirs.sort(key=lambda p: p.name)
+            self._listings[key] = (files, dirs)
+        return self._listings[key]
+
+    def list_files(self, folder):
+        """列出目录中的文件（不含子目录），按文件名排序"""
+        return self.scan(folder)[0]
+
+    def walk_files(self, folder):
+        """递归列出目录下的全部文件，顺序固定（先文件后子目录，均按名称排序）"""
+        files, dirs = self.scan(folder)
+        result = list(files)
+        for d in dirs:
+            result.extend(self.walk_files(d))
+        return result
@@ -0,0 +1,233 @@
+"""
+批量评分
+按单选题和选择填空题的标准答案，为一场考试的全部考生一次性评分。
+作答统一存为每位考生一行、每个得分点（单选题一题、填空题一空）一个字节的字母矩阵；
+安装了NumPy时整场考试在一次向量化运算中完成评分，否则逐行计算
+"""
+
+import csv
+from array import array
+from question_model import answer_letters
+
+try:
+    import numpy as np
+except ImportError:  # NumPy为可选依赖
+    np = None
+
+
+# 未作答（以及标准答案缺失）的得分点在矩阵中的取值
+BLANK = ord(' ')
+
+# 单选题未设置score时的分值
+DEFAULT_SINGLE_SCORE = 1.0
+
+
+def pack_answer(value, count):
+    """将一道题的作答转换为count个字符的字母串（每空一个字母，未作答为空格）"""
+    if value is None:
+        return ' ' * count
+    if not isinstance(value, str) or ',' in value or '，' in value:
+        value = ''.join(letter or ' ' for letter in answer_letters(value))
+    else:
+        # 首尾的空白不是作答，否则每一空都会错位（跳过的空用 - 或 _ 表示）
+        value = value.strip()
+    return value.upper().replace('-', ' ').replace('_', ' ').ljust(count)[:count]
+
+
+class AnswerKey:
+    """一份试卷的标准答案
+
+    题目按生成的文件编号（从1开始）排列；单选题占1个得分点，
+    选择填空题按blank_count占多个得分点，每空blank_score分。
+    """
+
+    def __init__(self, questions):
+        # 每道可评分题目：(题号, 第一个得分点的序号, 得分点数)
+        self.questions = []
+        # 没有标准答案的题目编号（这些得分点不计分）
+        self.missing = []
+        # 选择填空题的题号
+        self.choice_numbers = set()
+        keys = []
+        scores = []
+        for i, q in enumerate(questions, 1):
+            if q.get('type') == 'single':
+                letters = answer_letters(q.get('answer'))[:1] or ['']
+                points = [float(q.get('score') or DEFAULT_SINGLE_SCORE)]
+            elif q.get('type') == 'choice':
+                count = int(q.get('blank_count') or 0)
+                if count <= 0:
+                    continue
+                letters = (answer_letters(q.get('answers')) + [''] * count)[:count]
+                points = [float(q.get('blank_score') or 0)] * count
+                self.choice_numbers.add(i)
+            else:
+                continue
+            if not all(letters):
+                self.missing.append(i)
+            self.questions.append((i, len(keys), len(letters)))
+            keys.extend(letters)
+            scores.extend(points)
+        # 每个得分点的标准答案（ASCII字母，缺失为空格）和分值
+        self.keys = bytes(ord(k) if k else BLANK for k in keys)
+        self.scores = array('d', scores)
+
+    @property
+    def item_count(self):
+        return len(self.keys)
+
+    @property
+    def numbers(self):
+        """可评分题目的题号"""
+        return [number for number, _, _ in self.questions]
+
+
+class Responses:
+    """一场考试的全部作答
+
+    candidates 为考生标识列表；letters 为 考生数×得分点数 的字节串，
+    每个字节为考生在该得分点选择的字母（ASCII），未作答为空格。
+    """
+
+    def __init__(self, answer_key, candidates, letters):
+        if len(letters) != len(candidates) * answer_key.item_count:
+            raise ValueError("作答数据与标准答案的得分点数不一致")
+        self.answer_key = answer_key
+        self.candidates = candidates
+        self.letters = letters
+
+    @classmethod
+    def from_rows(cls, answer_key, rows):
+        """由 (考生, {题号: 答案}) 序列构建，答案格式同answer_letters"""
+        candidates = []
+        parts = []
+        for candidate, answers in rows:
+            candidates.append(candidate)
+            for number, _, count in answer_key.questions:
+                parts.append(pack_answer(answers.get(number), count))
+        return cls(answer_key, candidates, ''.join(parts).encode('ascii', 'replace'))
+
+    @classmethod
+    def from_csv(cls, answer_key, path):
+        """读取CSV作答文件
+
+        第一行为表头：第一列为考生，其余列为题号（如 01、06）；
+        单选题单元格为选择的字母，选择填空题为各空的字母（如 ACB-D，- 或空格表示未作答）。
+        表中没有的题目按未作答处理。
+        """
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            columns = {int(name): c for c, name in enumerate(header) if c and name.strip().isdigit()}
+            layout = [(columns.get(number), count) for number, _, count in answer_key.questions]
+            candidates = []
+            parts = []
+            for row in reader:
+                if not row:
+                    continue
+                candidates.append(row[0])
+                for column, count in layout:
+                    cell = row[column] if column is not None and column < len(row) else None
+                    parts.append(pack_answer(cell, count))
+        return cls(answer_key, candidates, ''.join(parts).encode('ascii', 'replace'))
+
+
+class GradeResult:
+    """评分结果：每位考生的总分和各题得分"""
+
+    def __init__(self, answer_key, candidates, totals, question_scores):
+        self.answer_key = answer_key
+        self.candidates = candidates
+        # 总分（考生数）
+        self.totals = totals
+        # 各题得分（考生数×题目数，列顺序同answer_key.questions）
+        self.question_scores = question_scores
+
+    def write_csv(self, path):
+        """保存为CSV：考生、总分、各题得分"""
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['考生', '总分'] + [f"{n:02d}" for n in self.answer_key.numbers])
+            for c, candidate in enumerate(self.candidates):
+                writer.writerow([candidate, f"{self.totals[c]:g}"] +
+                                [f"{s:g}" for s in self.question_scores[c]])
+
+
+def to_original_letters(responses, shuffle_map):
+    """将考生看到的选择填空题字母换算为原备选项字母，返回新的Responses
+
+    考生标识应为排列表中的考生序号。单选题页面提交的已是原选项字母，不需要换算。
+    """
+    answer_key = responses.answer_key
+    items = answer_key.item_count
+    slots = [(shuffle_map.offsets[number], first, count)
+             for number, first, count in answer_key.questions
+             if number in answer_key.choice_numbers and number in shuffle_map.offsets]
+    rows = [int(candidate) for candidate in responses.candidates]
+    for candidate in rows:
+        if not 0 <= candidate < shuffle_map.candidates:
+            raise IndexError(f"考生序号超出范围：{candidate}")
+
+    if np is not None:
+        matrix = np.frombuffer(responses.letters, dtype=np.uint8).reshape(len(rows), items).copy()
+        perms = np.frombuffer(shuffle_map.data, dtype=np.uint8).reshape(
+            shuffle_map.candidates, shuffle_map.row_size)[rows]
+        for (offset, n), first, count in slots:
+            table = perms[:, offset:offset + n]
+            block = matrix[:, first:first + count].astype(np.intp) - 65
+            valid = (block >= 0) & (block < n)
+            mapped = np.take_along_axis(table, np.where(valid, block, 0), axis=1) + 65
+            matrix[:, first:first + count] = np.where(valid, mapped, matrix[:, first:first + count])
+        return Responses(answer_key, responses.candidates, matrix.tobytes())
+
+    data = bytearray(responses.letters)
+    for r, candidate in enumerate(rows):
+        for (offset, n), first, count in slots:
+            start = candidate * shuffle_map.row_size + offset
+            order = shuffle_map.data[start:start + n]
+            for k in range(r * items + first, r * items + first + count):
+                shown = data[k] - 65
+                if 0 <= shown < n:
+                    data[k] = 65 + order[shown]
+    return Responses(answer_key, responses.candidates, bytes(data))
+
+
+def grade(responses):
+    """为全部考生评分，返回GradeResult"""
+    answer_key = responses.answer_key
+    candidates = responses.candidates
+    if np is not None:
+        return _grade_numpy(answer_key, candidates, responses.letters)
+    return _grade_python(answer_key, candidates, responses.letters)
+
+
+def _grade_numpy(answer_key, candidates, letters):
+    items = answer_key.item_count
+    matrix = np.frombuffer(letters, dtype=np.uint8).reshape(len(candidates), items)
+    keys = np.frombuffer(answer_key.keys, dtype=np.uint8)
+    scores = np.frombuffer(answer_key.scores, dtype=np.float64)
+    # 答对的得分点：与标准答案相同且标准答案存在
+    item_scores = (matrix == keys) * np.where(keys != BLANK, scores, 0.0)
+    if answer_key.questions and len(candidates):
+        starts = [first for _, first, _ in answer_key.questions]
+        question_scores = np.add.reduceat(item_scores, starts, axis=1)
+    else:
+        question_scores = np.zeros((len(candidates), len(answer_key.questions)))
+    return GradeResult(answer_key, candidates, question_scores.sum(axis=1), question_scores)
+
+
+def _grade_python(answer_key, candidates, letters):
+    items = answer_key.item_count
+    keys = answer_key.keys
+    scores = answer_key.scores
+    totals = []
+    question_scores = []
+    for c in range(len(candidates)):
+        row = letters[c * items:(c + 1) * items]
+        per_question = []
+        for _, first, count in answer_key.questions:
+            per_question.append(sum(scores[k] for k in range(first, first + count)
+                                    if keys[k] != BLANK and row[k] == keys[k]))
+        question_scores.append(per_question)
+        totals.append(sum(per_question))
+    return GradeResult(answer_key, candidates, totals, question_scores)
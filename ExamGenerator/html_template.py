@@ -4,6 +4,13 @@ HTML模板生成器
 """
 
 import html
+import os
+import re
+
+
+# 页面中逐个引用static中样式表和脚本的标签（整行匹配）
+STYLESHEET_TAG = re.compile(r'^([ \t]*)<link rel="stylesheet" href="\./static/([^"]+)">\n', re.M)
+SCRIPT_TAG = re.compile(r'^([ \t]*)<script src="\./static/([^"]+)"></script>\n', re.M)
 
 
 class HTMLTemplate:
@@ -60,45 +67,46 @@ class HTMLTemplate:
 		var ShowWatermark = false; // 是否显示水印
 		// 水印配置
         var watermarkConfig = null;
-		// 创建水印
+		// 创建水印：把一格水印画成图块，作为容器的重复背景（不为每一格创建元素）
         function createWatermark() {{
-            // 清空现有水印
-            watermarkContainer.innerHTML = '';
+            const cfg = watermarkConfig;
+            const key = JSON.stringify(cfg);
+            // 设置未变化时不重新生成
+            if (watermarkContainer.dataset.watermark === key) return;
+            watermarkContainer.dataset.watermark = key;
             
-            // 获取视口尺寸
-            const viewportWidth = window.innerWidth;
-            const viewportHeight = window.innerHeight;
+            const spacing = cfg.spacing;
+            const ratio = window.devicePixelRatio || 1;
+            const canvas = document.createElement('canvas');
+            canvas.width = Math.ceil(spacing * ratio);
+            canvas.height = Math.ceil(spacing * ratio);
+            const ctx = canvas.getContext('2d');
+            ctx.scale(ratio, ratio);
+            ctx.font = `${{cfg.fontSize}}px Arial, sans-serif`;
+            ctx.fillStyle = cfg.color;
+            ctx.globalAlpha = cfg.opacity;
+            ctx.textAlign = 'center';
+            ctx.textBaseline = 'middle';
             
-            // 计算水印数量
-            const cols = Math.ceil(viewportWidth / watermarkConfig.spacing) + 1;
-            const rows = Math.ceil(viewportHeight / watermarkConfig.spacing) + 1;
-            
-            // 创建水印元素
-            for (let i = 0; i < rows; i++) {{
-                for (let j = 0; j < cols; j++) {{
-                    const watermark = document.createElement('div');
-                    
-                    // 设置水印样式
-                    watermark.style.position = 'absolute';
-                    watermark.style.left = `${{j * watermarkConfig.spacing}}px`;
-                    watermark.style.top = `${{i * watermarkConfig.spacing}}px`;
-                    watermark.style.transform = `rotate(${{watermarkConfig.rotation}}deg)`;
-                    watermark.style.opacity = watermarkConfig.opacity;
-                    watermark.style.fontSize = `${{watermarkConfig.fontSize}}px`;
-                    watermark.style.color = watermarkConfig.color;
-                    watermark.style.fontFamily = 'Arial, sans-serif';
-                    watermark.style.whiteSpace = 'nowrap';
-                    watermark.style.userSelect = 'none';
-                    watermark.style.webkitUserSelect = 'none';
-                    watermark.style.zIndex = '100';
-                    
-                    // 设置水印文本
-                    watermark.textContent = watermarkConfig.text;
-                    
-                    // 添加到容器
-                    watermarkContainer.appendChild(watermark);
+            // 每格文字左上角在格子左上角，绕文字中心旋转
+            const width = ctx.measureText(cfg.text).width;
+            const height = cfg.fontSize * 1.15;
+            const radius = Math.sqrt(width * width + height * height) / 2;
+            // 超出图块的部分从相邻格子画入，拼接后与逐格放置的效果相同
+            const reach = Math.ceil((width / 2 + radius) / spacing);
+            for (let i = -reach; i <= reach; i++) {{
+                for (let j = -reach; j <= reach; j++) {{
+                    ctx.save();
+                    ctx.translate(j * spacing + width / 2, i * spacing + height / 2);
+                    ctx.rotate(cfg.rotation * Math.PI / 180);
+                    ctx.fillText(cfg.text, 0, 0);
+                    ctx.restore();
                 }}
             }}
+            
+            watermarkContainer.style.backgroundImage = `url(${{canvas.toDataURL('image/png')}})`;
+            watermarkContainer.style.backgroundSize = `${{spacing}}px ${{spacing}}px`;
+            watermarkContainer.style.backgroundRepeat = 'repeat';
         }}
         // 网页加载就绪
 		$(document).ready(function() {{
@@ -144,15 +152,154 @@ class HTMLTemplate:
 			// Get the Viewer.js instance after initialized
 			var viewer = $image.data('viewer');
 			// View a list of images
-			$('.zoom').viewer();
+			$('.zoom').viewer({{
+				// 预览图放大时显示data-original中的原图
+				url: function(image) {{
+					return image.getAttribute('data-original') || image.src;
+				}}
+			}});
 		}});
     </script>
   </body>
 </html>
 """
+        # 选项乱序脚本：按地址中的排列（#shuffle=2,0,3,1，第k个数为显示在第k位的原选项序号）
+        # 重排选项并重新标注字母。单选题提交的仍是原选项字母，答案与宿主程序的交互不变
+        self.shuffle_scripts = {
+            'single': """		<script>
+		// 选项乱序
+		(function() {
+			var m = /shuffle=([0-9,]+)/.exec(location.hash + location.search);
+			if (!m) return;
+			var order = m[1].split(','), letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ';
+			var radios = document.querySelectorAll('input[type="radio"][name="options"]');
+			if (order.length !== radios.length) return;
+			var rows = [];
+			for (var i = 0; i < radios.length; i++) {
+				var row = radios[i].parentNode;
+				while (!/(^| )row( |$)/.test(row.className)) row = row.parentNode;
+				rows.push(row);
+			}
+			var parent = rows[0].parentNode, anchor = rows[rows.length - 1].nextSibling;
+			for (var k = 0; k < order.length; k++) {
+				var row = rows[+order[k]];
+				parent.insertBefore(row, anchor);
+				row.querySelector('label > span').textContent = letters[k] + '.';
+			}
+		})();
+		</script>
+""",
+            'choice': """		<script>
+		// 备选项乱序
+		(function() {
+			var m = /shuffle=([0-9,]+)/.exec(location.hash + location.search);
+			if (!m) return;
+			var order = m[1].split(','), letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ';
+			var pres = document.getElementsByTagName('pre'), pre = pres[pres.length - 1];
+			var lines = pre.textContent.split('\\n'), options = [], positions = [];
+			for (var i = 0; i < lines.length; i++) {
+				var option = /^(\\s*)([A-Z])([、.．])(.*)$/.exec(lines[i]);
+				if (option) {
+					options.push(option);
+					positions.push(i);
+				}
+			}
+			if (order.length !== options.length) return;
+			for (var k = 0; k < order.length; k++) {
+				var o = options[+order[k]];
+				lines[positions[k]] = o[1] + letters[k] + o[3] + o[4];
+			}
+			pre.textContent = lines.join('\\n');
+		})();
+		</script>
+""",
+        }
+        
+        # 已格式化的页面外壳缓存：{key: (文本, 编码后的字节)}
+        self._head_cache = {}
+        self._foot_cache = {}
+    
+    def static_references(self):
+        """页面引用的static中的样式表和脚本文件名，按加载顺序返回 (样式表列表, 脚本列表)"""
+        styles = [m.group(2) for m in STYLESHEET_TAG.finditer(self.base_head)]
+        scripts = [m.group(2) for m in SCRIPT_TAG.finditer(self.base_foot)]
+        return styles, scripts
+    
+    def use_bundles(self, css=None, js=None):
+        """把逐个引用的样式表/脚本替换为合并后的文件（static中的文件名），为None时保持不变"""
+        if css:
+            self.base_head = self._replace_tags(
+                STYLESHEET_TAG, self.base_head, '{}<link rel="stylesheet" href="./static/{}">\n', css)
+        if js:
+            self.base_foot = self._replace_tags(
+                SCRIPT_TAG, self.base_foot, '{}<script src="./static/{}"></script>\n', js)
+    
+    @staticmethod
+    def _replace_tags(pattern, text, tag, name):
+        """第一个标签替换为引用name的标签，其余的删除"""
+        first = pattern.search(text)
+        if first is None:
+            return text
+        text = pattern.sub('', text)
+        return text[:first.start()] + tag.format(first.group(1), name) + text[first.start():]
+    
+    @staticmethod
+    def encode(text):
+        """按文本模式写文件的规则编码（换行符转换为系统换行符，UTF-8编码）"""
+        if os.linesep != '\n':
+            text = text.replace('\n', os.linesep)
+        return text.encode('utf-8')
+    
+    def head(self, title):
+        """获取格式化后的页面头部，同一标题只格式化一次"""
+        key = (self.base_head, title)
+        if key not in self._head_cache:
+            text = self.base_head.format(title=title)
+            self._head_cache[key] = (text, self.encode(text))
+        return self._head_cache[key]
+    
+    def foot(self, extra_script='', extra_ready=''):
+        """获取格式化后的页面尾部，相同的脚本组合只格式化一次"""
+        key = (self.base_foot, extra_script, extra_ready)
+        if key not in self._foot_cache:
+            text = self.base_foot.format(extra_script=extra_script, extra_ready=extra_ready)
+            self._foot_cache[key] = (text, self.encode(text))
+        return self._foot_cache[key]
     
-    def generate_single_choice(self, number, question_text, options, code=''):
-        """生成单选题HTML"""
+    @staticmethod
+    def image_tag(src, alt, size=None, full=None):
+        """生成图片标签
+        
+        Args:
+            size: 图片尺寸 (宽, 高)，提供时写入width/height，页面加载图片前即可排好版
+            full: 放大查看用的原图地址，提供时点击图片用viewer.js查看原图
+        """
+        attrs = f'class="img-responsive center-block{" zoom" if full else ""}" src="{src}"'
+        if full:
+            attrs += f' data-original="{full}"'
+        if size and size[0] and size[1]:
+            attrs += f' width="{size[0]}" height="{size[1]}"'
+        return f'<img {attrs} alt="{alt}">'
+    
+    def render_page(self, title, body, extra_script='', extra_ready='', out=None):
+        """由缓存的头部、尾部和页面正文组装完整页面
+        
+        Args:
+            out: 可选的二进制文件对象。提供时直接把各段字节写入文件（不拼接整页），
+                 返回写入的字节数；否则返回页面字符串
+        """
+        head_text, head_bytes = self.head(title)
+        foot_text, foot_bytes = self.foot(extra_script, extra_ready)
+        if out is None:
+            return head_text + body + foot_text
+        return out.write(head_bytes) + out.write(self.encode(body)) + out.write(foot_bytes)
+    
+    def generate_single_choice(self, number, question_text, options, code='', out=None, shuffle=False):
+        """生成单选题HTML
+        
+        Args:
+            shuffle: 是否加入选项乱序脚本（各考生共用页面，排列由宿主程序在地址中传入）
+        """
         
         # 代码区域
         code_html = ''
@@ -203,6 +350,8 @@ class HTMLTemplate:
 {code_html}
 {options_html}	</div>
 """
+        if shuffle:
+            body += self.shuffle_scripts['single']
         
         extra_script = """// 接收来自宿主程序的答案
 			window.answer = function(option) {
@@ -235,11 +384,14 @@ class HTMLTemplate:
 				}
 			});"""
         
-        return (self.base_head.format(title="单选题") + body + 
-                self.base_foot.format(extra_script=extra_script, extra_ready=extra_ready))
+        return self.render_page("单选题", body, extra_script, extra_ready, out=out)
     
-    def generate_fill_blank(self, number, question_text, code, choice_options):
-        """生成选择填空题HTML"""
+    def generate_fill_blank(self, number, question_text, code, choice_options, out=None, shuffle=False):
+        """生成选择填空题HTML
+        
+        Args:
+            shuffle: 是否加入备选项乱序脚本（同generate_single_choice）
+        """
         
         # 代码区域（主代码）
         code_escaped = html.escape(code).replace('\n', '\n') if code.strip() else ''
@@ -278,21 +430,27 @@ class HTMLTemplate:
 		</div>
 	</div>
 """
+        if shuffle:
+            body += self.shuffle_scripts['choice']
         
-        return (self.base_head.format(title="选择填空题") + body + 
-                self.base_foot.format(extra_script='', extra_ready=''))
+        return self.render_page("选择填空题", body, out=out)
     
-    def generate_c_operation(self, question_text, question_number=1, example_ext='.png'):
+    def generate_c_operation(self, question_text, question_number=1, example_ext='.png', out=None,
+                             image_size=None, full_image=None):
         """生成C语言操作题HTML
         
         Args:
             question_text: 题目要求文本（程序功能描述）
             question_number: 题目编号，用于定位对应的示例图文件
             example_ext: 示例图文件扩展名（默认.png）
+            out: 可选的二进制文件对象，提供时直接写入文件（见render_page）
+            image_size, full_image: 示例图的尺寸和放大查看用的原图文件名（见image_tag）
         """
         
         # 示例图文件名：c_example1.png, c_example2.png, ...
         example_filename = f"c_example{question_number}{example_ext}"
+        example_tag = self.image_tag(f"./static/{example_filename}", "程序运行结果示例", image_size,
+                                     full_image and f"./static/{full_image}")
         
         body = f"""	<div class="container-fluid" style="margin: 10px;">
 		<!-- 题干区域 -->
@@ -324,26 +482,30 @@ class HTMLTemplate:
 		<!-- 图片区域 -->
 		<div class="row disable-selected" style="margin-top: 10px;">
 			<div class="col-md-6">
-				<img class="img-responsive center-block" src="./static/{example_filename}" alt="程序运行结果示例">
+				{example_tag}
 			</div>
 		</div>
 	</div>
 """
         
-        return (self.base_head.format(title="操作题") + body + 
-                self.base_foot.format(extra_script='', extra_ready=''))
+        return self.render_page("操作题", body, out=out)
     
-    def generate_ps_operation(self, question_text, question_number=1, sample_ext='.jpg'):
+    def generate_ps_operation(self, question_text, question_number=1, sample_ext='.jpg', out=None,
+                              image_size=None, full_image=None):
         """生成Photoshop操作题HTML
         
         Args:
             question_text: 题目要求文本
             question_number: 题目编号，用于定位对应的样图文件
             sample_ext: 样图文件扩展名（默认.jpg）
+            out: 可选的二进制文件对象，提供时直接写入文件（见render_page）
+            image_size, full_image: 样图的尺寸和放大查看用的原图文件名（见image_tag）
         """
         
         # 样图文件名：example1.jpg, example2.jpg, ...
         sample_filename = f"example{question_number}{sample_ext}"
+        sample_tag = self.image_tag(f"./static/{sample_filename}", "样图", image_size,
+                                    full_image and f"./static/{full_image}")
         
         body = f"""	<div class="container-fluid" style="margin: 10px;">
 		<!-- 题干区域 -->
@@ -395,21 +557,21 @@ class HTMLTemplate:
 		<!-- 图片区域 -->
 		<div class="row disable-selected" style="margin-top: 10px;">
 			<div class="col-md-6">
-				<img class="img-responsive center-block" src="./static/{sample_filename}" alt="样图">
+				{sample_tag}
 			</div>
 		</div>
 	</div>
 """
         
-        return (self.base_head.format(title="操作题") + body + 
-                self.base_foot.format(extra_script='', extra_ready=''))
+        return self.render_page("操作题", body, out=out)
     
-    def generate_custom_operation(self, question_text, custom_operation=''):
+    def generate_custom_operation(self, question_text, custom_operation='', out=None):
         """生成自定义操作题HTML
         
         Args:
             question_text: 题目要求文本
             custom_operation: 自定义操作说明（支持HTML）
+            out: 可选的二进制文件对象，提供时直接写入文件（见render_page）
         """
         
         body = f"""	<div class="container-fluid" style="margin: 10px;">
@@ -433,5 +595,4 @@ class HTMLTemplate:
 	</div>
 """
         
-        return (self.base_head.format(title="操作题") + body + 
-                self.base_foot.format(extra_script='', extra_ready=''))
+        return self.render_page("操作题", body, out=out)
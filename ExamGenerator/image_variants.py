@@ -0,0 +1,215 @@
+"""
+图片优化
+为题干图片和样图生成页面内显示的预览图和放大查看用的原图：超出尺寸的图片缩小，
+JPEG重新压缩，PNG无损优化；结果按源文件内容哈希缓存，图片不变时不会重新编码。
+读取图片尺寸（写入img标签的width/height）不依赖Pillow，未安装Pillow时图片原样复制
+"""
+
+import hashlib
+import io
+import json
+import os
+import struct
+import tempfile
+from pathlib import Path
+
+# PIL.Image模块：导入较慢，第一次需要时才导入（见pillow()）；未安装Pillow时为None
+_NOT_LOADED = object()
+Image = _NOT_LOADED
+
+
+def pillow():
+    """返回PIL.Image模块（第一次调用时导入），未安装Pillow时返回None"""
+    global Image
+    if Image is _NOT_LOADED:
+        try:
+            from PIL import Image as pil_image
+        except ImportError:  # Pillow为可选依赖
+            pil_image = None
+        Image = pil_image
+    return Image
+
+
+# 页面内预览图的最大宽度（px），原图宽度不超过此值时不生成预览图
+PREVIEW_WIDTH = 640
+# 放大查看用的原图最长边（px）
+FULL_SIZE = 1920
+# JPEG重新压缩的质量
+JPEG_QUALITY = 85
+# EXIF中的方向标记
+EXIF_ORIENTATION = 0x0112
+
+# 重新编码的格式（扩展名 -> Pillow格式），其他格式的图片原样复制
+FORMATS = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG'}
+
+
+def image_size(path):
+    """读取PNG、JPEG、GIF、BMP图片的像素尺寸 (宽, 高)，无法识别时返回None"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(32)
+            if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+                return struct.unpack('>II', head[16:24])
+            if head[:6] in (b'GIF87a', b'GIF89a'):
+                return struct.unpack('<HH', head[6:10])
+            if head[:2] == b'BM' and len(head) >= 26:
+                width, height = struct.unpack('<ii', head[18:26])
+                return width, abs(height)
+            if head[:2] == b'\xff\xd8':
+                return _jpeg_size(f)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def _jpeg_size(f):
+    """按段扫描JPEG，从SOF段读取尺寸"""
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        # 段之间可能有填充的0xFF
+        while marker[1] == 0xFF:
+            marker = marker[1:] + f.read(1)
+        code = marker[1]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        length = struct.unpack('>H', f.read(2))[0]
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack('>xHH', f.read(5))
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+class ImageVariant:
+    """一张图片的优化结果
+
+    preview 为页面内显示的图片文件，size 为其尺寸；
+    full 为放大查看用的原图文件（预览图已是原尺寸时为None）。
+    """
+
+    def __init__(self, preview, size, full=None):
+        self.preview = Path(preview)
+        self.size = tuple(size)
+        self.full = Path(full) if full else None
+
+
+class ImageOptimizer:
+    """图片优化器
+
+    缓存目录中每张源图片对应 <哈希>.json（尺寸信息）和 <哈希>-preview/-full 图片文件，
+    哈希包含优化参数，参数变化后重新生成。
+    """
+
+    def __init__(self, cache_dir=None):
+        """
+        Args:
+            cache_dir: 缓存目录，默认为系统临时目录下的 exam-image-cache
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else Path(tempfile.gettempdir()) / "exam-image-cache"
+
+    @staticmethod
+    def available():
+        """是否安装了Pillow"""
+        return pillow() is not None
+
+    @staticmethod
+    def settings():
+        """影响优化结果的参数（也用作构建清单中的输入）"""
+        return {'preview': PREVIEW_WIDTH, 'full': FULL_SIZE, 'quality': JPEG_QUALITY, 'exif_transpose': True}
+
+    def digest(self, path):
+        h = hashlib.sha256(json.dumps(self.settings(), sort_keys=True).encode('utf-8'))
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def optimize(self, path):
+        """返回图片的ImageVariant；格式不支持、未安装Pillow或图片无法解码时原样使用源文件"""
+        path = Path(path)
+        fmt = FORMATS.get(path.suffix.lower())
+        if fmt is None or pillow() is None:
+            return ImageVariant(path, image_size(path) or (0, 0))
+
+        digest = self.digest(path)
+        info_path = self.cache_dir / f"{digest}.json"
+        if info_path.is_file():
+            info = json.loads(info_path.read_text(encoding='utf-8'))
+            return self._variant(path, digest, info)
+
+        try:
+            info = self._encode(path, fmt, digest)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return ImageVariant(path, image_size(path) or (0, 0))
+        self._write_atomic(info_path, json.dumps(info).encode('utf-8'))
+        return self._variant(path, digest, info)
+
+    def _variant(self, path, digest, info):
+        suffix = path.suffix.lower()
+        preview = self.cache_dir / f"{digest}-preview{suffix}" if info['preview'] else path
+        full = None
+        if info['full'] is not None:
+            full = self.cache_dir / f"{digest}-full{suffix}" if info['full'] else path
+        return ImageVariant(preview, info['size'], full)
+
+    def _encode(self, path, fmt, digest):
+        """生成预览图和原图，返回缓存信息
+
+        info['preview'] / info['full']：True 表示使用缓存中重新编码的文件，
+        False 表示直接使用源文件；info['full'] 为None表示不需要单独的原图。
+        """
+        from PIL import ImageOps
+        with Image.open(path) as source:
+            source.load()
+            source_size = path.stat().st_size
+            suffix = path.suffix.lower()
+
+            # 按EXIF方向转正（手机照片常以旋转的像素保存）。重新编码不保留EXIF，
+            # 转正后的图片不能再用源文件代替
+            rotated = source.getexif().get(EXIF_ORIENTATION, 1) != 1
+            img = ImageOps.exif_transpose(source) if rotated else source
+
+            full = img
+            if max(img.size) > FULL_SIZE:
+                full = img.copy()
+                full.thumbnail((FULL_SIZE, FULL_SIZE), Image.LANCZOS)
+            full_data = self._save(full, fmt)
+            # 重新编码没有变小时直接使用源文件
+            use_full = full is not img or rotated or len(full_data) < source_size
+            smallest = len(full_data) if rotated else min(len(full_data), source_size)
+
+            preview_data = None
+            if img.width > PREVIEW_WIDTH:
+                preview = img.copy()
+                preview.thumbnail((PREVIEW_WIDTH, img.height * PREVIEW_WIDTH // img.width or 1), Image.LANCZOS)
+                preview_data = self._save(preview, fmt)
+            # 图片不宽，或缩小后反而更大（如颜色很少的截图），页面中直接显示原图
+            if preview_data is None or len(preview_data) >= smallest:
+                if use_full:
+                    self._write_atomic(self.cache_dir / f"{digest}-preview{suffix}", full_data)
+                return {'size': list(full.size), 'preview': use_full, 'full': None}
+
+            self._write_atomic(self.cache_dir / f"{digest}-preview{suffix}", preview_data)
+            if use_full:
+                self._write_atomic(self.cache_dir / f"{digest}-full{suffix}", full_data)
+            return {'size': list(preview.size), 'preview': True, 'full': use_full}
+
+    @staticmethod
+    def _save(img, fmt):
+        buf = io.BytesIO()
+        if fmt == 'JPEG':
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            img.save(buf, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        else:
+            img.save(buf, 'PNG', optimize=True)
+        return buf.getvalue()
+
+    def _write_atomic(self, path, data):
+        """先写临时文件再改名，并行生成的多份试卷不会读到写了一半的缓存"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
@@ -0,0 +1,125 @@
+"""
+选项乱序
+为每位考生按随机种子生成单选题选项和选择填空题备选项的排列。
+所有考生共用同一份题目页面，页面按宿主程序在地址中传入的排列（#shuffle=2,0,3,1）
+重排选项；排列表用一个字节数组保存，每位考生每道题只占选项数个字节
+"""
+
+import json
+import random
+import re
+from array import array
+
+
+# 排列表文件名（保存在输出目录中）
+MAP_NAME = "shuffle-map.bin"
+MAP_MAGIC = b"EXAM-SHUFFLE 1\n"
+
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# 选择填空题备选项的行格式：“A、内容”“B.内容”（与页面中的脚本一致）
+CHOICE_OPTION_RE = re.compile(r'^\s*([A-Z])[、.．]')
+
+
+def choice_option_letters(choice_options):
+    """解析选择填空题备选项中的选项字母"""
+    return [m.group(1) for m in map(CHOICE_OPTION_RE.match, choice_options.splitlines()) if m]
+
+
+def option_count(q):
+    """题目可乱序的选项数，不可乱序时返回0"""
+    if q.get('type') == 'single':
+        return 4
+    if q.get('type') == 'choice':
+        n = len(choice_option_letters(q.get('choice_options', '')))
+        return n if n >= 2 else 0
+    return 0
+
+
+class ShuffleMap:
+    """所有考生的选项排列表
+
+    slots 为可乱序的题目：[[题号(从1开始), 选项数], ...]。
+    data 为字节数组，每位考生一行，行内依次为各题的排列；
+    排列中第k个数是显示在第k个位置（显示为第k个字母）的原选项序号。
+    """
+
+    def __init__(self, slots, candidates, seed=0, data=None):
+        self.slots = [list(s) for s in slots]
+        self.candidates = candidates
+        self.seed = seed
+        # 题号 -> (行内偏移, 选项数)
+        self.offsets = {}
+        offset = 0
+        for number, n in self.slots:
+            self.offsets[number] = (offset, n)
+            offset += n
+        self.row_size = offset
+        self.data = data if data is not None else array('B')
+
+    @classmethod
+    def generate(cls, questions, candidates, seed=0):
+        """为candidates位考生生成排列（每位考生的随机数由种子和考生序号决定）"""
+        slots = [[i, n] for i, n in enumerate(map(option_count, questions), 1) if n]
+        shuffle_map = cls(slots, candidates, seed)
+        data = shuffle_map.data
+        for candidate in range(candidates):
+            rng = random.Random(f"{seed}:{candidate}")
+            for _, n in slots:
+                order = list(range(n))
+                rng.shuffle(order)
+                data.extend(order)
+        return shuffle_map
+
+    def order(self, candidate, number):
+        """考生在第number题看到的选项顺序（原选项序号列表），该题不乱序时返回None"""
+        if number not in self.offsets:
+            return None
+        if not 0 <= candidate < self.candidates:
+            raise IndexError(f"考生序号超出范围：{candidate}")
+        offset, n = self.offsets[number]
+        start = candidate * self.row_size + offset
+        return list(self.data[start:start + n])
+
+    def to_original(self, candidate, number, letter):
+        """考生看到的选项字母 -> 原选项字母"""
+        order = self.order(candidate, number)
+        if order is None:
+            return letter
+        return LETTERS[order[LETTERS.index(letter)]]
+
+    def to_display(self, candidate, number, letter):
+        """原选项字母 -> 考生看到的选项字母"""
+        order = self.order(candidate, number)
+        if order is None:
+            return letter
+        return LETTERS[order.index(LETTERS.index(letter))]
+
+    def fragment(self, candidate, number):
+        """宿主程序打开题目页面时附加的地址片段（如 shuffle=2,0,3,1），该题不乱序时返回空串"""
+        order = self.order(candidate, number)
+        if order is None:
+            return ''
+        return 'shuffle=' + ','.join(map(str, order))
+
+    def to_bytes(self):
+        header = json.dumps({'seed': self.seed, 'candidates': self.candidates, 'slots': self.slots})
+        return MAP_MAGIC + header.encode('utf-8') + b'\n' + self.data.tobytes()
+
+    @classmethod
+    def from_bytes(cls, raw):
+        if not raw.startswith(MAP_MAGIC):
+            raise ValueError("不是选项排列表文件")
+        header, _, body = raw[len(MAP_MAGIC):].partition(b'\n')
+        info = json.loads(header)
+        data = array('B')
+        data.frombytes(body)
+        shuffle_map = cls(info['slots'], info['candidates'], info['seed'], data)
+        if len(data) != shuffle_map.row_size * shuffle_map.candidates:
+            raise ValueError("选项排列表文件不完整")
+        return shuffle_map
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
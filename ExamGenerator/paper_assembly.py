@@ -0,0 +1,261 @@
+"""
+随机组卷
+按组卷规则从题库中抽取多套试卷：每套满足各分组的题目数量、总分、难度和知识点要求，
+任意两套之间相同的题目不超过指定数量；给定随机种子时结果完全确定
+"""
+
+import random
+from pathlib import Path
+from question_bank import question_tags
+
+
+# 题目中引用文件的字段（输出的项目与题库不在同一目录时需要改为绝对路径）
+PATH_FIELDS = ('question_image', 'material_folder', 'sample_image', 'open_file', 'prog_template')
+
+# 每次抽题时随机尝试的次数，都不合适时再按顺序扫描全部候选题
+RANDOM_TRIES = 64
+# 每道题允许的调整（换题）次数，超过后重新抽取该分组
+REPAIR_STEPS = 200
+# 每个分组最多重新抽取的次数
+GROUP_ATTEMPTS = 5
+# 判断总分相等时允许的误差
+EPSILON = 1e-6
+
+
+class AssemblyError(Exception):
+    """组卷规则无法满足"""
+
+
+def question_matches(q, rule):
+    """题目是否符合分组规则中的抽题范围（题型、题库分组、标签）"""
+    if rule.get('type') and q.get('type') != rule['type']:
+        return False
+    if rule.get('group') and q.get('group') != rule['group']:
+        return False
+    if rule.get('tag') and rule['tag'] not in question_tags(q):
+        return False
+    return True
+
+
+def absolute_paths(q, base_dir):
+    """返回题目副本，其中引用文件的相对路径改为以base_dir为准的绝对路径"""
+    q = dict(q)
+    for field in PATH_FIELDS:
+        value = (q.get(field) or '').strip()
+        if value and not Path(value).is_absolute():
+            q[field] = str((Path(base_dir) / value).resolve())
+    return q
+
+
+class PaperAssembler:
+    """组卷引擎
+
+    组卷规则（spec）格式：
+        {
+            "tips": "考试说明",
+            "max_overlap": 2,            # 任意两套试卷最多相同的题目数（省略则不限制，但各套仍互不相同）
+            "groups": [
+                {
+                    "name": "一、C语言程序设计单选题",   # 写入groups-info.dat的分组名
+                    "count": 5,                         # 题目数量
+                    "type": "single", "group": "C语言", "tag": "2023",   # 抽题范围（均可省略）
+                    "score": 50,                        # 该组总分（按题目的score字段计算，可省略）
+                    "difficulty": [0.4, 0.6],           # 平均难度范围（按题目的difficulty字段计算，可省略）
+                    "topics": {"指针": 1, "数组": 1}    # 每个知识点（标签）至少的题目数（可省略）
+                }
+            ]
+        }
+
+    先按知识点要求和数量随机抽题，再随机换题直到总分和难度符合要求。
+    抽取每套试卷时记录每道题已被哪些试卷使用，抽到的题目会使与某套已有试卷
+    相同的题目超过max_overlap时跳过该题。
+    """
+
+    def __init__(self, questions, spec, seed=0):
+        """
+        Args:
+            questions: 题库中的题目列表（顺序即试卷中同组题目的顺序）
+            spec: 组卷规则
+            seed: 随机种子，相同的题库、规则和种子总是得到相同的结果
+        """
+        self.questions = questions
+        self.spec = spec
+        self.groups = spec.get('groups', [])
+        if not self.groups:
+            raise AssemblyError("组卷规则中没有分组")
+        self.max_overlap = spec.get('max_overlap')
+        self.rng = random.Random(seed)
+
+        # 预先提取每道题的分值、难度和标签，组卷过程中不再访问题目字典
+        self.scores = [float(q.get('score') or 0) for q in questions]
+        self.difficulty = [None if q.get('difficulty') in (None, '') else float(q['difficulty'])
+                           for q in questions]
+        self.tags = [frozenset(question_tags(q)) for q in questions]
+
+        # 每个分组的候选题（题库中的序号）以及各知识点的候选题
+        self.pools = []
+        self.topic_pools = []
+        for rule in self.groups:
+            count = int(rule['count'])
+            pool = [i for i, q in enumerate(questions) if question_matches(q, rule)]
+            if len(pool) < count:
+                raise AssemblyError(f"分组“{rule['name']}”需要{count}题，题库中只有{len(pool)}道符合条件的题目")
+            topics = {topic: [i for i in pool if topic in self.tags[i]]
+                      for topic in rule.get('topics', {})}
+            for topic, need in rule.get('topics', {}).items():
+                if len(topics[topic]) < need:
+                    raise AssemblyError(f"分组“{rule['name']}”需要{need}道“{topic}”题目，"
+                                        f"题库中只有{len(topics[topic])}道")
+            self.pools.append(pool)
+            self.topic_pools.append(topics)
+
+        # 每道题已被哪些试卷使用
+        self.used_by = {}
+        self.variants = []
+        self.seen = set()
+
+    def assemble(self, n):
+        """抽取n套试卷，返回每套试卷的题目序号列表"""
+        for _ in range(n):
+            self.variants.append(self.assemble_one())
+        return self.variants[-n:] if n else []
+
+    def assemble_one(self):
+        """抽取一套试卷"""
+        number = len(self.variants)
+        for _ in range(GROUP_ATTEMPTS):
+            # 与每套已有试卷相同的题目数
+            self.shared = {}
+            self.chosen = set()
+            paper = []
+            for gi in range(len(self.groups)):
+                paper.append(self.assemble_group(gi, number))
+            # 各套试卷的题目不能完全相同
+            key = frozenset(self.chosen)
+            if key not in self.seen:
+                break
+        else:
+            raise AssemblyError(f"第{number + 1}套试卷无法与已有试卷区分，请扩大题库或减少套数")
+        self.seen.add(key)
+        for i in self.chosen:
+            self.used_by.setdefault(i, []).append(number)
+        return paper
+
+    def assemble_group(self, gi, number):
+        """为一个分组抽题，返回按题库顺序排列的题目序号"""
+        rule = self.groups[gi]
+        for _ in range(GROUP_ATTEMPTS):
+            selected = []
+            for topic, need in rule.get('topics', {}).items():
+                have = sum(topic in self.tags[i] for i in selected)
+                for _ in range(need - have):
+                    selected.append(self.draw(self.topic_pools[gi][topic], rule))
+            while len(selected) < int(rule['count']):
+                selected.append(self.draw(self.pools[gi], rule))
+
+            if self.repair(gi, selected):
+                return sorted(selected)
+            for i in selected:
+                self.release(i)
+        raise AssemblyError(f"第{number + 1}套试卷的分组“{rule['name']}”无法满足总分、难度或知识点要求")
+
+    def draw(self, candidates, rule):
+        """从候选题中随机抽取一道可用的题并占用，没有可用的题时抛出AssemblyError"""
+        rng = self.rng
+        for _ in range(RANDOM_TRIES):
+            i = candidates[rng.randrange(len(candidates))]
+            if self.available(i):
+                self.take(i)
+                return i
+        # 随机尝试都失败时从随机位置开始顺序扫描
+        start = rng.randrange(len(candidates))
+        for k in range(len(candidates)):
+            i = candidates[(start + k) % len(candidates)]
+            if self.available(i):
+                self.take(i)
+                return i
+        raise AssemblyError(f"分组“{rule['name']}”的候选题不足，无法满足与已有试卷的重复题目限制")
+
+    def available(self, i):
+        """题目未被本套试卷选中，且选中后不会与已有试卷重复过多"""
+        if i in self.chosen:
+            return False
+        if self.max_overlap is None:
+            return True
+        return all(self.shared.get(v, 0) < self.max_overlap for v in self.used_by.get(i, ()))
+
+    def take(self, i):
+        self.chosen.add(i)
+        for v in self.used_by.get(i, ()):
+            self.shared[v] = self.shared.get(v, 0) + 1
+
+    def release(self, i):
+        self.chosen.discard(i)
+        for v in self.used_by.get(i, ()):
+            self.shared[v] -= 1
+
+    def cost(self, rule, selected):
+        """分组不满足要求的程度，0表示全部满足"""
+        cost = 0.0
+        if rule.get('score') is not None:
+            target = float(rule['score'])
+            diff = abs(sum(self.scores[i] for i in selected) - target)
+            if diff > EPSILON:
+                cost += diff / max(target, 1.0)
+        if rule.get('difficulty'):
+            low, high = rule['difficulty']
+            values = [self.difficulty[i] for i in selected if self.difficulty[i] is not None]
+            if values:
+                avg = sum(values) / len(values)
+                cost += max(0.0, low - avg, avg - high)
+        for topic, need in rule.get('topics', {}).items():
+            cost += max(0, need - sum(topic in self.tags[i] for i in selected))
+        return cost
+
+    def repair(self, gi, selected):
+        """随机换题直到分组满足要求，成功返回True"""
+        rule = self.groups[gi]
+        pool = self.pools[gi]
+        cost = self.cost(rule, selected)
+        for _ in range(REPAIR_STEPS * len(selected)):
+            if cost == 0:
+                return True
+            pos = self.rng.randrange(len(selected))
+            try:
+                new = self.draw(pool, rule)
+            except AssemblyError:
+                return False
+            old = selected[pos]
+            selected[pos] = new
+            new_cost = self.cost(rule, selected)
+            if new_cost <= cost:
+                self.release(old)
+                cost = new_cost
+            else:
+                selected[pos] = old
+                self.release(new)
+        return cost == 0
+
+    def project(self, paper, base_dir=None):
+        """将一套试卷转换为可直接生成的项目数据
+
+        Args:
+            base_dir: 题库中相对路径的基准目录，指定时改为绝对路径
+        """
+        questions = []
+        for gi, indexes in enumerate(paper):
+            for i in indexes:
+                q = self.questions[i]
+                questions.append(absolute_paths(q, base_dir) if base_dir else dict(q))
+        return {
+            'questions': questions,
+            'groups': [{'name': rule['name'], 'count': str(len(indexes))}
+                       for rule, indexes in zip(self.groups, paper)],
+            'tips': self.spec.get('tips', '')
+        }
+
+
+def assemble_projects(questions, spec, n, seed=0, base_dir=None):
+    """按组卷规则抽取n套试卷，返回项目数据列表"""
+    assembler = PaperAssembler(questions, spec, seed)
+    return [assembler.project(paper, base_dir) for paper in assembler.assemble(n)]
@@ -0,0 +1,383 @@
+"""
+C语言编程题评分
+从考生提交的prog.c中取出Program与End标记之间的代码，放回题目原始的prog.c后用gcc编译，
+再逐个运行题目的测试用例（标准输入和期望输出）。编译和运行在进程池中并行进行，
+每次运行都限制CPU时间、内存和输出大小；编译结果按源代码哈希缓存，相同的提交只编译和运行一次
+"""
+
+import hashlib
+import math
+import os
+import re
+import signal
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows没有resource模块，只能限制运行时间
+    resource = None
+
+
+# 编程区域的起止标记行（见 templates/prog.c），区域内的其他注释行原样保留
+PROGRAM_MARKER = re.compile(r'^\s*/\*+\s*Program\s*\*+/\s*$')
+END_MARKER = re.compile(r'^\s*/\*+\s*End\s*\*+/\s*$')
+
+# 题目未提供prog.c时使用的模板
+DEFAULT_TEMPLATE = Path(__file__).parent / "templates" / "prog.c"
+
+# 编译器和参数：考试使用的C教材多为老式写法（main() 不写返回类型），
+# -fpermissive 让新版gcc把隐式int等错误降为警告，-w 不输出警告
+CC = 'gcc'
+CFLAGS = ['-std=gnu99', '-fpermissive', '-w', '-O2']
+LIBS = ['-lm']
+COMPILE_TIMEOUT = 30
+
+# 默认的运行限制：CPU时间（秒）、内存（MB）、输出（KB）
+TIME_LIMIT = 2
+MEMORY_LIMIT = 256
+OUTPUT_LIMIT = 1024
+
+# 测试用例的运行结果
+PASSED = 'passed'
+WRONG_ANSWER = 'wrong'
+TIMEOUT = 'timeout'
+OUTPUT_EXCEEDED = 'output'
+RUNTIME_ERROR = 'error'
+
+# 提交的状态
+COMPILED = 'compiled'
+COMPILE_ERROR = 'compile_error'
+MISSING = 'missing'
+NO_REGION = 'no_region'
+
+
+def decode_source(raw):
+    """解码源文件：先按UTF-8，失败时按GBK（考场机器上的记事本和VC默认编码）"""
+    try:
+        return raw.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return raw.decode('gbk', errors='replace')
+
+
+def find_region(lines):
+    """编程区域标记行的位置 (Program行, End行)，没有完整的标记时返回None"""
+    start = next((i for i, line in enumerate(lines) if PROGRAM_MARKER.match(line)), None)
+    if start is None:
+        return None
+    end = next((i for i in range(start + 1, len(lines)) if END_MARKER.match(lines[i])), None)
+    return None if end is None else (start, end)
+
+
+def extract_program(source):
+    """取出编程区域内的代码，没有标记时返回None"""
+    lines = source.splitlines()
+    region = find_region(lines)
+    if region is None:
+        return None
+    start, end = region
+    return '\n'.join(lines[start + 1:end])
+
+
+def splice_program(template, code):
+    """把考生代码放回模板的编程区域；模板没有标记时直接使用考生代码"""
+    lines = template.splitlines()
+    region = find_region(lines)
+    if region is None:
+        return code
+    start, end = region
+    return '\n'.join(lines[:start + 1] + code.splitlines() + lines[end:]) + '\n'
+
+
+def template_source(q, base_dir=None):
+    """题目发给考生的原始prog.c：要打开的.c文件、素材文件夹中的prog.c、程序模板，都没有时为默认模板"""
+    base = Path(base_dir) if base_dir else Path.cwd()
+    candidates = []
+    if (q.get('open_file') or '').strip().lower().endswith('.c'):
+        candidates.append(q['open_file'].strip())
+    if (q.get('material_folder') or '').strip():
+        candidates.append(str(Path(q['material_folder'].strip()) / "prog.c"))
+    if (q.get('prog_template') or '').strip():
+        candidates.append(q['prog_template'].strip())
+    for value in candidates:
+        path = Path(value) if Path(value).is_absolute() else base / value
+        if path.is_file():
+            return decode_source(path.read_bytes())
+    return decode_source(DEFAULT_TEMPLATE.read_bytes())
+
+
+def normalize_output(text):
+    """比较输出时忽略行尾空白、换行符差异和末尾空行"""
+    lines = [line.rstrip() for line in text.replace('\r\n', '\n').split('\n')]
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def is_program_question(q):
+    """是否为需要评分的C语言编程题（C语言模板的操作题且设置了测试用例）"""
+    return (q.get('type') == 'file' and q.get('operation_template', 'c') == 'c'
+            and bool(q.get('tests')))
+
+
+class BinaryCache:
+    """编译结果缓存
+
+    按 <哈希前两位>/<哈希> 保存可执行文件，编译失败时保存 <哈希>.err（编译器的错误信息），
+    相同的源代码（以及编译器和参数）不会重复编译。
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    @staticmethod
+    def digest(source):
+        """源代码的缓存键（包含编译参数，参数变化后不会误用旧的结果）"""
+        h = hashlib.sha256()
+        h.update(' '.join([CC] + CFLAGS + LIBS).encode('utf-8') + b'\0')
+        h.update(source.encode('utf-8'))
+        return h.hexdigest()
+
+    def binary_path(self, digest):
+        suffix = '.exe' if os.name == 'nt' else ''
+        return self.root / digest[:2] / (digest + suffix)
+
+    def error_path(self, digest):
+        return self.root / digest[:2] / (digest + '.err')
+
+    def lookup(self, digest):
+        """返回 (是否编译成功, 错误信息)，没有缓存时返回None"""
+        if self.binary_path(digest).is_file():
+            return True, ''
+        error = self.error_path(digest)
+        if error.is_file():
+            return False, error.read_text(encoding='utf-8', errors='replace')
+        return None
+
+
+def run_limits(number, q):
+    """题目的运行限制 (时间秒数, 内存MB)，可以是小数；无效时报告题号"""
+    limits = []
+    for key, name, default in (('time_limit', "运行时间限制", TIME_LIMIT), ('memory_limit', "内存限制", MEMORY_LIMIT)):
+        value = q.get(key)
+        if value in (None, ''):
+            limits.append(default)
+            continue
+        try:
+            limit = float(value)
+        except (TypeError, ValueError):
+            limit = None
+        if limit is None or not math.isfinite(limit) or limit <= 0:
+            raise ValueError(f"第{number}题的{name}无效：{value}")
+        limits.append(limit)
+    return tuple(limits)
+
+
+def _limit_resources(time_limit, memory_limit, output_limit):
+    """在子进程exec之前调用：限制CPU时间、地址空间、写入文件大小，禁止创建子进程和core文件"""
+    cpu = math.ceil(time_limit)
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (int(memory_limit * 1024 * 1024),) * 2)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (output_limit * 1024,) * 2)
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    if hasattr(resource, 'RLIMIT_NPROC'):
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+def compile_source(cache_root, digest, source):
+    """编译一份源代码并放入缓存（在进程池中调用），返回 (哈希, 是否成功, 错误信息)"""
+    cache = BinaryCache(cache_root)
+    cached = cache.lookup(digest)
+    if cached is not None:
+        return (digest,) + cached
+    binary = cache.binary_path(digest)
+    binary.parent.mkdir(parents=True, exist_ok=True)
+    # 先写入临时文件再改名，其他评分进程不会读到写了一半的文件
+    tmp = binary.with_name(f"{binary.name}.{os.getpid()}.tmp")
+    with tempfile.TemporaryDirectory(prefix="prog-") as work:
+        src = Path(work) / "prog.c"
+        src.write_text(source, encoding='utf-8')
+        try:
+            proc = subprocess.run([CC] + CFLAGS + ['-o', str(tmp), str(src)] + LIBS, cwd=work,
+                                  stdin=subprocess.DEVNULL, capture_output=True, timeout=COMPILE_TIMEOUT)
+            ok = proc.returncode == 0 and tmp.is_file()
+            message = proc.stderr.decode('utf-8', errors='replace').replace(str(src), 'prog.c')
+        except subprocess.TimeoutExpired:
+            ok, message = False, "编译超时"
+    if ok:
+        os.replace(tmp, binary)
+    else:
+        tmp.unlink(missing_ok=True)
+        tmp.write_text(message, encoding='utf-8')
+        os.replace(tmp, cache.error_path(digest))
+    return digest, ok, message
+
+
+def run_test(binary, stdin, time_limit=TIME_LIMIT, memory_limit=MEMORY_LIMIT, output_limit=OUTPUT_LIMIT):
+    """在空的临时目录中运行程序（在进程池中调用），返回 (运行结果, 标准输出)
+
+    标准输入输出都使用文件，输出超过output_limit时程序被系统终止。
+    Windows上只能限制运行时间。
+    """
+    with tempfile.TemporaryDirectory(prefix="run-") as work:
+        input_path = Path(work) / "input.txt"
+        output_path = Path(work) / "output.txt"
+        input_path.write_text(stdin or '', encoding='utf-8')
+        options = {}
+        if resource is not None:
+            options['preexec_fn'] = lambda: _limit_resources(time_limit, memory_limit, output_limit)
+            options['start_new_session'] = True
+        with open(input_path, 'rb') as fin, open(output_path, 'wb') as fout:
+            proc = subprocess.Popen([str(binary)], cwd=work, stdin=fin, stdout=fout,
+                                    stderr=subprocess.DEVNULL, env={}, **options)
+            try:
+                # CPU时间由RLIMIT_CPU限制；等待（sleep、读输入）按墙钟时间另外限制
+                returncode = proc.wait(timeout=time_limit * 2 + 1)
+            except subprocess.TimeoutExpired:
+                if resource is not None:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                else:
+                    proc.kill()
+                proc.wait()
+                returncode = None
+        output = output_path.read_bytes()[:output_limit * 1024].decode('utf-8', errors='replace')
+
+    if returncode is None or returncode == -getattr(signal, 'SIGXCPU', 0):
+        return TIMEOUT, output
+    if returncode == -getattr(signal, 'SIGXFSZ', 0):
+        return OUTPUT_EXCEEDED, output
+    if returncode < 0:
+        return RUNTIME_ERROR, output
+    # 老式的 main() 没有return语句，退出码不确定，不作为运行错误
+    return PASSED, output
+
+
+class ProgramGrader:
+    """C语言编程题评分
+
+    题目中的测试用例格式：
+        "tests": [{"input": "3 4\\n", "output": "7\\n", "score": 5}, ...]
+    score省略时由题目的score（默认每个用例1分）平均分配；
+    题目中的 time_limit（秒）和 memory_limit（MB）可覆盖默认的运行限制，可以是小数。
+    """
+
+    def __init__(self, questions, base_dir=None, cache_dir=None, workers=None):
+        """
+        Args:
+            questions: 项目中的题目列表（题号为列表中的序号，从1开始）
+            base_dir: 题目中相对路径的基准目录
+            cache_dir: 编译结果缓存目录，默认为系统临时目录下的 exam-prog-cache
+            workers: 并行的进程数，默认为CPU核数
+        """
+        self.questions = [(i, q) for i, q in enumerate(questions, 1) if is_program_question(q)]
+        self.templates = {i: template_source(q, base_dir) for i, q in self.questions}
+        # 在评分前检查，无效的限制不会在评分中途中断全部考生的评分
+        self.limits = {i: run_limits(i, q) for i, q in self.questions}
+        self.cache = BinaryCache(cache_dir or Path(tempfile.gettempdir()) / "exam-prog-cache")
+        self.workers = workers or os.cpu_count() or 1
+
+    @property
+    def numbers(self):
+        return [i for i, _ in self.questions]
+
+    @staticmethod
+    def test_scores(q):
+        """题目各测试用例的分值"""
+        tests = q['tests']
+        total = float(q.get('score') or len(tests))
+        default = total / len(tests)
+        return [float(t['score']) if t.get('score') not in (None, '') else default for t in tests]
+
+    def source_for(self, number, submission):
+        """考生提交的prog.c内容 -> 要编译的源代码，没有编程区域时返回None"""
+        code = extract_program(submission)
+        if code is None:
+            return None
+        return splice_program(self.templates[number], code)
+
+    def grade(self, submissions):
+        """为全部考生评分
+
+        Args:
+            submissions: {考生: {题号: prog.c的内容（未提交为None）}}
+        Returns:
+            {考生: {题号: {'status', 'score', 'tests': [各用例结果], 'message'}}}
+        """
+        questions = dict(self.questions)
+        sources = {}
+        for candidate, files in submissions.items():
+            for number in questions:
+                text = files.get(number)
+                if text is not None:
+                    source = self.source_for(number, text)
+                    sources[candidate, number] = (self.cache.digest(source), source) if source else None
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            # 相同的源代码只编译一次
+            unique = {digest: source for digest, source in filter(None, sources.values())}
+            compiled = {digest: (ok, message) for digest, ok, message in executor.map(
+                compile_source, [str(self.cache.root)] * len(unique), list(unique), list(unique.values()))}
+
+            # 相同的程序和测试用例只运行一次
+            futures = {}
+            for (candidate, number), value in sources.items():
+                if value is None or not compiled[value[0]][0]:
+                    continue
+                q = questions[number]
+                for t in range(len(q['tests'])):
+                    if (value[0], number, t) in futures:
+                        continue
+                    futures[value[0], number, t] = executor.submit(
+                        run_test, self.cache.binary_path(value[0]), q['tests'][t].get('input', ''),
+                        *self.limits[number])
+            outcomes = {key: future.result() for key, future in futures.items()}
+
+        results = {}
+        for candidate in submissions:
+            results[candidate] = {}
+            for number, q in self.questions:
+                scores = self.test_scores(q)
+                entry = {'status': COMPILED, 'score': 0.0, 'tests': [], 'message': ''}
+                if (candidate, number) not in sources:
+                    entry['status'] = MISSING
+                elif sources[candidate, number] is None:
+                    entry['status'] = NO_REGION
+                else:
+                    digest = sources[candidate, number][0]
+                    ok, message = compiled[digest]
+                    if not ok:
+                        entry.update(status=COMPILE_ERROR, message=message)
+                    else:
+                        for t, test in enumerate(q['tests']):
+                            status, output = outcomes[digest, number, t]
+                            if status == PASSED and normalize_output(output) != normalize_output(test.get('output', '')):
+                                status = WRONG_ANSWER
+                            entry['tests'].append(status)
+                            if status == PASSED:
+                                entry['score'] += scores[t]
+                results[candidate][number] = entry
+        return results
+
+
+def load_submissions(root, questions):
+    """读取考生提交目录：root/考生/题号文件夹/prog.c（文件名同题目要打开的.c文件）
+
+    Returns:
+        {考生: {题号: 源文件内容（未提交为None）}}，考生按目录名排序
+    """
+    root = Path(root)
+    names = {}
+    for i, q in enumerate(questions, 1):
+        if is_program_question(q):
+            open_file = (q.get('open_file') or '').strip()
+            names[i] = Path(open_file).name if open_file.lower().endswith('.c') else "prog.c"
+    submissions = {}
+    for folder in sorted(p for p in root.iterdir() if p.is_dir()):
+        files = {}
+        for number, name in names.items():
+            path = folder / f"{number:02d}" / name
+            files[number] = decode_source(path.read_bytes()) if path.is_file() else None
+        submissions[folder.name] = files
+    return submissions
@@ -0,0 +1,122 @@
+"""
+二进制项目格式（.examb）
+与项目JSON内容相同的紧凑格式：题目按题型分表、按字段分列保存，每列是一个紧凑的JSON数组，
+读取时每列只解析一次，再直接填入题目记录（question_model）的槽中，
+不再为每道题解析、保存一遍重复的键名。
+
+文件结构：
+    MAGIC | 头部长度(4字节) | 头部JSON | 各表的数据
+头部记录题目总数、项目的其他数据（分组、考试说明等）和各表的题型、行数及各段数据的长度；
+每个表依次为：各行在题目列表中的位置（uint32数组）、各字段列（未设置为null）、extra列。
+"""
+
+import json
+import struct
+import sys
+from array import array
+from question_model import QUESTION_TYPES, Question
+
+
+BINARY_SUFFIX = '.examb'
+MAGIC = b'EXAMB\x01\n'
+_HEADER_SIZE = struct.Struct('<I')
+
+
+def _dump(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def encode_project(project):
+    """项目数据（题目为字典或记录）-> 二进制内容"""
+    questions = [q if isinstance(q, Question) else Question.from_dict(q)
+                 for q in project.get('questions', [])]
+
+    # 按记录类分表，同一表中的题目字段相同
+    tables = {}
+    for position, q in enumerate(questions):
+        tables.setdefault((type(q), q.type), []).append(position)
+
+    header_tables = []
+    chunks = []
+    for (record_class, qtype), positions in tables.items():
+        rows = [questions[p] for p in positions]
+        slots = [field for field in record_class.FIELDS] + list(getattr(record_class, 'OPTION_SLOTS', ()))
+        parts = [array('I', positions).tobytes()]
+        columns = []
+        for slot in slots:
+            column = [getattr(q, slot, None) for q in rows]
+            # 所有题目都没有的字段不写入
+            if any(value is not None for value in column):
+                columns.append(slot)
+                parts.append(_dump(column))
+        extras = [getattr(q, 'extra', None) for q in rows]
+        parts.append(_dump(extras if any(extras) else []))
+        header_tables.append({'type': qtype, 'rows': len(rows), 'columns': columns,
+                              'sizes': [len(part) for part in parts]})
+        chunks.extend(parts)
+
+    header = {
+        'count': len(questions),
+        'project': {key: value for key, value in project.items() if key != 'questions'},
+        'tables': header_tables,
+    }
+    header_bytes = _dump(header)
+    return b''.join([MAGIC, _HEADER_SIZE.pack(len(header_bytes)), header_bytes] + chunks)
+
+
+def decode_project(data):
+    """二进制内容 -> 项目数据（题目为question_model中的记录）"""
+    if not data.startswith(MAGIC):
+        raise ValueError("不是二进制项目文件（.examb）或版本不受支持")
+    offset = len(MAGIC)
+    (size,) = _HEADER_SIZE.unpack_from(data, offset)
+    offset += _HEADER_SIZE.size
+    header = json.loads(data[offset:offset + size])
+    offset += size
+
+    view = memoryview(data)
+    questions = [None] * header['count']
+    for table in header['tables']:
+        qtype = sys.intern(table['type']) if isinstance(table['type'], str) else table['type']
+        record_class = QUESTION_TYPES.get(qtype, Question)
+        sizes = iter(table['sizes'])
+        end = offset + next(sizes)
+        positions = array('I')
+        positions.frombytes(view[offset:end])
+        offset = end
+
+        new = record_class.__new__
+        rows = [new(record_class) for _ in range(table['rows'])]
+        for q in rows:
+            q.type = qtype
+        for slot in table['columns']:
+            end = offset + next(sizes)
+            setter = getattr(record_class, slot).__set__
+            for q, value in zip(rows, json.loads(view[offset:end].tobytes())):
+                if value is not None:
+                    setter(q, value)
+            offset = end
+        end = offset + next(sizes)
+        for q, extra in zip(rows, json.loads(view[offset:end].tobytes())):
+            if extra:
+                q.extra = extra
+        offset = end
+
+        for position, q in zip(positions, rows):
+            questions[position] = q
+
+    project = dict(header['project'])
+    project['questions'] = questions
+    return project
+
+
+def save_binary(project, file):
+    """将项目保存为二进制项目文件"""
+    with open(file, 'wb') as f:
+        f.write(encode_project(project))
+
+
+def load_binary(file):
+    """读取二进制项目文件，题目为记录（可按字典的方式读取）"""
+    with open(file, 'rb') as f:
+        return decode_project(f.read())
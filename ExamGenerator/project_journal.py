@@ -0,0 +1,204 @@
+"""
+项目编辑日志（自动保存）
+编辑项目JSON时，每次添加、修改、删除、移动题目或修改设置都作为一行紧凑的JSON记录
+追加到项目文件旁的 <项目文件>.journal 中，写入后立即落盘，保存的开销与题目数量无关；
+程序崩溃时最多丢失最后一次编辑。日志积累到一定数量后在后台线程中合并进项目文件（快照）。
+
+快照中的 "journal" 项记录已合并的最后一条记录序号和各题在题库中的id，
+加载时只重放序号更大的记录，合并中途中断也不会重复或丢失编辑。
+快照和日志中的每条记录都带有同一个随机标记（token），项目文件被其他方式整体改写后，
+旁边遗留的旧日志与新快照的标记不同，加载时被忽略。
+"""
+
+import json
+import os
+import secrets
+import threading
+from pathlib import Path
+
+
+JOURNAL_SUFFIX = '.journal'
+# 日志中的记录数达到此值时在后台合并进快照
+COMPACT_RECORDS = 500
+
+
+def journal_path(project_file):
+    """项目文件对应的编辑日志路径"""
+    return Path(f"{os.fspath(project_file)}{JOURNAL_SUFFIX}")
+
+
+def new_token():
+    """新快照的日志标记"""
+    return secrets.token_hex(8)
+
+
+def read_journal(path, after=0, upto=None, token=None):
+    """读取日志中标记为token、序号在 (after, upto] 内的记录
+
+    最后一行不完整（写入时程序崩溃）时忽略该行。
+    """
+    records = []
+    try:
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record.get('token') != token:
+                    continue
+                if record['seq'] > after and (upto is None or record['seq'] <= upto):
+                    records.append(record)
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def apply_record(project, ids, record):
+    """把一条编辑记录应用到项目数据上，ids为各题的id（与project['questions']一一对应）"""
+    op = record['op']
+    questions = project.setdefault('questions', [])
+    if op == 'add':
+        questions.extend(record['questions'])
+        ids.extend(record['ids'])
+    elif op == 'update':
+        questions[ids.index(record['id'])] = record['question']
+    elif op == 'delete':
+        index = ids.index(record['id'])
+        del questions[index]
+        del ids[index]
+    elif op == 'swap':
+        a, b = ids.index(record['a']), ids.index(record['b'])
+        questions[a], questions[b] = questions[b], questions[a]
+        ids[a], ids[b] = ids[b], ids[a]
+    elif op == 'clear':
+        questions.clear()
+        ids.clear()
+    elif op == 'meta':
+        project[record['key']] = record['value']
+    else:
+        raise ValueError(f"未知的编辑记录：{op}")
+
+
+def load_project(project_file, upto=None):
+    """读取项目快照并重放编辑日志
+
+    Returns:
+        (项目数据, 各题id, 最后一条记录的序号, 日志标记)；
+        快照没有日志标记（旧版本或其他方式保存的项目JSON）时标记为None
+    """
+    with open(project_file, 'r', encoding='utf-8') as f:
+        project = json.load(f)
+    info = project.pop('journal', None) or {}
+    seq = info.get('seq', 0)
+    token = info.get('token')
+    ids = list(info.get('ids') or range(1, len(project.get('questions', [])) + 1))
+    for record in read_journal(journal_path(project_file), seq, upto, token):
+        apply_record(project, ids, record)
+        seq = record['seq']
+    return project, ids, seq, token
+
+
+def write_snapshot(project_file, project, ids, seq, token):
+    """写入项目快照（先写临时文件再改名，中途崩溃不会损坏原文件）"""
+    snapshot = dict(project)
+    snapshot['journal'] = {'seq': seq, 'ids': ids, 'token': token}
+    tmp = Path(f"{os.fspath(project_file)}.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=2, default=dict)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, project_file)
+
+
+class ProjectJournal:
+    """项目文件的编辑日志
+
+    record()在界面线程中调用；合并在后台线程中进行，只读写文件，不访问题库。
+    """
+
+    def __init__(self, project_file, seq, token, compact_records=COMPACT_RECORDS):
+        """
+        Args:
+            project_file: 项目JSON文件（快照）
+            seq: 已有的最后一条记录的序号（见load_project）
+            token: 快照的日志标记（见load_project）
+            compact_records: 日志中的记录数达到此值时在后台合并
+        """
+        self.project_file = Path(project_file)
+        self.path = journal_path(project_file)
+        self.seq = seq
+        self.token = token
+        self.compact_records = compact_records
+        self.lock = threading.Lock()
+        self.file = open(self.path, 'ab')
+        self.truncate_partial_record()
+        self.records = len(read_journal(self.path, token=token))
+        self.compactor = None
+        self.error = None
+
+    @classmethod
+    def create(cls, project_file, project, ids, **kwargs):
+        """把完整项目写为新的快照并开始新的日志"""
+        token = new_token()
+        write_snapshot(project_file, project, ids, 0, token)
+        journal_path(project_file).unlink(missing_ok=True)
+        return cls(project_file, 0, token, **kwargs)
+
+    def truncate_partial_record(self):
+        """去掉上次崩溃时只写了一半的最后一行，之后追加的记录才能被读到"""
+        data = self.path.read_bytes()
+        if data and not data.endswith(b'\n'):
+            self.file.truncate(data.rfind(b'\n') + 1)
+
+    def record(self, op, **fields):
+        """追加一条编辑记录并落盘"""
+        with self.lock:
+            self.seq += 1
+            line = json.dumps(dict(seq=self.seq, token=self.token, op=op, **fields), ensure_ascii=False,
+                              separators=(',', ':'), default=dict)
+            self.file.write(line.encode('utf-8') + b'\n')
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.records += 1
+        if self.records >= self.compact_records and not self.compacting:
+            self.compactor = threading.Thread(target=self.compact_in_background, daemon=True)
+            self.compactor.start()
+
+    @property
+    def compacting(self):
+        return self.compactor is not None and self.compactor.is_alive()
+
+    def compact_in_background(self):
+        try:
+            self.compact()
+        except Exception as e:  # 合并失败不影响编辑，日志仍然完整，下次再合并
+            self.error = e
+
+    def compact(self):
+        """把当前日志合并进快照，日志中只保留合并期间新追加的记录"""
+        with self.lock:
+            upto = self.seq
+        project, ids, seq, token = load_project(self.project_file, upto)
+        write_snapshot(self.project_file, project, ids, seq, token)
+        with self.lock:
+            # 其他快照遗留的记录不再保留
+            remaining = read_journal(self.path, upto, token=self.token)
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp, 'wb') as f:
+                for record in remaining:
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.file.close()
+            os.replace(tmp, self.path)
+            self.file = open(self.path, 'ab')
+            self.records = len(remaining)
+
+    def close(self, compact=True):
+        """等待后台合并结束；compact为True时把剩余的日志合并进快照"""
+        if self.compactor is not None:
+            self.compactor.join()
+        if compact and self.records:
+            self.compact()
+        self.file.close()
@@ -0,0 +1,299 @@
+"""
+SQLite题库
+题目逐行保存在SQLite数据库中，按题型、所属分组和标签建立索引；
+界面只读取可见行的摘要，选中时才读取完整题目，增删改只写入对应的一行
+"""
+
+import json
+import os
+import sqlite3
+
+
+# 题库文件扩展名（load_project遇到这些扩展名时从题库读取项目）
+BANK_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+# 题库格式版本（保存在 PRAGMA user_version 中）
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    group_name TEXT NOT NULL DEFAULT '',
+    number TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_questions_position ON questions(position);
+CREATE INDEX IF NOT EXISTS idx_questions_type ON questions(type, position);
+CREATE INDEX IF NOT EXISTS idx_questions_group ON questions(group_name, position);
+CREATE TABLE IF NOT EXISTS question_tags (
+    tag TEXT NOT NULL,
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, question_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_question_tags_question ON question_tags(question_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# 列表摘要中保留的题干长度
+TITLE_LENGTH = 60
+
+
+def question_tags(question):
+    """题目的标签列表（去掉空白和重复，保持顺序）"""
+    tags = question.get('tags') or []
+    if isinstance(tags, str):
+        tags = tags.replace('，', ',').split(',')
+    return list(dict.fromkeys(t.strip() for t in tags if t.strip()))
+
+
+class QuestionBank:
+    """SQLite题库
+
+    题目以JSON保存在 questions.data 中，题型、所属分组（question['group']）、
+    编号和题干摘要另存为列，供列表和筛选使用而不必解析JSON；
+    标签（question['tags']）保存在 question_tags 表中。
+    题目顺序由 position 列决定。
+
+    连接只能在创建它的线程中使用。
+
+    journal 为ProjectJournal时（内存题库编辑项目JSON的情况），
+    每次修改在写入数据库后追加一条编辑记录。
+    """
+
+    def __init__(self, path=':memory:'):
+        """
+        Args:
+            path: 数据库文件路径，默认为内存数据库（未保存的临时题库）
+        """
+        self.path = os.fspath(path)
+        self.journal = None
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if self.path != ':memory:':
+            # WAL模式下单行写入只追加日志，不阻塞读取
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            self.conn.close()
+            raise ValueError(f"题库格式版本 {version} 高于程序支持的版本 {SCHEMA_VERSION}")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @property
+    def is_temporary(self):
+        """是否为内存题库（关闭后内容丢失）"""
+        return self.path == ':memory:'
+
+    def close(self):
+        """关闭题库；有编辑日志时把日志合并进项目文件"""
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count()
+
+    @staticmethod
+    def _filter(type=None, group=None, tag=None):
+        """筛选条件，返回 (WHERE子句, 参数)"""
+        clauses, params = [], []
+        if type:
+            clauses.append("type = ?")
+            params.append(type)
+        if group:
+            clauses.append("group_name = ?")
+            params.append(group)
+        if tag:
+            clauses.append("id IN (SELECT question_id FROM question_tags WHERE tag = ?)")
+            params.append(tag)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return where, params
+
+    @staticmethod
+    def _columns(question):
+        text = question.get('text', '')
+        return (question.get('type', ''), question.get('group', '') or '',
+                str(question.get('number', '')), text[:TITLE_LENGTH],
+                json.dumps(question, ensure_ascii=False, default=dict))
+
+    def _write_tags(self, qid, question):
+        self.conn.execute("DELETE FROM question_tags WHERE question_id = ?", (qid,))
+        self.conn.executemany("INSERT INTO question_tags (tag, question_id) VALUES (?, ?)",
+                              [(tag, qid) for tag in question_tags(question)])
+
+    def _insert(self, question, position, qid=None):
+        cur = self.conn.execute(
+            "INSERT INTO questions (id, position, type, group_name, number, title, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", (qid, position) + self._columns(question))
+        self._write_tags(cur.lastrowid, question)
+        return cur.lastrowid
+
+    def _next_position(self):
+        return self.conn.execute("SELECT COALESCE(MAX(position), 0) + 1 FROM questions").fetchone()[0]
+
+    def count(self, type=None, group=None, tag=None):
+        """符合筛选条件的题目数"""
+        where, params = self._filter(type, group, tag)
+        return self.conn.execute("SELECT COUNT(*) FROM questions" + where, params).fetchone()[0]
+
+    def page(self, offset=0, limit=100, type=None, group=None, tag=None):
+        """按顺序读取一页题目摘要（不解析题目JSON）
+
+        Returns:
+            [{'id', 'type', 'group', 'number', 'title'}, ...]
+        """
+        where, params = self._filter(type, group, tag)
+        rows = self.conn.execute(
+            "SELECT id, type, group_name, number, title FROM questions" + where +
+            " ORDER BY position LIMIT ? OFFSET ?", params + [limit, offset])
+        return [{'id': r[0], 'type': r[1], 'group': r[2], 'number': r[3], 'title': r[4]}
+                for r in rows]
+
+    def summaries(self, ids):
+        """按id读取题目摘要，返回 {id: 摘要}（摘要格式同page）"""
+        result = {}
+        ids = list(ids)
+        # 分批查询，避免超过SQLite的参数个数限制
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = self.conn.execute(
+                "SELECT id, type, group_name, number, title FROM questions WHERE id IN (%s)"
+                % ", ".join("?" * len(chunk)), chunk)
+            for r in rows:
+                result[r[0]] = {'id': r[0], 'type': r[1], 'group': r[2], 'number': r[3], 'title': r[4]}
+        return result
+
+    def ids(self, type=None, group=None, tag=None):
+        """按顺序列出符合筛选条件的题目id"""
+        where, params = self._filter(type, group, tag)
+        return [r[0] for r in self.conn.execute(
+            "SELECT id FROM questions" + where + " ORDER BY position", params)]
+
+    def get(self, qid):
+        """读取完整题目，不存在时抛出KeyError"""
+        row = self.conn.execute("SELECT data FROM questions WHERE id = ?", (qid,)).fetchone()
+        if row is None:
+            raise KeyError(qid)
+        return json.loads(row[0])
+
+    def iter_questions(self, type=None, group=None, tag=None):
+        """按顺序逐个读取完整题目"""
+        where, params = self._filter(type, group, tag)
+        for (data,) in self.conn.execute(
+                "SELECT data FROM questions" + where + " ORDER BY position", params):
+            yield json.loads(data)
+
+    def add(self, question):
+        """在末尾添加题目，返回题目id"""
+        return self.add_many([question])[0]
+
+    def add_many(self, questions, ids=None):
+        """在一个事务中按顺序添加多道题目，返回题目id列表
+
+        Args:
+            ids: 指定各题的id（如从编辑日志还原的题库），默认自动分配
+        """
+        questions = list(questions)
+        with self.conn:
+            position = self._next_position()
+            ids = [self._insert(q, position + i, ids[i] if ids else None)
+                   for i, q in enumerate(questions)]
+        if self.journal is not None and ids:
+            self.journal.record('add', ids=ids, questions=questions)
+        return ids
+
+    def update(self, qid, question):
+        """更新题目（只写入这一行及其标签）"""
+        with self.conn:
+            cur = self.conn.execute(
+                "UPDATE questions SET type = ?, group_name = ?, number = ?, title = ?, data = ? "
+                "WHERE id = ?", self._columns(question) + (qid,))
+            if cur.rowcount == 0:
+                raise KeyError(qid)
+            self._write_tags(qid, question)
+        if self.journal is not None:
+            self.journal.record('update', id=qid, question=question)
+
+    def delete(self, qid):
+        """删除题目"""
+        with self.conn:
+            self.conn.execute("DELETE FROM questions WHERE id = ?", (qid,))
+        if self.journal is not None:
+            self.journal.record('delete', id=qid)
+
+    def swap(self, qid_a, qid_b):
+        """交换两道题目的顺序"""
+        with self.conn:
+            rows = dict(self.conn.execute(
+                "SELECT id, position FROM questions WHERE id IN (?, ?)", (qid_a, qid_b)))
+            if len(rows) != 2:
+                raise KeyError(qid_a if qid_a not in rows else qid_b)
+            self.conn.executemany("UPDATE questions SET position = ? WHERE id = ?",
+                                  [(rows[qid_b], qid_a), (rows[qid_a], qid_b)])
+        if self.journal is not None:
+            self.journal.record('swap', a=qid_a, b=qid_b)
+
+    def clear(self):
+        """删除全部题目"""
+        with self.conn:
+            self.conn.execute("DELETE FROM questions")
+        if self.journal is not None:
+            self.journal.record('clear')
+
+    def get_meta(self, key, default=None):
+        """读取题库级设置（如分组、考试说明）"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set_meta(self, key, value):
+        data = json.dumps(value, ensure_ascii=False)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is not None and row[0] == data:
+            return
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, data))
+        if self.journal is not None:
+            self.journal.record('meta', key=key, value=value)
+
+    def save_as(self, path):
+        """将整个题库复制到数据库文件（用于保存内存题库）"""
+        target = sqlite3.connect(os.fspath(path))
+        try:
+            self.conn.backup(target)
+        finally:
+            target.close()
+
+    def import_project(self, project, ids=None):
+        """用项目数据替换题库内容（ids同add_many）"""
+        self.clear()
+        self.add_many(project.get('questions', []), ids)
+        self.set_meta('groups', project.get('groups', []))
+        self.set_meta('tips', project.get('tips', ''))
+        self.set_meta('shuffle', project.get('shuffle'))
+
+    def export_project(self):
+        """导出为项目数据字典（格式与项目JSON相同）"""
+        project = {
+            'questions': list(self.iter_questions()),
+            'groups': self.get_meta('groups', []),
+            'tips': self.get_meta('tips', '')
+        }
+        shuffle = self.get_meta('shuffle')
+        if shuffle:
+            project['shuffle'] = shuffle
+        return project
@@ -0,0 +1,200 @@
+"""
+题目数据模型
+每种题型一个使用 __slots__ 的记录类，字段直接存放在槽中，不再为每道题保存一个带重复键名的字典；
+题型标记是驻留的字符串。记录实现只读的Mapping接口（q['text']、q.get('code')、dict(q)），
+可直接交给构建、组卷、评分等按字典读取题目的代码使用。
+
+字符串字段未设置时表示项目数据中没有该键；题目中其他的键（分值、标签、答案、测试用例等）
+及不是字符串的值原样保存在 extra 中，记录与字典可以无损地相互转换。
+"""
+
+import sys
+from collections.abc import Mapping
+
+
+SINGLE = sys.intern('single')
+CHOICE = sys.intern('choice')
+FILE = sys.intern('file')
+
+OPTION_KEYS = ('A', 'B', 'C', 'D')
+
+
+class Question(Mapping):
+    """题目记录基类（未知题型也使用此类）"""
+
+    __slots__ = ('type', 'number', 'text', 'code', 'question_image', 'group', 'extra')
+
+    # 以槽保存的字符串字段
+    FIELDS = ('number', 'text', 'code', 'question_image', 'group')
+    TYPE = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """由项目数据中的题目字典创建对应题型的记录"""
+        qtype = data.get('type')
+        record_class = QUESTION_TYPES.get(qtype, Question) if cls is Question else cls
+        q = record_class.__new__(record_class)
+        q.type = sys.intern(qtype) if isinstance(qtype, str) else qtype
+        extra = {}
+        fields = record_class.FIELD_SET
+        for key, value in data.items():
+            if key in fields and type(value) is str:
+                setattr(q, key, value)
+            elif key != 'type' and not q._set_special(key, value):
+                extra[key] = value
+        if extra:
+            q.extra = extra
+        return q
+
+    def _set_special(self, key, value):
+        """以槽保存非字符串字段（如单选题的选项），能保存时返回True"""
+        return False
+
+    def to_dict(self):
+        """转换为项目数据中的题目字典"""
+        data = {} if self.type is None else {'type': self.type}
+        for field in self.FIELDS:
+            value = getattr(self, field, None)
+            if value is not None:
+                data[field] = value
+        self._get_special(data)
+        extra = getattr(self, 'extra', None)
+        if extra:
+            data.update(extra)
+        return data
+
+    def _get_special(self, data):
+        pass
+
+    def __getitem__(self, key):
+        if key in self.FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if key == 'type' and self.type is not None:
+            return self.type
+        data = {}
+        self._get_special(data)
+        if key in data:
+            return data[key]
+        extra = getattr(self, 'extra', None)
+        if extra and key in extra:
+            return extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def __len__(self):
+        return len(self.to_dict())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def validate(self):
+        """检查题目数据是否完整，返回 (是否通过, 说明)"""
+        if not self.get('number') or not self.get('text'):
+            return False, "题目编号和题干不能为空"
+        return True, "验证通过"
+
+
+class SingleChoiceQuestion(Question):
+    """单选题：四个选项各占一个槽"""
+
+    __slots__ = ('option_a', 'option_b', 'option_c', 'option_d', 'answer')
+
+    FIELDS = Question.FIELDS + ('answer',)
+    OPTION_SLOTS = ('option_a', 'option_b', 'option_c', 'option_d')
+    TYPE = SINGLE
+
+    def _set_special(self, key, value):
+        # 只有A～D的字符串选项以槽保存，其他形式的选项原样放入extra
+        if key != 'options' or not isinstance(value, dict) or not value or \
+                not all(k in OPTION_KEYS and type(v) is str for k, v in value.items()):
+            return False
+        for k, v in value.items():
+            setattr(self, self.OPTION_SLOTS[OPTION_KEYS.index(k)], v)
+        return True
+
+    def _get_special(self, data):
+        options = {}
+        for key, slot in zip(OPTION_KEYS, self.OPTION_SLOTS):
+            value = getattr(self, slot, None)
+            if value is not None:
+                options[key] = value
+        if options:
+            data['options'] = options
+
+    def validate(self):
+        ok, message = super().validate()
+        if ok and not all(self.get('options', {}).values()):
+            return False, "单选题必须填写所有选项"
+        return ok, message
+
+
+class FillBlankQuestion(Question):
+    """选择填空题"""
+
+    __slots__ = ('blank_count', 'blank_score', 'choice_options')
+
+    FIELDS = Question.FIELDS + ('blank_count', 'blank_score', 'choice_options')
+    TYPE = CHOICE
+
+    def validate(self):
+        ok, message = super().validate()
+        if not ok:
+            return ok, message
+        if not self.get('blank_count') or not self.get('blank_score'):
+            return False, "选择填空题必须填写填空数量和分值"
+        try:
+            int(self['blank_count'])
+            int(self['blank_score'])
+        except ValueError:
+            return False, "填空数量和分值必须是数字"
+        return ok, message
+
+
+class FileQuestion(Question):
+    """文件操作题（C语言、Photoshop、自定义）"""
+
+    __slots__ = ('operation_template', 'custom_operation', 'open_file', 'material_folder',
+                 'sample_image', 'prog_template')
+
+    FIELDS = Question.FIELDS + ('operation_template', 'custom_operation', 'open_file',
+                                'material_folder', 'sample_image', 'prog_template')
+    TYPE = FILE
+
+    def validate(self):
+        ok, message = super().validate()
+        if ok and not any(self.get(field) for field in
+                          ('open_file', 'material_folder', 'prog_template', 'sample_image')):
+            return False, "文件操作题至少需要提供要打开的文件、素材文件夹、prog.c模板或样图之一"
+        return ok, message
+
+
+for _class in (Question, SingleChoiceQuestion, FillBlankQuestion, FileQuestion):
+    _class.FIELD_SET = frozenset(_class.FIELDS)
+
+# 题型标记 -> 记录类
+QUESTION_TYPES = {cls.TYPE: cls for cls in (SingleChoiceQuestion, FillBlankQuestion, FileQuestion)}
+
+
+def answer_letters(value):
+    """将答案（"B"、"ACB"、"A,C,B" 或字母列表）转换为大写字母列表，未作答的空为空串"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.replace('，', ',')
+        value = value.split(',') if ',' in value else list(value.replace(' ', '-'))
+    return [v.strip().upper() if v.strip() not in ('', '-', '_') else '' for v in value]
+
+
+def to_record(question):
+    """题目字典 -> 记录（已是记录时原样返回）"""
+    return question if isinstance(question, Question) else Question.from_dict(question)
+
+
+def validate(question):
+    """检查题目（字典或记录）是否完整，返回 (是否通过, 说明)"""
+    return to_record(question).validate()
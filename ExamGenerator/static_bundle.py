@@ -0,0 +1,205 @@
+"""
+静态资源打包
+把页面引用的样式表和脚本分别合并为一个文件（static/bundle.<哈希>.css 和 .js），
+页面只需加载两个文件；文件名包含内容哈希，内容变化后文件名随之变化，不会读到旧的缓存。
+已压缩的 .min 文件原样合并，其余文件做保守的压缩：只去掉注释和多余空白，
+保留换行（不影响JavaScript的自动分号插入）和 /*! 开头的版权注释
+"""
+
+import hashlib
+import re
+
+
+# 合并后的文件名：bundle.<内容哈希前10位>.css / .js
+BUNDLE_NAME = "bundle.{digest}{suffix}"
+
+# 标识符字符：两侧都是标识符字符时空白不能去掉
+_WORD = re.compile(r'[\w$\\]')
+# 其后的 / 是正则表达式而不是除号的关键字
+_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'instanceof', 'new',
+                   'delete', 'void', 'throw', 'yield', 'await'}
+_CSS_CHARSET = re.compile(r'@charset\s+(["\'])[^"\']*\1\s*;', re.I)
+
+
+def is_minified(name):
+    """文件名为 xxx.min.css / xxx.min.js 的视为已压缩"""
+    return '.min.' in name
+
+
+def _is_word(ch):
+    return bool(ch) and (bool(_WORD.match(ch)) or ord(ch) > 127)
+
+
+def _skip_string(text, i):
+    """text[i]为引号，返回字符串结束后的位置"""
+    quote = text[i]
+    i += 1
+    while i < len(text):
+        ch = text[i]
+        if ch == '\\':
+            i += 2
+            continue
+        i += 1
+        if ch == quote:
+            break
+    return i
+
+
+def _comment_end(text, i):
+    """text[i:i+2]为 /*，返回注释结束后的位置"""
+    end = text.find('*/', i + 2)
+    return len(text) if end < 0 else end + 2
+
+
+def minify_css(text):
+    """压缩CSS：去掉注释和多余空白（字符串内容保持不变）"""
+    out = []
+    i = 0
+    pending_space = False
+    while i < len(text):
+        ch = text[i]
+        if ch in '"\'':
+            end = _skip_string(text, i)
+            chunk = text[i:end]
+        elif text.startswith('/*', i):
+            end = _comment_end(text, i)
+            if not text.startswith('/*!', i):
+                i = end
+                pending_space = True
+                continue
+            chunk = text[i:end] + '\n'
+        elif ch.isspace():
+            i += 1
+            pending_space = True
+            continue
+        else:
+            end = i + 1
+            chunk = ch
+        if pending_space and out:
+            prev = out[-1][-1]
+            # 选择器中 “a :hover” 与 “a:hover” 含义不同，冒号前的空白保留
+            if prev not in '{};,>:\n' and chunk[0] not in '{};,>)':
+                out.append(' ')
+        pending_space = False
+        if chunk == '}' and out and out[-1] == ';':
+            out[-1] = chunk
+        else:
+            out.append(chunk)
+        i = end
+    return ''.join(out).strip() + '\n'
+
+
+def minify_js(text):
+    """保守地压缩JavaScript：去掉注释、缩进和空行，行内多余空白合并
+
+    换行一律保留，因此不改变自动分号插入的结果；字符串、模板字符串和正则表达式内容保持不变。
+    """
+    out = []
+    # 最近输出的非空白内容，用于判断 / 是除号还是正则表达式
+    last = ''
+    i = 0
+    pending = ''
+    while i < len(text):
+        ch = text[i]
+        if ch in '"\'`':
+            end = _skip_string(text, i)
+        elif text.startswith('/*', i):
+            end = _comment_end(text, i)
+            if not text.startswith('/*!', i):
+                if '\n' in text[i:end]:
+                    pending = '\n'
+                elif not pending:
+                    pending = ' '
+                i = end
+                continue
+        elif text.startswith('//', i):
+            end = text.find('\n', i)
+            i = len(text) if end < 0 else end
+            continue
+        elif ch.isspace():
+            if ch == '\n':
+                pending = '\n'
+            elif not pending:
+                pending = ' '
+            i += 1
+            continue
+        elif ch == '/' and _starts_regex(last):
+            end = _skip_regex(text, i)
+        elif _is_word(ch):
+            end = i + 1
+            while end < len(text) and _is_word(text[end]):
+                end += 1
+        else:
+            end = i + 1
+        chunk = text[i:end]
+        if pending and out:
+            prev = out[-1][-1]
+            if pending == '\n':
+                out.append('\n')
+            elif (_is_word(prev) and _is_word(chunk[0])) or (prev in '+-/' and chunk[0] in '+-/'):
+                out.append(' ')
+        pending = ''
+        out.append(chunk)
+        last = chunk
+        i = end
+    return ''.join(out).strip() + '\n'
+
+
+def _starts_regex(last):
+    """前一个记号之后的 / 是否开始一个正则表达式"""
+    if not last:
+        return True
+    if _is_word(last[-1]):
+        return last in _REGEX_KEYWORDS
+    return last[-1] not in ')]}"\'`'
+
+
+def _skip_regex(text, i):
+    """text[i]为正则表达式开头的 /，返回结尾 / 之后的位置（字符类中的 / 不结束正则）"""
+    i += 1
+    in_class = False
+    while i < len(text) and text[i] != '\n':
+        ch = text[i]
+        if ch == '\\':
+            i += 2
+            continue
+        i += 1
+        if ch == '[':
+            in_class = True
+        elif ch == ']':
+            in_class = False
+        elif ch == '/' and not in_class:
+            break
+    return i
+
+
+def bundle_name(data, suffix):
+    """按内容哈希命名合并后的文件"""
+    return BUNDLE_NAME.format(digest=hashlib.sha256(data).hexdigest()[:10], suffix=suffix)
+
+
+def bundle_css(sources):
+    """合并样式表，sources为 [(文件名, 内容文本)]，返回合并后的字节
+
+    @charset只能出现在文件开头，各文件中的@charset去掉后在开头统一写一个。
+    合并后的文件与原文件同在static/中，url()中的相对路径不需要改写。
+    """
+    parts = []
+    charset = False
+    for name, text in sources:
+        text, count = _CSS_CHARSET.subn('', text)
+        charset = charset or count > 0
+        parts.append(text.strip() + '\n' if is_minified(name) else minify_css(text))
+    return (('@charset "UTF-8";\n' if charset else '') + ''.join(parts)).encode('utf-8')
+
+
+def bundle_js(sources):
+    """合并脚本，sources为 [(文件名, 内容文本)]，返回合并后的字节
+
+    文件之间另起一行加分号，前一个文件末尾缺少分号（或是行注释）时不会与下一个文件的开头连在一起。
+    """
+    parts = []
+    for name, text in sources:
+        text = text.strip() if is_minified(name) else minify_js(text).rstrip()
+        parts.append(text + '\n;\n')
+    return ''.join(parts).encode('utf-8')
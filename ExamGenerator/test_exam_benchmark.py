@@ -0,0 +1,37 @@
+"""
+测试性能基准测试
+"""
+
+import subprocess
+import sys
+from exam_benchmark import PROGRAM_DIR, compare, measure_startup, run_benchmarks
+
+
+def test_run_and_compare(tmp_path):
+    results = run_benchmarks([6], tmp_path, repeat=1, pool=2, startup=False)
+    entries = results['results']['6']
+    assert {'template.generate_single_choice', 'template.generate_custom_operation', 'stage.static',
+            'stage.assets', 'stage.config', 'build.full', 'build.incremental'} <= set(entries)
+    assert entries['build.full']['items'] == 6 and entries['build.full']['seconds'] > 0
+    assert compare(results, results) == []
+
+    # 基准中的耗时只有本次的一半：变慢超过阈值的项目报告为回退
+    faster = {'results': {'6': {name: dict(entry, seconds=entry['seconds'] / 2)
+                                for name, entry in entries.items()}}}
+    regressions = compare(results, faster, min_delta=0)
+    assert {name for _, name, _, _ in regressions} == set(entries)
+    assert compare(results, faster, threshold=1.5, min_delta=0) == []
+
+
+def test_startup_imports():
+    # 生成、命令行和界面启动时不导入Tk以外的重量级模块，核心模块不依赖Tk
+    check = ("import sys, {}; loaded = set(sys.modules); "
+             "sys.exit(sorted(loaded & {{{}}}) or 0)")
+    core = check.format('exam_cli, exam_builder, html_template, question_model',
+                        "'tkinter', 'numpy', 'PIL'")
+    gui = check.format('exam_generator', "'numpy', 'PIL', 'exam_builder', 'exam_import'")
+    for code in (core, gui):
+        result = subprocess.run([sys.executable, '-c', code], cwd=PROGRAM_DIR, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+    assert 'startup.cli' in measure_startup(repeat=1)
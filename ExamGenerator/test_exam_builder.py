@@ -0,0 +1,233 @@
+"""
+测试试卷构建引擎和命令行入口（无需GUI）
+"""
+
+import json
+import tarfile
+import threading
+import zipfile
+import pytest
+from build_manifest import MANIFEST_NAME
+from exam_archive import build_archive
+from build_trace import BuildTrace
+from exam_builder import BuildCancelled, ExamBuilder, build_exam, load_project
+import exam_cli
+
+
+def make_project(tmp_path):
+    """创建包含三种题型的测试项目"""
+    material = tmp_path / "素材"
+    material.mkdir()
+    (material / "a.png").write_bytes(b"png-a")
+    (material / "prog.c").write_text("int main(){}", encoding='utf-8')
+    sample = tmp_path / "样图.jpg"
+    sample.write_bytes(b"jpg")
+    return {
+        'questions': [
+            {'type': 'single', 'number': '1', 'text': '题干', 'code': 'int a;',
+             'options': {'A': '1', 'B': '2', 'C': '3', 'D': '4'}},
+            {'type': 'choice', 'number': '2', 'text': '填空', 'code': 'x',
+             'blank_count': '3', 'blank_score': '4', 'choice_options': 'A、x'},
+            {'type': 'file', 'number': '3', 'text': 'PS', 'operation_template': 'ps',
+             'open_file': '', 'material_folder': str(material), 'sample_image': str(sample)},
+            {'type': 'file', 'number': '4', 'text': 'C', 'operation_template': 'c',
+             'open_file': str(material / "prog.c"), 'material_folder': str(material)},
+        ],
+        'groups': [{'name': '一、单选题', 'count': '1'}],
+        'tips': '考试说明\n',
+    }
+
+
+def test_build_exam(tmp_path):
+    out = tmp_path / "out"
+    result = build_exam(make_project(tmp_path), out)
+
+    assert result.question_count == 4
+    assert (out / "01.html").read_text(encoding='utf-8').startswith("<!doctype html>")
+    assert (out / "02-config.dat").read_text(encoding='utf-8') == "3\n4\n"
+    assert (out / "03" / "素材" / "a.png").read_bytes() == b"png-a"
+    assert (out / "static" / "example3.jpg").exists()
+    assert (out / "04-config.dat").read_text(encoding='utf-8') == "prog.c\na.png\n"
+    assert (out / "question-type.dat").read_text(encoding='utf-8') == "single\nchoice\nfile\nfile\n"
+    assert (out / "groups-info.dat").read_text(encoding='utf-8') == "一、单选题----1\n"
+    assert (out / "tips.txt").read_text(encoding='utf-8') == "考试说明\n"
+
+
+def test_cli_reports_failures(tmp_path, capsys):
+    good = tmp_path / "good.json"
+    good.write_text(json.dumps(make_project(tmp_path), ensure_ascii=False), encoding='utf-8')
+    bad = tmp_path / "bad.json"
+    bad.write_text(json.dumps({'questions': []}), encoding='utf-8')
+
+    code = exam_cli.main([str(good), str(bad), '-o', str(tmp_path / "out"), '-j', '2'])
+
+    assert code == 1
+    assert (tmp_path / "out" / "good" / "01.html").exists()
+    assert load_project(good)['tips'] == '考试说明\n'
+    assert "[失败]" in capsys.readouterr().err
+
+
+def test_incremental_rebuild(tmp_path):
+    project = make_project(tmp_path)
+    out = tmp_path / "out"
+    assert build_exam(project, out).rebuilt_count == 4
+
+    # 未修改时不重新生成任何题目
+    result = build_exam(project, out)
+    assert result.rebuilt_count == 0
+    assert result.removed == []
+
+    # 修改一道题只重新生成该题
+    project['questions'][1]['blank_score'] = '5'
+    assert build_exam(project, out).rebuilt_count == 1
+    assert (out / "02-config.dat").read_text(encoding='utf-8') == "3\n5\n"
+
+    # 被手动改动的输出文件会被重新生成
+    (out / "01.html").write_text("x", encoding='utf-8')
+    assert build_exam(project, out).rebuilt_count == 1
+    assert (out / "01.html").read_text(encoding='utf-8').startswith("<!doctype html>")
+
+    # 删除题目后清理遗留的文件和文件夹
+    del project['questions'][3]
+    result = build_exam(project, out)
+    assert "04.html" in result.removed
+    assert not (out / "04").exists()
+    assert not (out / "04-config.dat").exists()
+
+
+def test_shared_static_store(tmp_path):
+    project = make_project(tmp_path)
+    store = tmp_path / "store"
+    build_exam(project, tmp_path / "a", asset_store=store)
+    build_exam(project, tmp_path / "b", asset_store=store)
+
+    a = tmp_path / "a" / "static" / "jquery.min.js"
+    b = tmp_path / "b" / "static" / "jquery.min.js"
+    assert a.read_bytes() == b.read_bytes()
+    # 仓库中每份内容只有一个文件（静态资源和题目素材）
+    contents = {p.read_bytes() for p in (tmp_path / "a").rglob("*") if p.is_file()
+                and p.suffix not in ('.html', '.dat', '.txt', '.json')}
+    assert len([p for p in store.rglob("*") if p.is_file()]) == len(contents)
+
+    # 改为复制模式重新生成时不能改写仓库中的数据
+    (tmp_path / "a" / ".exam-manifest.json").unlink()
+    build_exam(project, tmp_path / "a", incremental=False)
+    assert b.read_bytes() == a.read_bytes()
+
+
+def test_reused_assets_are_linked(tmp_path):
+    project = make_project(tmp_path)
+    # 两道PS题共用同一套素材和样图
+    project['questions'].append(dict(project['questions'][2], number='5'))
+    out = tmp_path / "out"
+    result = build_exam(project, out)
+
+    assert (out / "05" / "素材" / "a.png").read_bytes() == b"png-a"
+    assert (out / "static" / "example5.jpg").read_bytes() == b"jpg"
+    # 素材和样图各只复制一次，其余位置为链接（文件系统不支持链接时为复制）
+    if (out / "03" / "素材" / "a.png").stat().st_nlink > 1:
+        assert result.linked_count >= 3
+        assert (out / "05" / "素材" / "a.png").samefile(out / "03" / "素材" / "a.png")
+
+
+def test_copy_progress_and_cancel(tmp_path):
+    project = make_project(tmp_path)
+    (tmp_path / "素材" / "big.psd").write_bytes(b"x" * (5 << 20))
+
+    progress = []
+    builder = ExamBuilder(project, tmp_path / "out", copy_progress=lambda done, total: progress.append((done, total)))
+    builder.build()
+    # 提交任务时总字节数仍在增加，只有已完成字节数按报告顺序递增
+    pipeline = builder.pipeline
+    assert pipeline.done_bytes == pipeline.total_bytes
+    assert max(progress) == (pipeline.done_bytes, pipeline.total_bytes)
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+
+    # 复制过程中取消：抛出BuildCancelled，且不留下写了一半的文件
+    cancel = threading.Event()
+    with pytest.raises(BuildCancelled):
+        build_exam(project, tmp_path / "out2", copy_workers=1, cancel_event=cancel,
+                   copy_progress=lambda done, total: cancel.set())
+    for path in (tmp_path / "out2").rglob("*"):
+        assert not path.name.endswith(".part")
+        if path.name == "big.psd":
+            assert path.stat().st_size == 5 << 20
+
+
+def test_material_listing_is_sorted(tmp_path):
+    project = make_project(tmp_path)
+    for name in ("z.png", "m.png", "b.png"):
+        (tmp_path / "素材" / name).write_bytes(name.encode())
+    out = tmp_path / "out"
+    build_exam(project, out)
+    assert (out / "03-config.dat").read_text(encoding='utf-8') == \
+        "素材\\a.png\n素材\\b.png\n素材\\m.png\n素材\\prog.c\n素材\\z.png\n"
+
+
+def test_archive_matches_directory(tmp_path):
+    project = make_project(tmp_path)
+    out = tmp_path / "out"
+    build_exam(project, out)
+    expected = {p.relative_to(out).as_posix(): p.read_bytes()
+                for p in out.rglob('*') if p.is_file() and p.name != MANIFEST_NAME}
+
+    archive = tmp_path / "exam.zip"
+    build_archive(project, archive)
+    with zipfile.ZipFile(archive) as zf:
+        assert {i.filename: zf.read(i) for i in zf.infolist() if not i.is_dir()} == expected
+        assert zf.getinfo("static/example3.jpg").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("01.html").compress_type == zipfile.ZIP_DEFLATED
+
+    # tar中相同内容的素材只保存一份，其余为硬链接
+    archive = tmp_path / "exam.tar.gz"
+    result = build_archive(project, archive)
+    assert result.linked_count == 1
+    with tarfile.open(archive) as tf:
+        links = {m.name: m.linkname for m in tf.getmembers() if m.islnk()}
+        assert links == {"04/a.png": "03/素材/a.png"}
+        extracted = tmp_path / "extracted"
+        tf.extractall(extracted)
+    assert {p.relative_to(extracted).as_posix(): p.read_bytes()
+            for p in extracted.rglob('*') if p.is_file()} == expected
+
+
+def test_bundle_static(tmp_path):
+    project = make_project(tmp_path)
+    project['bundle_static'] = True
+    out = tmp_path / "out"
+    result = build_exam(project, out)
+    bundles = sorted(p.name for p in (out / "static").glob("bundle.*"))
+    assert [name.rsplit('.', 1)[1] for name in bundles] == ['css', 'js']
+    page = (out / "01.html").read_text(encoding='utf-8')
+    for name in bundles:
+        assert f'./static/{name}' in page
+    assert 'jquery.min.js' not in page and not (out / "static" / "jquery.min.js").exists()
+    assert (out / "static" / "fonts").is_dir()
+    # 缺少的文件跳过并给出警告
+    assert any('viewer.min.js' in warning for warning in result.warnings)
+
+    # 关闭合并后恢复逐个引用，旧的合并文件被清理
+    project['bundle_static'] = False
+    build_exam(project, out)
+    assert not list((out / "static").glob("bundle.*"))
+    assert './static/jquery.min.js' in (out / "01.html").read_text(encoding='utf-8')
+
+
+def test_build_trace(tmp_path):
+    trace = BuildTrace()
+    build_exam(make_project(tmp_path), tmp_path / "out", trace=trace)
+
+    report = trace.report()
+    assert {'build', 'static', 'question', 'question_key', 'render', 'config', 'write_dat'} <= set(report['phases'])
+    assert report['phases']['question']['count'] == 4
+    # 03题：页面、config.dat，素材和样图在复制线程中复制
+    assert report['units']['03']['files_written'] == 2
+    assert report['units']['03']['files_copied'] + report['units']['03']['files_linked'] == 3
+    assert report['units']['project']['files_written'] == 3
+    assert report['totals']['bytes_written'] == sum(unit['bytes_written'] for unit in report['units'].values())
+
+    events = trace.chrome_trace()['traceEvents']
+    copies = [e for e in events if e['name'] == 'copy']
+    assert copies and all(e['ph'] == 'X' and e['dur'] >= 0 for e in copies)
+    assert {e['args']['unit'] for e in copies} >= {'03', '04'}
+    json.dumps(events)
@@ -0,0 +1,73 @@
+"""
+测试从已生成的试卷还原项目
+"""
+
+from build_manifest import MANIFEST_NAME
+from exam_builder import build_exam
+from exam_import import import_exam
+
+
+def make_project(tmp_path):
+    material = tmp_path / "素材"
+    material.mkdir()
+    (material / "a.png").write_bytes(b"png-a")
+    (tmp_path / "作品.psd").write_bytes(b"psd")
+    (tmp_path / "prog.c").write_text("int main(){}", encoding='utf-8')
+    image = tmp_path / "图.gif"
+    image.write_bytes(b"GIF89a\x10\x00\x08\x00")
+    return {
+        'questions': [
+            {'type': 'single', 'number': '1', 'text': '题干 &amp; <b>粗体</b>', 'code': 'a < b && c\n',
+             'question_image': str(image),
+             'options': {'A': '&c', 'B': '<i>2</i>', 'C': '3', 'D': ''}},
+            {'type': 'choice', 'number': '2', 'text': '填空', 'code': 'x【1】',
+             'blank_count': '3', 'blank_score': '4', 'choice_options': 'A、<x>\nB、y'},
+            {'type': 'file', 'number': '3', 'text': 'PS', 'operation_template': 'ps',
+             'custom_operation': '', 'open_file': str(tmp_path / "作品.psd"),
+             'material_folder': str(material), 'sample_image': str(image)},
+            {'type': 'file', 'number': '4', 'text': '编写<br>程序', 'operation_template': 'c',
+             'custom_operation': '', 'open_file': str(tmp_path / "prog.c"), 'material_folder': '',
+             'sample_image': ''},
+            {'type': 'file', 'number': '5', 'text': '自定义', 'operation_template': 'custom',
+             'custom_operation': '<p>步骤</p>', 'open_file': '', 'material_folder': str(material),
+             'sample_image': ''},
+        ],
+        'groups': [{'name': '一、单选题', 'count': '1'}],
+        'tips': '考试说明\n',
+    }
+
+
+def output_files(folder):
+    return {p.relative_to(folder).as_posix(): p.read_bytes()
+            for p in folder.rglob('*') if p.is_file() and p.name != MANIFEST_NAME}
+
+
+def test_import_round_trip(tmp_path):
+    project = make_project(tmp_path)
+    out = tmp_path / "out"
+    build_exam(project, out)
+
+    imported = import_exam(out)
+    assert imported['groups'] == project['groups'] and imported['tips'] == project['tips']
+    single, choice, ps, c, custom = imported['questions']
+    assert single['text'] == project['questions'][0]['text']
+    assert single['options'] == project['questions'][0]['options']
+    assert single['code'] == 'a < b && c\n'
+    assert single['question_image'] == str(out / "static" / "question_01.gif")
+    assert (choice['code'], choice['choice_options'], choice['blank_count']) == ('x【1】', 'A、<x>\nB、y', '3')
+    assert ps['operation_template'] == 'ps' and ps['open_file'] == str(out / "03" / "作品.psd")
+    assert ps['material_folder'] == str(out / "03" / "素材")
+    assert ps['sample_image'] == str(out / "static" / "example3.gif")
+    assert (c['operation_template'], c['text'], c['open_file']) == ('c', '编写<br>程序', str(out / "04" / "prog.c"))
+    assert (custom['operation_template'], custom['custom_operation']) == ('custom', '<p>步骤</p>')
+
+    # 用还原的项目重新生成，得到相同的试卷
+    rebuilt = tmp_path / "rebuilt"
+    build_exam(imported, rebuilt)
+    assert output_files(rebuilt) == output_files(out)
+
+    # 直接重新生成到原目录：引用的图片和素材就是要覆盖的输出文件
+    expected = output_files(out)
+    build_exam(imported, out, incremental=False)
+    assert output_files(out) == expected
+    assert not list(tmp_path.glob(".out-sources-*"))
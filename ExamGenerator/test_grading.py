@@ -0,0 +1,93 @@
+"""
+测试标准答案和批量评分（无需GUI）
+"""
+
+import csv
+import json
+import pytest
+import grading
+from grading import AnswerKey, Responses, grade, pack_answer, to_original_letters
+from option_shuffle import ShuffleMap
+from exam_grade import main
+
+
+QUESTIONS = [
+    {'type': 'single', 'number': '1', 'options': {'A': '1', 'B': '2', 'C': '3', 'D': '4'}, 'answer': 'B', 'score': '2'},
+    {'type': 'choice', 'number': '2', 'blank_count': '3', 'blank_score': '1.5', 'answers': ['A', 'C', 'E'],
+     'choice_options': 'A、a\nB、b\nC、c\nD、d\nE、e'},
+    {'type': 'file', 'number': '3', 'operation_template': 'custom'},
+    {'type': 'single', 'number': '4', 'options': {'A': '1', 'B': '2', 'C': '3', 'D': '4'}},
+]
+
+ROWS = [
+    ('张三', {1: 'B', 2: 'ACE', 4: 'A'}),
+    ('李四', {1: 'a', 2: 'A,B,E'}),
+    ('王五', {2: 'A-E'}),
+]
+
+
+def test_answer_key():
+    answer_key = AnswerKey(QUESTIONS)
+    assert answer_key.numbers == [1, 2, 4]
+    assert answer_key.keys == b'BACE '
+    assert list(answer_key.scores) == [2.0, 1.5, 1.5, 1.5, 1.0]
+    assert answer_key.missing == [4]
+
+
+def test_pack_answer():
+    assert pack_answer(' AB', 3) == 'AB '
+    assert pack_answer('a-c\n', 3) == 'A C'
+    assert pack_answer('A,,C', 3) == 'A C'
+    assert pack_answer(None, 2) == '  '
+
+
+def test_grade_python(monkeypatch):
+    monkeypatch.setattr(grading, 'np', None)
+    result = grade(Responses.from_rows(AnswerKey(QUESTIONS), ROWS))
+    assert result.totals == [6.5, 3.0, 3.0]
+    assert result.question_scores[1] == [0, 3.0, 0]
+
+
+def test_numpy_matches_python(monkeypatch):
+    pytest.importorskip('numpy')
+    answer_key = AnswerKey(QUESTIONS)
+    rows = [(str(i), {1: 'ABCD'[i % 4], 2: 'ABCDE'[i % 5] + 'C' + 'ABCDE'[i % 3]}) for i in range(200)]
+    responses = Responses.from_rows(answer_key, rows)
+    shuffle_map = ShuffleMap.generate(QUESTIONS, 200, seed=3)
+
+    fast = grade(to_original_letters(responses, shuffle_map))
+    monkeypatch.setattr(grading, 'np', None)
+    slow = grade(to_original_letters(responses, shuffle_map))
+    assert list(fast.totals) == slow.totals
+    assert fast.question_scores.tolist() == slow.question_scores
+
+
+def test_shuffle_remap(monkeypatch):
+    monkeypatch.setattr(grading, 'np', None)
+    answer_key = AnswerKey(QUESTIONS)
+    shuffle_map = ShuffleMap.generate(QUESTIONS, 2, seed=9)
+    shown = ''.join(shuffle_map.to_display(1, 2, letter) for letter in 'ACE')
+    responses = Responses.from_rows(answer_key, [('0', {}), ('1', {1: 'B', 2: shown})])
+    assert grade(to_original_letters(responses, shuffle_map)).totals == [0, 6.5]
+    # 负数序号不能取到最后一名考生的排列
+    with pytest.raises(IndexError):
+        to_original_letters(Responses.from_rows(answer_key, [('-1', {2: shown})]), shuffle_map)
+
+
+def test_cli(tmp_path, capsys):
+    project = tmp_path / "project.json"
+    project.write_text(json.dumps({'questions': QUESTIONS, 'groups': [], 'tips': ''}), encoding='utf-8')
+    responses = tmp_path / "responses.csv"
+    with open(responses, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['考生', '01', '02', '04'])
+        writer.writerow(['张三', 'B', 'ACE', 'A'])
+        writer.writerow(['李四', 'C', 'AC-', ''])
+    scores = tmp_path / "scores.csv"
+
+    assert main([str(project), str(responses), '-o', str(scores)]) == 0
+    assert '04' in capsys.readouterr().err
+    with open(scores, encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows == [['考生', '总分', '01', '02', '04'], ['张三', '6.5', '2', '4.5', '0'], ['李四', '3', '0', '3', '0']]
+    assert main([str(project), str(tmp_path / "none.csv")]) == 2
@@ -0,0 +1,31 @@
+"""
+测试HTML模板的缓存渲染和流式写入
+"""
+
+import io
+from html_template import HTMLTemplate
+
+
+def test_cached_shell_matches_format():
+    template = HTMLTemplate()
+    page = template.generate_fill_blank('1', '题干', 'int a;', 'A、x')
+    assert page.startswith(template.base_head.format(title="选择填空题"))
+    assert page.endswith(template.base_foot.format(extra_script='', extra_ready=''))
+    # 再次生成时复用缓存，结果不变
+    assert template.generate_fill_blank('1', '题干', 'int a;', 'A、x') == page
+
+
+def test_stream_output_is_identical():
+    template = HTMLTemplate()
+    pages = [
+        lambda **kw: template.generate_single_choice('1', '题干<b>', {'A': '1', 'B': '2', 'C': '3', 'D': '4'}, 'x<y', **kw),
+        lambda **kw: template.generate_fill_blank('2', '填空', 'int a;', 'A、x', **kw),
+        lambda **kw: template.generate_c_operation('功能', 3, '.jpg', **kw),
+        lambda **kw: template.generate_ps_operation('要求', 4, **kw),
+        lambda **kw: template.generate_custom_operation('要求', '<p>说明</p>', **kw),
+    ]
+    for generate in pages:
+        out = io.BytesIO()
+        written = generate(out=out)
+        assert out.getvalue() == HTMLTemplate.encode(generate())
+        assert written == len(out.getvalue())
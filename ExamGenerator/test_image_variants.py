@@ -0,0 +1,88 @@
+"""
+测试图片尺寸读取和预览图生成（无需GUI）
+"""
+
+import struct
+import zlib
+import pytest
+import image_variants
+from image_variants import ImageOptimizer, image_size
+from exam_builder import build_exam
+
+
+def png_bytes(width, height):
+    """最小的PNG文件（只需要正确的IHDR即可读取尺寸）"""
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    chunk = struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr + struct.pack('>I', zlib.crc32(b'IHDR' + ihdr))
+    return b'\x89PNG\r\n\x1a\n' + chunk
+
+
+def test_image_size(tmp_path):
+    png = tmp_path / "a.png"
+    png.write_bytes(png_bytes(714, 221))
+    gif = tmp_path / "a.gif"
+    gif.write_bytes(b'GIF89a' + struct.pack('<HH', 30, 20) + b'\0' * 8)
+    # JPEG：SOI、APP0段、SOF0段
+    jpg = tmp_path / "a.jpg"
+    jpg.write_bytes(b'\xff\xd8' + b'\xff\xe0\x00\x04ab' + b'\xff\xc0\x00\x0b\x08' + struct.pack('>HH', 1078, 800) + b'\0' * 4)
+    assert image_size(png) == (714, 221)
+    assert image_size(gif) == (30, 20)
+    assert image_size(jpg) == (800, 1078)
+    assert image_size(tmp_path / "none.png") is None
+
+
+def test_build_writes_image_size_without_pillow(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_variants, 'Image', None)
+    sample = tmp_path / "样图.png"
+    sample.write_bytes(png_bytes(800, 600))
+    project = {'questions': [{'type': 'file', 'number': '1', 'text': 'PS', 'operation_template': 'ps',
+                              'sample_image': str(sample)}], 'groups': [], 'tips': ''}
+    out = tmp_path / "out"
+    build_exam(project, out)
+    page = (out / "01.html").read_text(encoding='utf-8')
+    assert 'src="./static/example1.png" width="800" height="600"' in page
+    assert (out / "static" / "example1.png").read_bytes() == sample.read_bytes()
+
+
+def test_preview_and_full_image(tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    source = tmp_path / "样图.jpg"
+    Image.effect_noise((2400, 1200), 60).convert('RGB').save(source, quality=100)
+    optimizer = ImageOptimizer(tmp_path / "cache")
+
+    variant = optimizer.optimize(source)
+    assert variant.size == (640, 320)
+    assert image_size(variant.preview) == (640, 320)
+    assert image_size(variant.full) == (1920, 960)
+    # 缓存命中时不再重新编码
+    optimizer._encode = None
+    again = optimizer.optimize(source)
+    assert (again.preview, again.full) == (variant.preview, variant.full)
+
+    project = {'questions': [{'type': 'file', 'number': '1', 'text': 'PS', 'operation_template': 'ps',
+                              'sample_image': str(source)}], 'groups': [], 'tips': ''}
+    out = tmp_path / "out"
+    build_exam(project, out, image_cache=tmp_path / "cache")
+    page = (out / "01.html").read_text(encoding='utf-8')
+    assert 'data-original="./static/example1-full.jpg" width="640" height="320"' in page
+    assert (out / "static" / "example1-full.jpg").stat().st_size < source.stat().st_size
+
+
+def test_exif_orientation(tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    # 转正后为1000x2000、上红下蓝；以EXIF方向6（需顺时针旋转90°显示）保存
+    upright = Image.new('RGB', (1000, 2000), 'blue')
+    upright.paste('red', (0, 0, 1000, 1000))
+    source = tmp_path / "照片.jpg"
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    upright.transpose(Image.Transpose.ROTATE_90).save(source, exif=exif)
+    assert image_size(source) == (2000, 1000)
+
+    variant = ImageOptimizer(tmp_path / "cache").optimize(source)
+    assert variant.size == (640, 1280)
+    assert image_size(variant.full) == (960, 1920)
+    with Image.open(variant.preview) as preview:
+        assert preview.size == (640, 1280)
+        red, green, blue = preview.getpixel((320, 100))
+        assert red > 200 and blue < 50
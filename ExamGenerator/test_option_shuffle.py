@@ -0,0 +1,54 @@
+"""
+测试选项乱序和排列表（无需GUI）
+"""
+
+from exam_builder import build_exam
+from option_shuffle import MAP_NAME, ShuffleMap, choice_option_letters
+
+
+QUESTIONS = [
+    {'type': 'single', 'number': '1', 'text': '单选', 'options': {'A': '1', 'B': '2', 'C': '3', 'D': '4'}},
+    {'type': 'choice', 'number': '2', 'text': '填空', 'code': 'x', 'blank_count': '2', 'blank_score': '2',
+     'choice_options': 'A、char\nB、ch\nC、\\0\nD、int\nE、gets'},
+    {'type': 'file', 'number': '3', 'text': '操作', 'operation_template': 'custom'},
+]
+
+
+def test_choice_option_letters():
+    assert choice_option_letters('备选项：\nA、x\n  B.y\nC．z\n说明') == ['A', 'B', 'C']
+
+
+def test_shuffle_map_round_trip():
+    shuffle_map = ShuffleMap.generate(QUESTIONS, 1000, seed=5)
+    assert shuffle_map.slots == [[1, 4], [2, 5]]
+    assert len(shuffle_map.data) == 1000 * 9
+
+    loaded = ShuffleMap.from_bytes(shuffle_map.to_bytes())
+    assert loaded.data == shuffle_map.data
+    assert ShuffleMap.generate(QUESTIONS, 1000, seed=5).data == shuffle_map.data
+
+    for candidate in (0, 999):
+        for number, n in shuffle_map.slots:
+            assert sorted(shuffle_map.order(candidate, number)) == list(range(n))
+            for letter in 'ABCDE'[:n]:
+                shown = shuffle_map.to_display(candidate, number, letter)
+                assert shuffle_map.to_original(candidate, number, shown) == letter
+    assert shuffle_map.order(0, 3) is None
+    assert shuffle_map.fragment(0, 3) == ''
+    assert shuffle_map.fragment(0, 1).startswith('shuffle=')
+
+
+def test_build_writes_shared_pages_and_map(tmp_path):
+    out = tmp_path / "out"
+    build_exam({'questions': QUESTIONS, 'groups': [], 'tips': ''}, out)
+    assert not (out / MAP_NAME).exists()
+    assert '选项乱序' not in (out / "01.html").read_text(encoding='utf-8')
+
+    project = {'questions': QUESTIONS, 'groups': [], 'tips': '', 'shuffle': {'candidates': 300, 'seed': 1}}
+    result = build_exam(project, out)
+    assert result.rebuilt_count == 2
+    assert '选项乱序' in (out / "01.html").read_text(encoding='utf-8')
+    assert '备选项乱序' in (out / "02.html").read_text(encoding='utf-8')
+    shuffle_map = ShuffleMap.load(out / MAP_NAME)
+    assert shuffle_map.candidates == 300
+    assert shuffle_map.data == ShuffleMap.generate(QUESTIONS, 300, seed=1).data
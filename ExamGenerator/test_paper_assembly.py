@@ -0,0 +1,77 @@
+"""
+测试随机组卷（无需GUI）
+"""
+
+import itertools
+import json
+import pytest
+import exam_assemble
+from exam_builder import load_project, save_project
+from paper_assembly import AssemblyError, PaperAssembler, assemble_projects
+
+
+def make_bank():
+    questions = []
+    for i in range(60):
+        questions.append({'type': 'single', 'number': str(i), 'text': f'单选{i}', 'group': 'C语言',
+                          'score': [2, 3, 5][i % 3], 'difficulty': (i % 10) / 10,
+                          'tags': ['指针' if i % 4 == 0 else '循环']})
+    for i in range(20):
+        questions.append({'type': 'file', 'number': f'f{i}', 'text': f'操作{i}', 'score': 20,
+                          'material_folder': f'素材{i}'})
+    return questions
+
+
+SPEC = {
+    'tips': '说明\n',
+    'max_overlap': 2,
+    'groups': [
+        {'name': '一、单选题', 'count': 5, 'type': 'single', 'score': 16,
+         'difficulty': [0.3, 0.6], 'topics': {'指针': 2}},
+        {'name': '二、操作题', 'count': 1, 'type': 'file'},
+    ],
+}
+
+
+def test_variants_meet_constraints():
+    bank = make_bank()
+    assembler = PaperAssembler(bank, SPEC, seed=1)
+    papers = assembler.assemble(20)
+
+    for single, files in papers:
+        assert len(single) == 5 and len(files) == 1
+        assert sum(bank[i]['score'] for i in single) == 16
+        assert 0.3 <= sum(bank[i]['difficulty'] for i in single) / 5 <= 0.6
+        assert sum('指针' in bank[i]['tags'] for i in single) >= 2
+    chosen = [set(single + files) for single, files in papers]
+    assert max(len(a & b) for a, b in itertools.combinations(chosen, 2)) <= 2
+
+
+def test_projects_are_deterministic(tmp_path):
+    projects = assemble_projects(make_bank(), SPEC, 5, seed=7, base_dir=tmp_path)
+    assert projects == assemble_projects(make_bank(), SPEC, 5, seed=7, base_dir=tmp_path)
+    assert projects != assemble_projects(make_bank(), SPEC, 5, seed=8, base_dir=tmp_path)
+
+    project = projects[0]
+    assert project['groups'] == [{'name': '一、单选题', 'count': '5'}, {'name': '二、操作题', 'count': '1'}]
+    assert project['tips'] == '说明\n'
+    assert project['questions'][-1]['material_folder'].startswith(str(tmp_path))
+
+
+def test_impossible_spec():
+    spec = {'groups': [{'name': '一、单选题', 'count': 5, 'type': 'single', 'score': 1}]}
+    with pytest.raises(AssemblyError):
+        PaperAssembler(make_bank(), spec).assemble(1)
+    with pytest.raises(AssemblyError):
+        PaperAssembler(make_bank(), {'groups': [{'name': '操作', 'count': 30, 'type': 'file'}]})
+
+
+def test_assemble_cli(tmp_path):
+    save_project({'questions': make_bank(), 'groups': [], 'tips': ''}, tmp_path / "bank.json")
+    (tmp_path / "spec.json").write_text(json.dumps(SPEC, ensure_ascii=False), encoding='utf-8')
+
+    out = tmp_path / "papers"
+    assert exam_assemble.main([str(tmp_path / "bank.json"), str(tmp_path / "spec.json"),
+                               '-n', '3', '--seed', '2', '-o', str(out)]) == 0
+    assert sorted(p.name for p in out.iterdir()) == ['paper-001.json', 'paper-002.json', 'paper-003.json']
+    assert len(load_project(out / "paper-001.json")['questions']) == 6
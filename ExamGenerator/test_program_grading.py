@@ -0,0 +1,79 @@
+"""
+测试C语言编程题评分（需要gcc，无需GUI）
+"""
+
+import shutil
+import pytest
+from program_grading import (COMPILE_ERROR, MISSING, NO_REGION, PASSED, TIMEOUT, WRONG_ANSWER,
+                             ProgramGrader, extract_program, run_limits, splice_program)
+
+
+TEMPLATE = """#include <stdio.h>
+main()
+{
+/****************************Program******************************/
+/****************************编程区域*****************************/
+
+// 在此处编写您的代码
+
+/****************************编程区域*****************************/
+/*******************************End*******************************/
+}
+"""
+
+QUESTIONS = [
+    {'type': 'single', 'options': {}},
+    {'type': 'file', 'operation_template': 'c', 'text': '求和', 'score': '10', 'time_limit': '1.5',
+     'tests': [{'input': '3 4\n', 'output': '7\n'}, {'input': '1 2', 'output': '3'}]},
+]
+
+
+def submission(code, outside=''):
+    return TEMPLATE.replace('// 在此处编写您的代码', code).replace('main()', outside + 'main()')
+
+
+def test_extract_and_splice():
+    code = extract_program(submission('int x;'))
+    assert 'int x;' in code
+    assert extract_program('main(){}') is None
+    # 编程区域以外的修改不会进入编译的源代码
+    source = splice_program(TEMPLATE, extract_program(submission('int x;', outside='#define X\n')))
+    assert 'int x;' in source and '#define X' not in source
+
+
+def test_run_limits():
+    assert run_limits(2, QUESTIONS[1]) == (1.5, 256)
+    assert run_limits(3, {'time_limit': '0.5', 'memory_limit': 64}) == (0.5, 64)
+    # 无效的限制在创建评分器时报告题号，而不是在评分中途出错
+    with pytest.raises(ValueError, match="第2题的内存限制"):
+        ProgramGrader([QUESTIONS[0], dict(QUESTIONS[1], memory_limit='1.5G')])
+    with pytest.raises(ValueError, match="第2题的运行时间限制"):
+        ProgramGrader([QUESTIONS[0], dict(QUESTIONS[1], time_limit='0')])
+
+
+@pytest.mark.skipif(shutil.which('gcc') is None, reason="需要gcc")
+def test_grade(tmp_path):
+    ok = submission('int a, b; scanf("%d %d", &a, &b); printf("%d\\n", a + b);')
+    submissions = {
+        'ok': {2: ok},
+        'same': {2: ok},
+        'wrong': {2: submission('printf("7\\n");')},
+        'loop': {2: submission('for (;;);')},
+        'bad': {2: submission('int a = ;')},
+        'nomark': {2: 'main(){}'},
+        'none': {2: None},
+    }
+    grader = ProgramGrader(QUESTIONS, cache_dir=tmp_path / "cache", workers=2)
+    assert grader.numbers == [2]
+    results = grader.grade(submissions)
+    assert results['ok'][2]['tests'] == [PASSED, PASSED]
+    assert results['ok'][2]['score'] == 10
+    assert results['same'][2]['score'] == 10
+    assert results['wrong'][2]['tests'] == [PASSED, WRONG_ANSWER]
+    assert results['wrong'][2]['score'] == 5
+    assert results['loop'][2]['tests'] == [TIMEOUT, TIMEOUT]
+    assert results['bad'][2]['status'] == COMPILE_ERROR
+    assert results['nomark'][2]['status'] == NO_REGION
+    assert results['none'][2]['status'] == MISSING
+    # 相同的提交只编译一次：ok和same共用一份，加上wrong、loop共三份可执行文件，以及bad的错误信息
+    assert len(list((tmp_path / "cache").glob('*/*'))) == 4
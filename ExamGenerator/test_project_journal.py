@@ -0,0 +1,74 @@
+"""
+测试项目编辑日志（自动保存）
+"""
+
+from exam_builder import load_project, save_project
+from project_journal import ProjectJournal, journal_path
+import project_journal
+from question_bank import QuestionBank
+
+
+def question(n):
+    return {'type': 'single', 'number': str(n), 'text': f'题{n}',
+            'options': {'A': '1', 'B': '2', 'C': '3', 'D': '4'}}
+
+
+def test_journal_replay_and_compaction(tmp_path):
+    file = tmp_path / "exam.json"
+    bank = QuestionBank()
+    bank.add_many([question(1), question(2), question(3)])
+    bank.journal = ProjectJournal.create(file, bank.export_project(), bank.ids(), compact_records=1000)
+
+    ids = bank.ids()
+    new = bank.add(question(4))
+    bank.update(ids[0], question(10))
+    bank.delete(ids[1])
+    bank.swap(ids[2], new)
+    bank.set_meta('tips', '说明')
+    expected = bank.export_project()
+
+    # 程序崩溃：快照未更新，日志最后一行只写了一半
+    with open(journal_path(file), 'ab') as f:
+        f.write(b'{"seq":99,"op":"del')
+    assert load_project(file)['questions'] == expected['questions']
+    project, restored_ids, seq, token = project_journal.load_project(file)
+    assert project['tips'] == '说明' and seq == 5
+
+    # 还原的题库继续使用原来的id，之后的编辑接着记录
+    restored = QuestionBank()
+    restored.import_project(project, restored_ids)
+    assert restored.ids() == bank.ids()
+    bank.journal.close(compact=False)
+    restored.journal = ProjectJournal(file, seq, token, compact_records=2)
+    restored.add(question(5))
+    restored.journal.compactor.join()
+    assert journal_path(file).read_bytes() == b''
+    restored.delete(new)
+    expected = restored.export_project()
+    restored.close()
+
+    # 关闭时日志合并进快照
+    assert journal_path(file).read_bytes() == b''
+    assert load_project(file)['questions'] == expected['questions']
+
+
+def test_stale_journal_ignored(tmp_path):
+    file = tmp_path / "exam.json"
+    bank = QuestionBank()
+    bank.add_many([question(1), question(2)])
+    bank.journal = ProjectJournal.create(file, bank.export_project(), bank.ids())
+    bank.delete(bank.ids()[0])
+    # 程序崩溃，日志没有合并；之后另一个项目整体保存到同一文件
+    bank.journal.file.close()
+    stale = journal_path(file).read_bytes()
+    new = {'questions': [question(21), question(22)], 'groups': [], 'tips': ''}
+    save_project(new, file)
+    assert not journal_path(file).exists()
+    assert load_project(file)['questions'] == new['questions']
+
+    # 即使旧日志仍留在原处，标记不同也不会重放到新的快照上
+    journal_path(file).write_bytes(stale)
+    assert load_project(file)['questions'] == new['questions']
+    ProjectJournal.create(file, new, [1, 2]).close()
+    journal_path(file).write_bytes(stale)
+    assert load_project(file)['questions'] == new['questions']
@@ -0,0 +1,65 @@
+"""
+测试SQLite题库（无需GUI）
+"""
+
+from exam_builder import load_project
+from question_bank import QuestionBank
+
+
+def make_questions():
+    return [
+        {'type': 'single', 'number': '1', 'text': '单选一', 'group': 'C语言', 'tags': ['2023', '指针'],
+         'options': {'A': '1', 'B': '2', 'C': '3', 'D': '4'}},
+        {'type': 'choice', 'number': '2', 'text': '填空', 'group': 'C语言', 'tags': ['2024'],
+         'blank_count': '3', 'blank_score': '4', 'choice_options': 'A、x'},
+        {'type': 'file', 'number': '3', 'text': 'PS', 'group': 'PS', 'tags': ['2023']},
+        {'type': 'single', 'number': '4', 'text': '单选二'},
+    ]
+
+
+def test_paged_queries_and_filters():
+    bank = QuestionBank()
+    ids = bank.add_many(make_questions())
+
+    assert bank.count() == 4
+    assert [r['number'] for r in bank.page(1, 2)] == ['2', '3']
+    assert bank.ids(type='single') == [ids[0], ids[3]]
+    assert bank.ids(group='C语言') == ids[:2]
+    assert bank.ids(tag='2023') == [ids[0], ids[2]]
+    assert bank.count(type='single', tag='2023') == 1
+    assert bank.get(ids[1])['choice_options'] == 'A、x'
+    assert bank.summaries([ids[2], ids[0]]) == {
+        ids[0]: {'id': ids[0], 'type': 'single', 'group': 'C语言', 'number': '1', 'title': '单选一'},
+        ids[2]: {'id': ids[2], 'type': 'file', 'group': 'PS', 'number': '3', 'title': 'PS'},
+    }
+
+
+def test_single_row_edits(tmp_path):
+    path = tmp_path / "bank.db"
+    with QuestionBank(path) as bank:
+        ids = bank.add_many(make_questions())
+        changed = dict(bank.get(ids[0]), text='已修改', tags=['2025'])
+        bank.update(ids[0], changed)
+        bank.swap(ids[0], ids[1])
+        bank.delete(ids[2])
+        bank.set_meta('groups', [{'name': '一、单选题', 'count': '1'}])
+
+    # 重新打开后修改仍在
+    with QuestionBank(path) as bank:
+        assert [r['number'] for r in bank.page()] == ['2', '1', '4']
+        assert bank.page()[1]['title'] == '已修改'
+        assert bank.ids(tag='2023') == []
+        assert bank.ids(tag='2025') == [ids[0]]
+
+    project = load_project(path)
+    assert [q['number'] for q in project['questions']] == ['2', '1', '4']
+    assert project['groups'] == [{'name': '一、单选题', 'count': '1'}]
+
+
+def test_save_temporary_bank(tmp_path):
+    bank = QuestionBank()
+    bank.import_project({'questions': make_questions(), 'groups': [], 'tips': '说明\n'})
+    bank.save_as(tmp_path / "saved.db")
+
+    with QuestionBank(tmp_path / "saved.db") as saved:
+        assert saved.export_project() == bank.export_project()
@@ -0,0 +1,49 @@
+"""
+测试题目记录和二进制项目格式
+"""
+
+from exam_builder import ExamBuilder, load_project, save_project
+from question_model import FileQuestion, Question, SingleChoiceQuestion, validate
+
+
+QUESTIONS = [
+    {'type': 'single', 'number': '1', 'text': '题干&amp;<b>1</b>', 'code': '',
+     'options': {'A': '甲', 'B': '乙', 'C': '丙', 'D': '丁'}, 'answer': 'B', 'score': 2},
+    {'type': 'choice', 'number': '2', 'text': '填空', 'code': 'int a;', 'choice_options': 'A. 1',
+     'blank_count': '3', 'blank_score': '2', 'answers': ['A', 'B', 'C']},
+    {'type': 'file', 'number': '3', 'text': '操作', 'operation_template': 'ps', 'custom_operation': '',
+     'open_file': '', 'material_folder': '/tmp/素材', 'sample_image': '', 'tags': ['PS']},
+    {'type': 'single', 'number': '4', 'text': '图片选项', 'options': {'A': {'image': 'a.png'}}},
+    {'number': '5', 'text': '没有题型'},
+]
+
+
+def test_record_round_trip_and_validation():
+    records = [Question.from_dict(q) for q in QUESTIONS]
+    assert type(records[0]) is SingleChoiceQuestion and type(records[2]) is FileQuestion
+    assert [dict(r) for r in records] == QUESTIONS
+    assert records[0]['options']['B'] == '乙' and records[0].get('score') == 2
+    assert not hasattr(records[0], '__dict__')
+
+    assert validate(QUESTIONS[0]) == (True, "验证通过")
+    assert not validate(dict(QUESTIONS[1], blank_count='三'))[0]
+    assert not validate(dict(QUESTIONS[2], material_folder=''))[0]
+    assert validate(dict(QUESTIONS[2], material_folder='', open_file='prog.c'))[0]
+    assert validate(dict(QUESTIONS[0], options=dict(QUESTIONS[0]['options'], D=''))) == (False, "单选题必须填写所有选项")
+
+
+def test_binary_project_round_trip(tmp_path):
+    project = {'questions': QUESTIONS, 'groups': [{'name': '单选', 'count': '1'}], 'tips': '说明'}
+    file = tmp_path / "exam.examb"
+    save_project(project, file)
+    loaded = load_project(file)
+    assert all(isinstance(q, Question) for q in loaded['questions'])
+    assert dict(loaded, questions=[dict(q) for q in loaded['questions']]) == project
+
+    # 记录可直接用于生成试卷，与使用字典时的结果相同
+    project['questions'] = QUESTIONS[:3]
+    save_project(project, file)
+    ExamBuilder(project, tmp_path / "a").build()
+    ExamBuilder(load_project(file), tmp_path / "b").build()
+    for page in ("01.html", "02.html", "03.html"):
+        assert (tmp_path / "a" / page).read_bytes() == (tmp_path / "b" / page).read_bytes()
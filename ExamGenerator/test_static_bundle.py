@@ -0,0 +1,18 @@
+"""
+测试静态资源合并和压缩
+"""
+
+from static_bundle import bundle_js, minify_css, minify_js
+
+
+def test_minify_css():
+    css = '/*! 版权 */\n/* 注释 */\na :hover , b > c {\n  content: "a  /* b */";\n  color : red ;\n}\n'
+    assert minify_css(css) == '/*! 版权 */\na :hover,b>c{content:"a  /* b */";color :red}\n'
+
+
+def test_minify_js():
+    js = ('// 注释\nvar a = b / 2 / c, re = /[/]\\/ x/g;  /* 注释 */\n\n'
+          'return a + +b - -c;\nvar s = "x // y", t = `  z  `\n(f)\n')
+    assert minify_js(js) == ('var a=b/2/c,re=/[/]\\/ x/g;\n'
+                             'return a+ +b- -c;\nvar s="x // y",t=`  z  `\n(f)\n')
+    assert bundle_js([('a.min.js', 'f()//x'), ('b.js', '(g)()')]) == b'f()//x\n;\n(g)()\n;\n'
@@ -0,0 +1,201 @@
+"""
+虚拟列表控件
+只为当前可见的几十行创建列表项，总行数再多滚动和增删也不会变慢；
+行文字按需通过回调读取并缓存
+"""
+
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+
+class VirtualListbox(ttk.Frame):
+    """虚拟滚动列表
+
+    列表内容是一组行键（如题目id），显示文字由 fetch_labels(键列表) 返回
+    {键: 文字}，只在行滚动到可见区域时读取。内部的 tk.Listbox 只保存可见的行，
+    滚动条按总行数计算位置。
+
+    增删改和交换只修改行键列表并重绘可见行，不会重新读取其他行的文字。
+    """
+
+    # 文字缓存的最大行数，超过后只保留可见行的缓存
+    CACHE_SIZE = 5000
+
+    def __init__(self, parent, fetch_labels, on_select=None, width=30, height=25):
+        """
+        Args:
+            fetch_labels: 回调 fetch_labels(键列表) -> {键: 显示文字}
+            on_select: 用户点击或用键盘选中一行时的回调 on_select()
+            width, height: 列表的初始宽度（字符）和高度（行）
+        """
+        super().__init__(parent)
+        self.fetch_labels = fetch_labels
+        self.on_select = on_select
+        self.keys = []
+        self.labels = {}
+        self.top = 0
+        self.selected = None
+        self.visible = height
+
+        self.scrollbar = ttk.Scrollbar(self, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # exportselection=False：焦点移到编辑区后选中行仍然保留
+        self.listbox = tk.Listbox(self, width=width, height=height, exportselection=False)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # 列表行高 = 字体行距 + 1 + 2 * 选中边框宽度（与Tk的Listbox一致）
+        font = tkfont.Font(font=self.listbox.cget('font'))
+        self.line_height = font.metrics('linespace') + 1 + 2 * int(self.listbox.cget('selectborderwidth'))
+        self.border = 2 * (int(self.listbox.cget('borderwidth')) + int(self.listbox.cget('highlightthickness')))
+
+        self.listbox.bind('<<ListboxSelect>>', self._on_click)
+        self.listbox.bind('<Configure>', self._on_resize)
+        self.listbox.bind('<MouseWheel>', self._on_wheel)
+        self.listbox.bind('<Button-4>', lambda e: self._scroll_by(-3))
+        self.listbox.bind('<Button-5>', lambda e: self._scroll_by(3))
+        self.listbox.bind('<Up>', lambda e: self._move_selection(-1))
+        self.listbox.bind('<Down>', lambda e: self._move_selection(1))
+        self.listbox.bind('<Prior>', lambda e: self._move_selection(-self.visible))
+        self.listbox.bind('<Next>', lambda e: self._move_selection(self.visible))
+
+    def __len__(self):
+        return len(self.keys)
+
+    # ---------- 内容 ----------
+
+    def set_keys(self, keys):
+        """替换全部行（清空选中和文字缓存，滚动到顶部）"""
+        self.keys = list(keys)
+        self.labels = {}
+        self.top = 0
+        self.selected = None
+        self.render()
+
+    def key(self, index):
+        return self.keys[index]
+
+    def insert(self, index, key, label=None):
+        """在index处插入一行"""
+        self.keys.insert(index, key)
+        if label is not None:
+            self.labels[key] = label
+        if self.selected is not None and self.selected >= index:
+            self.selected += 1
+        self.render()
+
+    def delete(self, index):
+        """删除一行（删除选中行时清除选中）"""
+        key = self.keys.pop(index)
+        if key not in self.keys:
+            self.labels.pop(key, None)
+        if self.selected is not None:
+            if self.selected == index:
+                self.selected = None
+            elif self.selected > index:
+                self.selected -= 1
+        self.render()
+
+    def update_row(self, index, label):
+        """修改一行的显示文字"""
+        self.labels[self.keys[index]] = label
+        if self.top <= index < self.top + self.visible:
+            self.render()
+
+    def swap(self, i, j):
+        """交换两行"""
+        self.keys[i], self.keys[j] = self.keys[j], self.keys[i]
+        if self.selected == i:
+            self.selected = j
+        elif self.selected == j:
+            self.selected = i
+        self.render()
+
+    # ---------- 选中 ----------
+
+    def selection(self):
+        """选中行的序号，未选中时返回None"""
+        return self.selected
+
+    def select(self, index):
+        """选中一行并滚动到可见位置（不触发on_select）"""
+        self.selected = index
+        self.see(index)
+
+    def see(self, index):
+        """滚动使index行可见"""
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.visible:
+            self.top = index - self.visible + 1
+        self.render()
+
+    # ---------- 绘制和滚动 ----------
+
+    def render(self):
+        """重绘可见行并更新滚动条"""
+        count = len(self.keys)
+        self.top = max(0, min(self.top, count - self.visible))
+        rows = self.keys[self.top:self.top + self.visible]
+
+        missing = [k for k in rows if k not in self.labels]
+        if missing:
+            if len(self.labels) > self.CACHE_SIZE:
+                self.labels = {k: self.labels[k] for k in rows if k in self.labels}
+            self.labels.update(self.fetch_labels(missing))
+
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *[self.labels.get(k, '') for k in rows])
+        if self.selected is not None and self.top <= self.selected < self.top + len(rows):
+            self.listbox.selection_set(self.selected - self.top)
+        self.listbox.yview_moveto(0)
+
+        if count:
+            self.scrollbar.set(self.top / count, min(1.0, (self.top + self.visible) / count))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def yview(self, *args):
+        """滚动条回调（moveto/scroll）"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.keys))
+            self.render()
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            self._scroll_by(step * self.visible if args[2] == 'pages' else step)
+
+    def _scroll_by(self, rows):
+        self.top += rows
+        self.render()
+        return 'break'
+
+    def _on_wheel(self, event):
+        # Windows上每格为120，macOS上为1
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_by(-3 * step)
+
+    def _on_resize(self, event):
+        visible = max(1, (event.height - self.border) // self.line_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def _on_click(self, event):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        self.selected = self.top + selection[0]
+        if self.on_select:
+            self.on_select()
+
+    def _move_selection(self, step):
+        if not self.keys:
+            return 'break'
+        index = 0 if self.selected is None else self.selected + step
+        self.select(max(0, min(index, len(self.keys) - 1)))
+        if self.on_select:
+            self.on_select()
+        return 'break'